@@ -0,0 +1,178 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+ADMIN_LEVELS = ('state', 'district', 'subdistrict', 'village')
+STATE_CODE = 22
+STATE_NAME = 'Chhattisgarh'
+
+
+class AdminLevel(NamedTuple):
+    name: str
+    codes: np.ndarray
+    names: np.ndarray
+    areas: np.ndarray
+    parent: np.ndarray
+
+
+def _alive_mask(frame: pd.DataFrame, year: Optional[int]) -> np.ndarray:
+    mask = np.ones(len(frame), dtype=bool)
+    if year is None:
+        return mask
+    if 'year' in frame:
+        mask &= frame['year'].fillna(-np.inf).to_numpy() <= year
+    if 'end_year' in frame:
+        mask &= ~(frame['end_year'].fillna(np.inf).to_numpy() <= year)
+    return mask
+
+
+def build_admin_level(name: str, frame: pd.DataFrame, parent_level: Optional[AdminLevel] = None,
+                      year: Optional[int] = None) -> AdminLevel:
+    frame = frame[_alive_mask(frame, year)]
+    codes = frame['lgd_code'].to_numpy(dtype=np.int64)
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    if len(codes) and (np.diff(codes) == 0).any():
+        duplicated = np.unique(codes[1:][np.diff(codes) == 0])
+        raise ValueError(f"Duplicate LGD code(s) at level '{name}': {duplicated.tolist()}")
+
+    parent = np.full(len(codes), -1, dtype=np.int32)
+    if parent_level is not None:
+        parent_codes = frame['parent_code'].to_numpy()[order]
+        if pd.isna(parent_codes).any():
+            raise ValueError(f"Every unit at level '{name}' needs a parent in level '{parent_level.name}'")
+        parent_codes = parent_codes.astype(np.int64)
+        idx = np.minimum(np.searchsorted(parent_level.codes, parent_codes), max(len(parent_level.codes) - 1, 0))
+        missing = (parent_level.codes[idx] != parent_codes) if len(parent_level.codes) else np.ones(len(codes), bool)
+        if missing.any():
+            raise ValueError(f"Unit(s) at level '{name}' reference unknown '{parent_level.name}' codes: "
+                             f"{sorted(set(parent_codes[missing].tolist()))}")
+        parent = idx.astype(np.int32)
+
+    areas = frame['area'].to_numpy(dtype=np.float64)[order] if 'area' in frame else np.full(len(codes), np.nan)
+    return AdminLevel(name, codes, frame['name'].to_numpy()[order], areas, parent)
+
+
+class AdminHierarchy:
+    def __init__(self, levels: Sequence[AdminLevel]) -> None:
+        if not levels:
+            raise ValueError("An administrative hierarchy needs at least one level")
+        self.levels: List[AdminLevel] = list(levels)
+        self._depth = {level.name: depth for depth, level in enumerate(self.levels)}
+        self._build_euler_ranges()
+
+    def _build_euler_ranges(self) -> None:
+        # Subtree sizes roll up bottom-up; preorder entry times then flow top-down
+        # as parent entry + 1 + sizes of earlier siblings, one vectorized pass per level.
+        sizes = [None] * len(self.levels)
+        sizes[-1] = np.ones(len(self.levels[-1].codes), dtype=np.int64)
+        for depth in range(len(self.levels) - 2, -1, -1):
+            below = self.levels[depth + 1]
+            sizes[depth] = 1 + np.bincount(below.parent, weights=sizes[depth + 1],
+                                           minlength=len(self.levels[depth].codes)).astype(np.int64)
+
+        self.tin: List[np.ndarray] = []
+        self.tout: List[np.ndarray] = []
+        tin = np.cumsum(sizes[0]) - sizes[0]
+        self.tin.append(tin)
+        self.tout.append(tin + sizes[0])
+        for depth in range(1, len(self.levels)):
+            level = self.levels[depth]
+            order = np.argsort(level.parent, kind='stable')
+            sorted_sizes = sizes[depth][order]
+            before = np.cumsum(sorted_sizes) - sorted_sizes
+            group_start = np.searchsorted(level.parent[order], level.parent[order], side='left')
+            tin = np.empty(len(level.codes), dtype=np.int64)
+            tin[order] = self.tin[depth - 1][level.parent[order]] + 1 + before - before[group_start]
+            self.tin.append(tin)
+            self.tout.append(tin + sizes[depth])
+        self._by_tin = [np.argsort(tin) for tin in self.tin]
+
+    def depth(self, level: str) -> int:
+        if level not in self._depth:
+            raise KeyError(f"Unknown administrative level '{level}'")
+        return self._depth[level]
+
+    def index(self, level: str, codes) -> np.ndarray:
+        known = self.levels[self.depth(level)].codes
+        codes = np.asarray(codes, dtype=np.int64)
+        idx = np.minimum(np.searchsorted(known, codes), max(len(known) - 1, 0))
+        missing = known[idx] != codes if len(known) else np.ones(codes.shape, dtype=bool)
+        if np.any(missing):
+            raise KeyError(f"Unknown {level} LGD code(s): {sorted(set(np.atleast_1d(codes[missing]).tolist()))}")
+        return idx
+
+    def contains(self, outer_level: str, outer_codes, inner_level: str, inner_codes) -> np.ndarray:
+        outer = self.depth(outer_level)
+        inner = self.depth(inner_level)
+        a = self.index(outer_level, outer_codes)
+        b = self.index(inner_level, inner_codes)
+        entry = self.tin[inner][b]
+        return (self.tin[outer][a] <= entry) & (entry < self.tout[outer][a]) & (outer <= inner)
+
+    def ancestor_at(self, level: str, codes, target_level: str) -> np.ndarray:
+        depth = self.depth(level)
+        target = self.depth(target_level)
+        if target > depth:
+            raise ValueError(f"'{target_level}' is below '{level}' in the hierarchy")
+        idx = self.index(level, codes)
+        for d in range(depth, target, -1):
+            idx = self.levels[d].parent[idx]
+        return self.levels[target].codes[idx]
+
+    def descendants(self, level: str, code: int, target_level: str) -> np.ndarray:
+        depth = self.depth(level)
+        target = self.depth(target_level)
+        if target < depth:
+            raise ValueError(f"'{target_level}' is above '{level}' in the hierarchy")
+        idx = int(self.index(level, code))
+        by_tin = self._by_tin[target]
+        entries = self.tin[target][by_tin]
+        lo = np.searchsorted(entries, self.tin[depth][idx], side='left')
+        hi = np.searchsorted(entries, self.tout[depth][idx], side='left')
+        return np.sort(self.levels[target].codes[by_tin[lo:hi]])
+
+    def rollup(self, values, from_level: str, to_level: str) -> np.ndarray:
+        source = self.depth(from_level)
+        target = self.depth(to_level)
+        if target > source:
+            raise ValueError(f"Cannot roll '{from_level}' values down to '{to_level}'")
+        totals = np.asarray(values, dtype=np.float64)
+        if len(totals) != len(self.levels[source].codes):
+            raise ValueError(f"Expected {len(self.levels[source].codes)} values for level '{from_level}'")
+        for d in range(source, target, -1):
+            totals = np.bincount(self.levels[d].parent, weights=totals, minlength=len(self.levels[d - 1].codes))
+        return totals
+
+    def counts(self, from_level: str, to_level: str) -> np.ndarray:
+        ones = np.ones(len(self.levels[self.depth(from_level)].codes))
+        return self.rollup(ones, from_level, to_level).astype(np.int64)
+
+    def level_summary(self, level: str) -> pd.DataFrame:
+        depth = self.depth(level)
+        unit = self.levels[depth]
+        summary = pd.DataFrame({'lgd_code': unit.codes, 'name': unit.names, 'area': unit.areas})
+        if depth > 0:
+            summary['parent_code'] = self.levels[depth - 1].codes[unit.parent]
+        for below in self.levels[depth + 1:]:
+            summary[f'n_{below.name}'] = self.counts(below.name, level)
+            if not np.isnan(below.areas).all():
+                summary[f'{below.name}_area'] = self.rollup(np.nan_to_num(below.areas), below.name, level)
+        return summary
+
+
+def build_admin_hierarchy(frames: Dict[str, pd.DataFrame], year: Optional[int] = None) -> AdminHierarchy:
+    levels: List[AdminLevel] = []
+    for name, frame in frames.items():
+        levels.append(build_admin_level(name, frame, levels[-1] if levels else None, year))
+    return AdminHierarchy(levels)
+
+
+def district_hierarchy(df: pd.DataFrame, year: Optional[int] = None, state_code: int = STATE_CODE,
+                       state_name: str = STATE_NAME) -> AdminHierarchy:
+    # Containment for the bundled dataset: every district lies in the one state,
+    # regardless of which district it was carved out of.
+    districts = df.rename(columns={'district': 'name'}).assign(parent_code=state_code)
+    state = pd.DataFrame({'lgd_code': [state_code], 'name': [state_name]})
+    return build_admin_hierarchy({'state': state, 'district': districts}, year=year)
@@ -0,0 +1,123 @@
+from typing import NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_import
+
+go = lazy_import('plotly.graph_objects')
+plotly_subplots = lazy_import('plotly.subplots')
+
+WHISKER_IQR = 1.5
+TOP_DISTRICTS = 10
+HISTOGRAM_BINS = 15
+
+
+class BoxStatistics(NamedTuple):
+    groups: np.ndarray
+    q1: np.ndarray
+    median: np.ndarray
+    q3: np.ndarray
+    mean: np.ndarray
+    lowerfence: np.ndarray
+    upperfence: np.ndarray
+    outliers: np.ndarray
+
+
+def sorted_groups(keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # One sort by (key, value): every group is a contiguous, already-sorted run,
+    # so per-group quantiles and fences are plain index arithmetic.
+    order = np.lexsort((values, keys))
+    groups, starts = np.unique(keys[order], return_index=True)
+    return groups, order, np.append(starts, len(keys))
+
+
+def grouped_quantiles(sorted_values: np.ndarray, offsets: np.ndarray, q: np.ndarray) -> np.ndarray:
+    # Linear interpolation between order statistics, numpy's default method.
+    counts = np.diff(offsets)
+    position = offsets[:-1, None] + np.asarray(q)[None, :] * (counts[:, None] - 1)
+    lo = np.floor(position).astype(np.int64)
+    hi = np.minimum(lo + 1, offsets[1:, None] - 1)
+    fraction = position - lo
+    return sorted_values[lo] * (1 - fraction) + sorted_values[hi] * fraction
+
+
+def box_statistics(keys: np.ndarray, values: np.ndarray) -> BoxStatistics:
+    keys = np.asarray(keys)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        empty = np.zeros(0)
+        return BoxStatistics(keys[:0], empty, empty, empty, empty, empty, empty, np.zeros(0, dtype=np.int64))
+    groups, order, offsets = sorted_groups(keys, values)
+    ordered = values[order]
+    q1, median, q3 = grouped_quantiles(ordered, offsets, np.array([0.25, 0.5, 0.75])).T
+    counts = np.diff(offsets)
+    mean = np.add.reduceat(ordered, offsets[:-1]) / counts
+
+    # Tukey whiskers: the most extreme values within 1.5 IQR of the box.
+    group = np.repeat(np.arange(len(groups)), counts)
+    spread = WHISKER_IQR * (q3 - q1)
+    inside = (ordered >= (q1 - spread)[group]) & (ordered <= (q3 + spread)[group])
+    lowerfence = np.minimum.reduceat(np.where(inside, ordered, np.inf), offsets[:-1])
+    upperfence = np.maximum.reduceat(np.where(inside, ordered, -np.inf), offsets[:-1])
+    return BoxStatistics(groups, q1, median, q3, mean, lowerfence, upperfence, order[~inside])
+
+
+def area_analysis_figure(df: pd.DataFrame, top: int = TOP_DISTRICTS, bins: int = HISTOGRAM_BINS):
+    years = df['year'].to_numpy(dtype=np.int64)
+    areas = df['area'].to_numpy(dtype=np.float64)
+    districts = df['district'].to_numpy(dtype=object)
+
+    fig = plotly_subplots.make_subplots(
+        rows=2, cols=2,
+        subplot_titles=('Area Distribution by Year', f'Top {top} Largest Districts',
+                        'Area vs Year Scatter', 'District Area Histogram'),
+        specs=[[{"type": "box"}, {"type": "bar"}],
+               [{"type": "scatter"}, {"type": "histogram"}]]
+    )
+
+    # Quartiles and whiskers are computed here, so the box panel ships a handful
+    # of numbers per year instead of every area, and stays one trace for any
+    # number of years; outliers share a single marker trace.
+    stats = box_statistics(years, areas)
+    labels = stats.groups.astype(str)
+    fig.add_trace(
+        go.Box(x=labels, q1=stats.q1, median=stats.median, q3=stats.q3, mean=stats.mean,
+               lowerfence=stats.lowerfence, upperfence=stats.upperfence, name='Area', showlegend=False),
+        row=1, col=1
+    )
+    fig.add_trace(
+        go.Scatter(x=years[stats.outliers].astype(str), y=areas[stats.outliers], mode='markers',
+                   text=districts[stats.outliers], marker=dict(color='#1f77b4', size=5), name='Outliers',
+                   showlegend=False),
+        row=1, col=1
+    )
+
+    largest = np.argsort(-areas, kind='stable')[:top]
+    fig.add_trace(
+        go.Bar(x=districts[largest], y=areas[largest], showlegend=False),
+        row=1, col=2
+    )
+
+    fig.add_trace(
+        go.Scatter(x=years, y=areas, mode='markers', text=districts, name='Districts',
+                   marker=dict(color=years, colorscale='Viridis', size=8), showlegend=False),
+        row=2, col=1
+    )
+
+    counts, edges = np.histogram(areas, bins=bins) if len(areas) else (np.zeros(0), np.zeros(1))
+    fig.add_trace(
+        go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), showlegend=False),
+        row=2, col=2
+    )
+
+    fig.update_layout(height=800, title_text="District Area Analysis", bargap=0)
+    fig.update_xaxes(title_text="Year", type='category', row=1, col=1)
+    fig.update_xaxes(title_text="District", row=1, col=2)
+    fig.update_xaxes(title_text="Year", row=2, col=1)
+    fig.update_xaxes(title_text="Area (km²)", row=2, col=2)
+    fig.update_yaxes(title_text="Area (km²)", row=1, col=1)
+    fig.update_yaxes(title_text="Area (km²)", row=1, col=2)
+    fig.update_yaxes(title_text="Area (km²)", row=2, col=1)
+    fig.update_yaxes(title_text="Count", row=2, col=2)
+    return fig
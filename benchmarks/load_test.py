@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import py1
+from lineage_service import DEFAULT_HOST, DEFAULT_PORT, LineageService
+
+
+def build_targets(df, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    codes = df['lgd_code'].tolist()
+    originals = df[df['parent_lgd'].isna()]['lgd_code'].tolist()
+    years = sorted(df['year'].unique().tolist())
+    targets = [f"/lineage/{code}" for code in codes]
+    targets += [f"/lineage/{code}?kind=ancestors" for code in codes]
+    targets += [f"/area-evolution/{code}" for code in originals]
+    targets += [f"/snapshot/{year}" for year in years]
+    targets += ['/statistics']
+    targets += [f"/lineage?codes={','.join(map(str, rng.sample(codes, min(5, len(codes)))))}" for _ in range(20)]
+    return targets
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, target: str,
+                   etag: Optional[str]) -> Tuple[int, Optional[str]]:
+    lines = [f"GET {target} HTTP/1.1", f"Host: {host}"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split(' ')[1])
+    headers = {name.strip().lower(): value.strip() for name, _, value in
+               (line.partition(':') for line in head[1:] if line)}
+    await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('etag')
+
+
+async def _worker(host: str, port: int, targets: List[str], deadline: float, revalidate: float,
+                  rng: random.Random, latencies: List[float], statuses: Counter, etags: Dict[str, str]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            target = rng.choice(targets)
+            etag = etags.get(target) if rng.random() < revalidate else None
+            start = time.perf_counter()
+            status, new_etag = await _request(reader, writer, host, target, etag)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if new_etag:
+                etags[target] = new_etag
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, targets: List[str], concurrency: int, duration: float,
+                   revalidate: float, seed: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    etags: Dict[str, str] = {}
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _worker(host, port, targets, deadline, revalidate, random.Random(seed + i), latencies, statuses, etags)
+        for i in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {'requests': len(latencies), 'elapsed_s': elapsed, 'throughput_rps': len(latencies) / elapsed,
+            'concurrency': concurrency, 'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+            'p50_ms': percentile(0.50), 'p95_ms': percentile(0.95), 'p99_ms': percentile(0.99),
+            'statuses': {str(status): n for status, n in sorted(statuses.items())}}
+
+
+def _start_local_service(df) -> Tuple[LineageService, int]:
+    service = LineageService(df)
+    ready = threading.Event()
+
+    def serve() -> None:
+        async def run() -> None:
+            event = asyncio.Event()
+            task = asyncio.create_task(service.serve(DEFAULT_HOST, 0, ready=event))
+            await event.wait()
+            ready.set()
+            await task
+        asyncio.run(run())
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return service, service.port
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the local lineage query service.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=None,
+                        help=f"port of a running service (default: start one in-process; usual port {DEFAULT_PORT})")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds")
+    parser.add_argument('--revalidate', type=float, default=0.5,
+                        help="fraction of repeat requests sent with If-None-Match")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="optional JSON results file")
+    args = parser.parse_args()
+
+    df = py1.load_district_data()
+    port = args.port
+    if port is None:
+        _, port = _start_local_service(df)
+
+    report = asyncio.run(run_load(args.host, port, build_targets(df, args.seed), args.concurrency,
+                                  args.duration, args.revalidate, args.seed))
+    print("=" * 60)
+    for name in ('requests', 'throughput_rps', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'):
+        value = report[name]
+        print(f"{name:<20}{value:>14,.2f}" if isinstance(value, float) else f"{name:<20}{value:>14,}")
+    print(f"{'statuses':<20}{json.dumps(report['statuses']):>14}")
+    print("=" * 60)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Results saved as '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
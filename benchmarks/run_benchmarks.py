@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import py1
+import visual
+from lineage_arrays import build_lineage_arrays
+from edge_bundling import bundle_edges
+from lineage_cache import LineageQueryCache
+from geometry import DistrictLocator
+from similarity import SimilarityIndex, build_lineage_signatures
+from subgraph import extract_subgraph
+from lineage_lca import LineageLCA
+from synthetic_lineage import generate_synthetic_geometries, generate_synthetic_lineage
+
+DEFAULT_SIZES = (100, 1_000, 10_000)
+LARGE_SIZES = (100_000, 1_000_000)
+PANEL_YEARS = range(2000, 2025)
+QUERY_SAMPLE = 200
+LOCATE_POINTS = 1_000_000
+SIMILARITY_QUERIES = 1_000
+
+BENCHMARKS: Dict[str, Dict[str, Any]] = {}
+
+
+def benchmark(name: str, max_size: Optional[int] = None) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        BENCHMARKS[name] = {'func': func, 'max_size': max_size}
+        return func
+    return decorator
+
+
+class BenchmarkContext:
+    def __init__(self, size: int, seed: int) -> None:
+        self.size = size
+        self.seed = seed
+        self.df = generate_synthetic_lineage(size, seed=seed)
+        self._cache: Dict[str, Any] = {}
+
+    def _get(self, key: str, factory: Callable) -> Any:
+        if key not in self._cache:
+            self._cache[key] = factory()
+        return self._cache[key]
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        return self._get('graph', lambda: py1.create_district_graph(self.df))
+
+    @property
+    def arrays(self):
+        return self._get('arrays', lambda: build_lineage_arrays(self.df))
+
+    @property
+    def lca(self) -> LineageLCA:
+        return self._get('lca', lambda: LineageLCA(self.arrays))
+
+    @property
+    def sample_codes(self) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        return self._get('sample_codes', lambda: rng.choice(self.df['lgd_code'].to_numpy(),
+                                                            size=min(QUERY_SAMPLE, self.size), replace=False))
+
+    @property
+    def progenitor(self) -> int:
+        def pick() -> int:
+            roots = self.df.loc[self.df['parent_lgd'].isna(), 'lgd_code'].to_numpy()[:50]
+            sizes = np.array([len(nx.descendants(self.graph, code)) for code in roots.tolist()])
+            return int(roots[np.argsort(sizes)[len(sizes) // 2]])
+        return self._get('progenitor', pick)
+
+    @property
+    def geometries(self):
+        return self._get('geometries', lambda: generate_synthetic_geometries(self.df['lgd_code'], seed=self.seed))
+
+    @property
+    def panel(self):
+        return self._get('panel', lambda: visual.build_time_series(self.df, PANEL_YEARS, self.seed))
+
+
+@benchmark('build_graph')
+def bench_build_graph(ctx: BenchmarkContext) -> None:
+    py1.create_district_graph(ctx.df)
+
+
+@benchmark('build_lineage_arrays')
+def bench_build_lineage_arrays(ctx: BenchmarkContext) -> None:
+    build_lineage_arrays(ctx.df)
+
+
+@benchmark('lineage_queries_networkx')
+def bench_lineage_queries_networkx(ctx: BenchmarkContext) -> None:
+    G = ctx.graph
+    for code in ctx.sample_codes.tolist():
+        nx.ancestors(G, code)
+        nx.descendants(G, code)
+
+
+@benchmark('lineage_queries_cached')
+def bench_lineage_queries_cached(ctx: BenchmarkContext) -> None:
+    cache = LineageQueryCache(ctx.graph, 'benchmark', maxsize=64)
+    hot = ctx.sample_codes[:32].tolist()
+    for _ in range(10):
+        for code in hot:
+            cache.get(code, 'ancestors')
+            cache.get(code, 'descendants')
+
+
+@benchmark('lca_build')
+def bench_lca_build(ctx: BenchmarkContext) -> None:
+    LineageLCA(ctx.arrays)
+
+
+@benchmark('lca_batch_queries')
+def bench_lca_batch_queries(ctx: BenchmarkContext) -> None:
+    rng = np.random.default_rng(ctx.seed)
+    codes = ctx.df['lgd_code'].to_numpy()
+    ctx.lca.common_origin_batch(rng.choice(codes, 10_000), rng.choice(codes, 10_000))
+
+
+@benchmark('area_evolution', max_size=100_000)
+def bench_area_evolution(ctx: BenchmarkContext) -> None:
+    py1.compute_area_evolution(ctx.df, ctx.graph, ctx.progenitor)
+
+
+@benchmark('geometry_index_build')
+def bench_geometry_index_build(ctx: BenchmarkContext) -> None:
+    DistrictLocator(ctx.geometries)
+
+
+@benchmark('point_in_district')
+def bench_point_in_district(ctx: BenchmarkContext) -> None:
+    locator = ctx._get('locator', lambda: DistrictLocator(ctx.geometries))
+    rng = np.random.default_rng(ctx.seed)
+    side = np.ceil(np.sqrt(ctx.size))
+    locator.locate(rng.uniform(0, side, LOCATE_POINTS), rng.uniform(0, side, LOCATE_POINTS))
+
+
+@benchmark('edge_bundling')
+def bench_edge_bundling(ctx: BenchmarkContext) -> None:
+    # Bundling cost does not depend on layout quality, so random positions stand
+    # in for a force or dot layout that would dominate the timing.
+    def layout():
+        rng = np.random.default_rng(ctx.seed)
+        return dict(zip(ctx.graph.nodes(), rng.uniform(0, 1000, (ctx.graph.number_of_nodes(), 2)).tolist()))
+    bundle_edges(ctx.graph, ctx._get('layout', layout))
+
+
+@benchmark('similarity_query')
+def bench_similarity_query(ctx: BenchmarkContext) -> None:
+    index = ctx._get('similarity', lambda: SimilarityIndex(build_lineage_signatures(ctx.df), 'bench'))
+    index.query(index.codes[:SIMILARITY_QUERIES], k=10)
+
+
+@benchmark('subgraph_extract')
+def bench_subgraph_extract(ctx: BenchmarkContext) -> None:
+    for code in ctx.sample_codes.tolist():
+        extract_subgraph(ctx.arrays, [code], hops=2, direction='undirected')
+
+
+@benchmark('time_series_generation')
+def bench_time_series_generation(ctx: BenchmarkContext) -> None:
+    visual.build_time_series(ctx.df, PANEL_YEARS, ctx.seed)
+
+
+@benchmark('heatmap_frames', max_size=10_000)
+def bench_heatmap_frames(ctx: BenchmarkContext) -> None:
+    visual.create_rolling_heatmap(ctx.panel)
+
+
+@benchmark('statistics')
+def bench_statistics(ctx: BenchmarkContext) -> None:
+    py1.compute_statistics(ctx.df, ctx.graph)
+
+
+@benchmark('figure_export', max_size=10_000)
+def bench_figure_export(ctx: BenchmarkContext) -> None:
+    fig = visual.create_animated_heatmap_plotly(ctx.panel)
+    with tempfile.TemporaryDirectory() as tmp:
+        fig.write_html(os.path.join(tmp, 'figure.html'))
+
+
+def run_benchmark(name: str, ctx: BenchmarkContext, repeat: int) -> Dict[str, Any]:
+    func = BENCHMARKS[name]['func']
+    func(ctx)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(ctx)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'benchmark': name, 'size': ctx.size, 'repeat': repeat, 'min_s': min(timings),
+            'median_s': statistics.median(timings), 'peak_mb': peak / 2 ** 20}
+
+
+def run_suite(sizes: List[int], names: List[str], repeat: int, seed: int) -> Dict[str, Any]:
+    results = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for size in sizes:
+            ctx = BenchmarkContext(size, seed)
+            for name in names:
+                max_size = BENCHMARKS[name]['max_size']
+                if max_size is not None and size > max_size:
+                    continue
+                result = run_benchmark(name, ctx, repeat if size < 100_000 else 1)
+                results.append(result)
+                print(f"{name:<28}{size:>10}{result['median_s'] * 1000:>12.2f} ms{result['peak_mb']:>10.1f} MB")
+    return {
+        'metadata': {'timestamp': datetime.now(timezone.utc).isoformat(), 'python': platform.python_version(),
+                     'numpy': np.__version__, 'networkx': nx.__version__, 'platform': platform.platform(),
+                     'seed': seed},
+        'results': results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> None:
+    previous = {(row['benchmark'], row['size']): row for row in baseline['results']}
+    print("\n" + "=" * 78)
+    print(f"{'Benchmark':<28}{'Size':>10}{'Baseline ms':>14}{'Current ms':>13}{'Ratio':>9}")
+    print("=" * 78)
+    for row in current['results']:
+        old = previous.get((row['benchmark'], row['size']))
+        if old is None:
+            continue
+        ratio = row['median_s'] / old['median_s'] if old['median_s'] else float('inf')
+        flag = '  REGRESSION' if ratio > 1 + threshold else ''
+        print(f"{row['benchmark']:<28}{row['size']:>10}{old['median_s'] * 1000:>14.2f}"
+              f"{row['median_s'] * 1000:>13.2f}{ratio:>9.2f}{flag}")
+    print("=" * 78)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the district lineage pipeline on synthetic data.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--large', action='store_true', help=f"also run sizes {LARGE_SIZES}")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="JSON results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', default=None, help="baseline JSON results file to compare against")
+    args = parser.parse_args()
+
+    sizes = sorted(set(args.sizes) | (set(LARGE_SIZES) if args.large else set()))
+    report = run_suite(sizes, args.only, args.repeat, args.seed)
+
+    output = args.output
+    if output is None:
+        results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+        os.makedirs(results_dir, exist_ok=True)
+        output = os.path.join(results_dir, f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nResults saved as '{output}'")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(report, json.load(handle))
+
+
+if __name__ == '__main__':
+    main()
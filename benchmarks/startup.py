@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_MODULES = ('main', 'py1', 'script', 'visual', 'clustering')
+DEFERRED_MODULES = ('sklearn', 'matplotlib', 'seaborn', 'scipy', 'plotly.graph_objects', 'plotly.express',
+                    'plotly.subplots', 'pydot')
+DEFAULT_BUDGET_S = 1.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'import_s': elapsed, 'loaded': [name for name in {deferred!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, repeat: int = 5) -> Dict[str, Any]:
+    # Each run gets a fresh interpreter so nothing is already sitting in sys.modules.
+    timings: List[float] = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        probe = _PROBE.format(module=module, deferred=DEFERRED_MODULES)
+        completed = subprocess.run([sys.executable, '-c', probe], cwd=REPO_ROOT, capture_output=True,
+                                   text=True, check=True)
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result['import_s'])
+        loaded = result['loaded']
+    return {'module': module, 'repeat': repeat, 'best_s': min(timings), 'eager_imports': loaded}
+
+
+def check_startup(modules: List[str], budget_s: float, repeat: int) -> Dict[str, Any]:
+    results = []
+    print("=" * 72)
+    print(f"{'Module':<16}{'Import ms':>12}{'Budget ms':>12}  Status")
+    print("=" * 72)
+    for module in modules:
+        result = measure_import(module, repeat)
+        result['budget_s'] = budget_s
+        result['ok'] = result['best_s'] <= budget_s and not result['eager_imports']
+        results.append(result)
+        status = 'ok' if result['ok'] else 'FAIL'
+        if result['eager_imports']:
+            status += f" (eagerly imports {', '.join(result['eager_imports'])})"
+        print(f"{module:<16}{result['best_s'] * 1000:>12.1f}{budget_s * 1000:>12.1f}  {status}")
+    print("=" * 72)
+    return {'python': sys.version.split()[0], 'results': results, 'ok': all(row['ok'] for row in results)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check that the entry modules import within a time budget.")
+    parser.add_argument('--modules', nargs='+', default=list(ENTRY_MODULES))
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_S, help="per-module import budget in seconds")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None, help="optional JSON results file")
+    args = parser.parse_args()
+
+    report = check_startup(args.modules, args.budget, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Results saved as '{args.output}'")
+    sys.exit(0 if report['ok'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from geometry import OPEN_ENDED, DistrictGeometries
+from lazy_imports import lazy_import
+
+go = lazy_import('plotly.graph_objects')
+
+TILE_SIZE = 256
+SNAP_DIGITS = 7
+MIN_QUANTIZATION = 1_000
+MAX_QUANTIZATION = 10_000_000
+CHOROPLETH_METRICS = ('area', 'splits')
+
+
+class Topology(NamedTuple):
+    arcs: List[np.ndarray]
+    ring_arcs: List[List[int]]
+
+
+def _vertex_ids(geoms: DistrictGeometries) -> np.ndarray:
+    # Coordinates are snapped before matching so that borders digitised twice with
+    # floating-point noise still resolve to the same shared vertices.
+    snapped = np.round(geoms.xy, SNAP_DIGITS)
+    _, ids = np.unique(snapped, axis=0, return_inverse=True)
+    return ids.ravel()
+
+
+def _junctions(geoms: DistrictGeometries, ids: np.ndarray) -> np.ndarray:
+    # A vertex is a junction when its occurrences do not all share the same
+    # neighbour pair: that is where a border between two units starts or ends.
+    position = np.arange(len(ids))
+    ring_start = np.repeat(geoms.vertex_ptr[:-1], np.diff(geoms.vertex_ptr))
+    ring_end = np.repeat(geoms.vertex_ptr[1:], np.diff(geoms.vertex_ptr))
+    prev_ids = ids[np.where(position == ring_start, ring_end - 1, position - 1)]
+    next_ids = ids[np.where(position == ring_end - 1, ring_start, position + 1)]
+    n = int(ids.max()) + 1 if len(ids) else 0
+    pair = np.minimum(prev_ids, next_ids) * n + np.maximum(prev_ids, next_ids)
+    distinct = np.unique(np.column_stack([ids, pair]), axis=0)
+    return np.bincount(distinct[:, 0], minlength=n) > 1
+
+
+def build_topology(geoms: DistrictGeometries) -> Topology:
+    ids = _vertex_ids(geoms)
+    junction = _junctions(geoms, ids)
+    arcs: List[np.ndarray] = []
+    arc_index: Dict[tuple, int] = {}
+    ring_arcs: List[List[int]] = []
+
+    def add_arc(segment_ids: np.ndarray, coords: np.ndarray) -> int:
+        key = tuple(segment_ids.tolist())
+        if key in arc_index:
+            return arc_index[key]
+        reverse = key[::-1]
+        if reverse in arc_index:
+            return ~arc_index[reverse]
+        arc_index[key] = len(arcs)
+        arcs.append(coords)
+        return len(arcs) - 1
+
+    for ring in range(len(geoms.hole)):
+        start, stop = geoms.vertex_ptr[ring], geoms.vertex_ptr[ring + 1]
+        ring_ids = ids[start:stop]
+        coords = geoms.xy[start:stop]
+        cuts = np.flatnonzero(junction[ring_ids])
+        if len(cuts) == 0:
+            # A ring with no junction is a single closed arc; rotate it to a canonical
+            # start so an identical ring elsewhere (island vs. hole) is shared.
+            first = int(np.argmin(ring_ids))
+            cuts = np.array([first])
+        rotated_ids = np.roll(ring_ids, -cuts[0])
+        rotated = np.roll(coords, -cuts[0], axis=0)
+        bounds = np.append(cuts - cuts[0], len(ring_ids))
+        refs = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            segment = np.append(np.arange(lo, hi), hi % len(ring_ids))
+            refs.append(add_arc(rotated_ids[segment], rotated[segment]))
+        ring_arcs.append(refs)
+    return Topology(arcs, ring_arcs)
+
+
+def _douglas_peucker(points: np.ndarray, tolerance: float, keep_shape: bool = False) -> np.ndarray:
+    n = len(points)
+    if n <= 2:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    closed = np.array_equal(points[0], points[-1])
+    # Closed arcs and arcs of rings built from one or two arcs always keep their
+    # farthest interior point, so those rings never collapse to a line; other
+    # open arcs may simplify all the way down to their endpoints.
+    if closed:
+        far = 1 + int(np.argmax(np.hypot(*(points[1:-1] - points[0]).T)))
+    elif keep_shape:
+        far = 1 + int(np.argmax(_segment_distance(points[1:-1], points[0], points[-1])))
+    else:
+        far = None
+    if far is None:
+        stack = [(0, n - 1)]
+    else:
+        keep[far] = True
+        stack = [(0, far), (far, n - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2:
+            continue
+        distance = _segment_distance(points[lo + 1:hi], points[lo], points[hi])
+        split = int(np.argmax(distance))
+        if distance[split] > tolerance:
+            split += lo + 1
+            keep[split] = True
+            stack.append((lo, split))
+            stack.append((split, hi))
+    if closed and keep.sum() < 4:
+        lo, hi = (0, far) if far > 1 else (far, n - 1)
+        keep[lo + 1 + int(np.argmax(_segment_distance(points[lo + 1:hi], points[lo], points[hi])))] = True
+    return points[keep]
+
+
+def _segment_distance(points: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    ab = b - a
+    length2 = float(ab @ ab)
+    if length2 == 0:
+        return np.hypot(*(points - a).T)
+    t = np.clip((points - a) @ ab / length2, 0.0, 1.0)
+    return np.hypot(*(points - a - t[:, None] * ab).T)
+
+
+def simplify_topology(topology: Topology, tolerance: float) -> Topology:
+    # Shared borders are single arcs, so each is simplified exactly once and both
+    # neighbours see the same simplified line: no gaps or slivers open up.
+    short_rings = {ref if ref >= 0 else ~ref for refs in topology.ring_arcs if len(refs) <= 2 for ref in refs}
+    return Topology([_douglas_peucker(arc, tolerance, index in short_rings) for index, arc in enumerate(topology.arcs)],
+                    topology.ring_arcs)
+
+
+def zoom_tolerance(zoom: int) -> float:
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def feature_ids(geoms: DistrictGeometries) -> List[str]:
+    return [f"{code}:{start}" if start != -OPEN_ENDED else str(code)
+            for code, start in zip(geoms.codes.tolist(), geoms.valid_from.tolist())]
+
+
+def encode_topojson(geoms: DistrictGeometries, topology: Topology, quantization: int = 100_000,
+                    names: Optional[Dict[int, str]] = None) -> Dict[str, Any]:
+    lo = geoms.xy.min(axis=0)
+    extent = np.maximum(geoms.xy.max(axis=0) - lo, 1e-12)
+    scale = extent / (quantization - 1)
+    encoded_arcs = []
+    for arc in topology.arcs:
+        q = np.round((arc - lo) / scale).astype(np.int64)
+        moved = np.concatenate(([True], (np.diff(q, axis=0) != 0).any(axis=1)))
+        moved[-1] = True
+        q = q[moved]
+        encoded_arcs.append(np.vstack([q[:1], np.diff(q, axis=0)]).tolist())
+
+    geometries = []
+    ids = feature_ids(geoms)
+    for unit in range(len(geoms.codes)):
+        polygons: List[List[List[int]]] = []
+        for ring in range(geoms.ring_ptr[unit], geoms.ring_ptr[unit + 1]):
+            if not geoms.hole[ring] or not polygons:
+                polygons.append([])
+            polygons[-1].append(topology.ring_arcs[ring])
+        code = int(geoms.codes[unit])
+        properties = {'lgd_code': code,
+                      'valid_from': None if geoms.valid_from[unit] == -OPEN_ENDED else int(geoms.valid_from[unit]),
+                      'valid_to': None if geoms.valid_to[unit] == OPEN_ENDED else int(geoms.valid_to[unit])}
+        if names and code in names:
+            properties['district'] = names[code]
+        geometry = {'type': 'Polygon', 'arcs': polygons[0]} if len(polygons) == 1 else \
+            {'type': 'MultiPolygon', 'arcs': polygons}
+        geometries.append(dict(geometry, id=ids[unit], properties=properties))
+
+    return {'type': 'Topology',
+            'transform': {'scale': scale.tolist(), 'translate': lo.tolist()},
+            'objects': {'districts': {'type': 'GeometryCollection', 'geometries': geometries}},
+            'arcs': encoded_arcs}
+
+
+def decode_topojson(topojson: Dict[str, Any], object_name: str = 'districts') -> Dict[str, Any]:
+    scale = np.asarray(topojson['transform']['scale'])
+    translate = np.asarray(topojson['transform']['translate'])
+    # Decoded coordinates are rounded to the quantization step; extra digits would
+    # only inflate the GeoJSON embedded in figures.
+    decimals = max(0, int(np.ceil(-np.log10(scale.min()))) + 1)
+    arcs = [np.round(np.cumsum(np.asarray(arc, dtype=np.int64), axis=0) * scale + translate, decimals)
+            for arc in topojson['arcs']]
+
+    def ring(refs: Sequence[int]) -> List[List[float]]:
+        parts = [arcs[ref] if ref >= 0 else arcs[~ref][::-1] for ref in refs]
+        coords = np.vstack([parts[0]] + [part[1:] for part in parts[1:]])
+        return coords.tolist()
+
+    features = []
+    for geometry in topojson['objects'][object_name]['geometries']:
+        if geometry['type'] == 'Polygon':
+            coordinates = [ring(refs) for refs in geometry['arcs']]
+        else:
+            coordinates = [[ring(refs) for refs in polygon] for polygon in geometry['arcs']]
+        features.append({'type': 'Feature', 'id': geometry['id'], 'properties': geometry['properties'],
+                         'geometry': {'type': geometry['type'], 'coordinates': coordinates}})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def geometry_fingerprint(geoms: DistrictGeometries) -> str:
+    digest = hashlib.sha1()
+    for array in (geoms.codes, geoms.valid_from, geoms.valid_to, geoms.ring_ptr, geoms.vertex_ptr, geoms.xy, geoms.hole):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class TopoJSONCache:
+    def __init__(self, geoms: DistrictGeometries, names: Optional[Dict[int, str]] = None,
+                 cache_dir: Optional[str] = None) -> None:
+        self.geoms = geoms
+        self.names = names
+        self.cache_dir = cache_dir
+        self.fingerprint = geometry_fingerprint(geoms)
+        self._topology: Optional[Topology] = None
+        self._topojson: Dict[int, Dict[str, Any]] = {}
+        self._geojson: Dict[int, Dict[str, Any]] = {}
+
+    @property
+    def topology(self) -> Topology:
+        if self._topology is None:
+            self._topology = build_topology(self.geoms)
+        return self._topology
+
+    def _path(self, zoom: int) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"districts-{self.fingerprint}-z{zoom}.topojson")
+
+    def topojson(self, zoom: int) -> Dict[str, Any]:
+        if zoom in self._topojson:
+            return self._topojson[zoom]
+        path = self._path(zoom)
+        if path is not None and os.path.exists(path):
+            with open(path) as handle:
+                encoded = json.load(handle)
+        else:
+            # Quantize to about half a pixel at this zoom: finer grids only add bytes.
+            tolerance = zoom_tolerance(zoom)
+            extent = float((self.geoms.xy.max(axis=0) - self.geoms.xy.min(axis=0)).max())
+            quantization = int(np.clip(2 * extent / tolerance, MIN_QUANTIZATION, MAX_QUANTIZATION))
+            encoded = encode_topojson(self.geoms, simplify_topology(self.topology, tolerance), quantization, self.names)
+            if path is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(path, 'w') as handle:
+                    json.dump(encoded, handle, separators=(',', ':'))
+        self._topojson[zoom] = encoded
+        return encoded
+
+    def geojson(self, zoom: int) -> Dict[str, Any]:
+        if zoom not in self._geojson:
+            self._geojson[zoom] = decode_topojson(self.topojson(zoom))
+        return self._geojson[zoom]
+
+
+def year_values(df: pd.DataFrame, geoms: DistrictGeometries, years: Sequence[int],
+                metric: str = 'area') -> pd.DataFrame:
+    if metric not in CHOROPLETH_METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {CHOROPLETH_METRICS}")
+    lookup = df.drop_duplicates('lgd_code').set_index('lgd_code')
+    ids = np.array(feature_ids(geoms), dtype=object)
+    frames = []
+    for year in years:
+        alive = (geoms.valid_from <= year) & (year < geoms.valid_to)
+        alive &= np.isin(geoms.codes, lookup.index.to_numpy()) & \
+            (lookup['year'].reindex(geoms.codes).fillna(np.inf).to_numpy() <= year)
+        codes = geoms.codes[alive]
+        if metric == 'area':
+            values = lookup.loc[codes, 'area'].to_numpy(dtype=np.float64)
+        else:
+            formed = df[df['year'] == year]
+            parents = [p for value in formed['parent_lgd'] for p in (value if isinstance(value, list) else [value])
+                       if p is not None and not pd.isna(p)]
+            splits = pd.Series(parents, dtype='int64').value_counts()
+            values = splits.reindex(codes).fillna(0).to_numpy(dtype=np.float64)
+        frames.append(pd.DataFrame({'year': year, 'feature_id': ids[alive], 'lgd_code': codes,
+                                    'district': lookup.loc[codes, 'district'].to_numpy(), 'value': values}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def create_choropleth_animation(df: pd.DataFrame, geoms: DistrictGeometries, metric: str = 'area', zoom: int = 6,
+                                cache: Optional[TopoJSONCache] = None, years: Optional[Sequence[int]] = None):
+    if cache is None:
+        cache = TopoJSONCache(geoms, names=dict(zip(df['lgd_code'], df['district'])))
+    geojson = cache.geojson(zoom)
+    if years is None:
+        years = sorted(df['year'].unique().tolist())
+    values = year_values(df, geoms, years, metric)
+    zmax = max(float(values['value'].max()), 1.0)
+    label = 'Area (km²)' if metric == 'area' else 'Split events'
+    hovertemplate = '%{text}<br>' + label + ': %{z:,.0f}<extra></extra>'
+
+    # The geometry is attached to the base trace only; frames carry just the
+    # per-year locations and values, which keeps the animation light to load.
+    by_year = {year: frame for year, frame in values.groupby('year')}
+    first = by_year.get(years[0], values.iloc[:0])
+    fig = go.Figure(
+        data=[go.Choropleth(geojson=geojson, featureidkey='id', locations=first['feature_id'], z=first['value'],
+                            text=first['district'], zmin=0, zmax=zmax, colorscale='Viridis',
+                            hovertemplate=hovertemplate, colorbar=dict(title=label), marker_line_width=0.5)],
+        frames=[go.Frame(data=[go.Choropleth(locations=frame['feature_id'], z=frame['value'], text=frame['district'])],
+                         name=str(year))
+                for year, frame in ((year, by_year.get(year, values.iloc[:0])) for year in years)],
+    )
+    fig.update_geos(fitbounds='locations', visible=False)
+    fig.update_layout(
+        title=f"District {label} by Year",
+        width=1000,
+        height=800,
+        updatemenus=[{
+            "buttons": [
+                {
+                    "args": [None, {"frame": {"duration": 800, "redraw": True},
+                                    "fromcurrent": True, "transition": {"duration": 0}}],
+                    "label": "Play",
+                    "method": "animate"
+                },
+                {
+                    "args": [[None], {"frame": {"duration": 0, "redraw": True},
+                                      "mode": "immediate", "transition": {"duration": 0}}],
+                    "label": "Pause",
+                    "method": "animate"
+                }
+            ],
+            "direction": "left",
+            "pad": {"r": 10, "t": 87},
+            "showactive": False,
+            "type": "buttons",
+            "x": 0.1,
+            "xanchor": "right",
+            "y": 0,
+            "yanchor": "top"
+        }],
+        sliders=[{
+            "active": 0,
+            "currentvalue": {"prefix": "Year:", "visible": True, "xanchor": "right"},
+            "pad": {"b": 10, "t": 50},
+            "len": 0.9,
+            "x": 0.1,
+            "y": 0,
+            "steps": [
+                {
+                    "args": [[str(year)], {"frame": {"duration": 0, "redraw": True},
+                                           "mode": "immediate", "transition": {"duration": 0}}],
+                    "label": str(year),
+                    "method": "animate"
+                } for year in years
+            ]
+        }]
+    )
+    return fig
@@ -0,0 +1,116 @@
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_import
+from lineage_arrays import build_lineage_arrays, topological_levels
+
+sklearn_cluster = lazy_import('sklearn.cluster')
+sklearn_metrics = lazy_import('sklearn.metrics')
+sklearn_preprocessing = lazy_import('sklearn.preprocessing')
+
+FEATURE_COLUMNS = ('year', 'area', 'depth', 'out_degree', 'n_splits', 'remnant_area_fraction')
+FEATURE_CACHE_SIZE = 8
+
+_feature_cache: 'OrderedDict[Hashable, Tuple[Optional[weakref.ref], pd.DataFrame]]' = OrderedDict()
+_sweep_matrix: Optional[np.ndarray] = None
+
+
+def build_lineage_features(df: pd.DataFrame) -> pd.DataFrame:
+    arrays = build_lineage_arrays(df)
+    n = len(arrays.codes)
+    _, depth = topological_levels(arrays)
+    out_degree = np.diff(arrays.indptr)
+    in_degree = np.diff(arrays.rev_indptr)
+
+    split_events = np.unique(np.stack([arrays.src.astype(np.int64), arrays.years[arrays.dst]]), axis=1)
+    n_splits = np.bincount(split_events[0], minlength=n)
+
+    carved_area = np.bincount(arrays.src, weights=arrays.areas[arrays.dst] / in_degree[arrays.dst], minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        remnant_fraction = np.where(arrays.areas > 0, 1 - carved_area / arrays.areas, 0.0)
+
+    return pd.DataFrame({
+        'lgd_code': arrays.codes, 'district': arrays.names, 'year': arrays.years, 'area': arrays.areas,
+        'depth': depth, 'out_degree': out_degree, 'n_splits': n_splits,
+        'remnant_area_fraction': np.clip(remnant_fraction, 0.0, 1.0),
+    })
+
+
+def lineage_features(df: pd.DataFrame, version: Optional[str] = None) -> pd.DataFrame:
+    # Keyed on the caller's dataset version when it has one, otherwise on the
+    # frame's identity: hashing the whole table on every lookup would cost about
+    # as much as rebuilding the features. Identity keys assume the frame is not
+    # mutated in place; pass a version when it might be.
+    key = version if version is not None else ('frame', id(df))
+    entry = _feature_cache.get(key)
+    if entry is not None and (entry[0] is None or entry[0]() is df):
+        _feature_cache.move_to_end(key)
+        return entry[1]
+    features = build_lineage_features(df)
+    _feature_cache[key] = (None if version is not None else weakref.ref(df), features)
+    _feature_cache.move_to_end(key)
+    if len(_feature_cache) > FEATURE_CACHE_SIZE:
+        _feature_cache.popitem(last=False)
+    return features
+
+
+def iter_feature_chunks(features: pd.DataFrame, chunk_rows: int = 100_000,
+                        columns: Sequence[str] = FEATURE_COLUMNS) -> Iterator[np.ndarray]:
+    for start in range(0, len(features), chunk_rows):
+        yield features.iloc[start:start + chunk_rows][list(columns)].to_numpy(dtype=np.float64)
+
+
+def fit_streaming_kmeans(chunks: Callable[[], Iterable[np.ndarray]], n_clusters: int, epochs: int = 3,
+                         random_state: int = 42) -> Dict[str, object]:
+    # chunks is called once per pass (scaling, each epoch, labelling) and its
+    # chunks are consumed as they arrive, so only one chunk is ever held here.
+    scaler = sklearn_preprocessing.StandardScaler()
+    for chunk in chunks():
+        scaler.partial_fit(chunk)
+    kmeans = sklearn_cluster.MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+    for _ in range(epochs):
+        for chunk in chunks():
+            kmeans.partial_fit(scaler.transform(chunk))
+    labels = [kmeans.predict(scaler.transform(chunk)).astype(np.int32) for chunk in chunks()]
+    return {'scaler': scaler, 'kmeans': kmeans,
+            'labels': np.concatenate(labels) if labels else np.zeros(0, dtype=np.int32)}
+
+
+def _init_sweep_worker(matrix: np.ndarray) -> None:
+    global _sweep_matrix
+    _sweep_matrix = matrix
+
+
+def _score_k(k: int, chunk_rows: int, sample_size: int, random_state: int) -> Dict[str, float]:
+    matrix = _sweep_matrix
+    starts = range(0, len(matrix), chunk_rows)
+    model = fit_streaming_kmeans(lambda: (matrix[start:start + chunk_rows] for start in starts), k,
+                                 random_state=random_state)
+    scaled = model['scaler'].transform(matrix)
+    score = sklearn_metrics.silhouette_score(scaled, model['labels'], sample_size=min(sample_size, len(matrix)),
+                                             random_state=random_state)
+    return {'k': k, 'silhouette': float(score), 'inertia': float(model['kmeans'].inertia_)}
+
+
+def sweep_k(features: pd.DataFrame, ks: Iterable[int] = range(2, 9), chunk_rows: int = 100_000,
+            sample_size: int = 10_000, max_workers: Optional[int] = None, random_state: int = 42) -> pd.DataFrame:
+    matrix = features[list(FEATURE_COLUMNS)].to_numpy(dtype=np.float64)
+    ks = [k for k in ks if 2 <= k < len(matrix)]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sweep_worker, initargs=(matrix,)) as executor:
+        results = list(executor.map(_score_k, ks, [chunk_rows] * len(ks), [sample_size] * len(ks),
+                                    [random_state] * len(ks)))
+    return pd.DataFrame(results, columns=['k', 'silhouette', 'inertia'])
+
+
+def cluster_districts(df: pd.DataFrame, n_clusters: int = 3, chunk_rows: int = 100_000,
+                      random_state: int = 42, version: Optional[str] = None) -> pd.DataFrame:
+    features = lineage_features(df, version).copy()
+    model = fit_streaming_kmeans(lambda: iter_feature_chunks(features, chunk_rows), n_clusters,
+                                 random_state=random_state)
+    features['cluster'] = model['labels']
+    return features
@@ -0,0 +1,48 @@
+import numpy as np
+
+PHILOX_M0 = np.uint64(0xD2511F53)
+PHILOX_M1 = np.uint64(0xCD9E8D57)
+PHILOX_W0 = np.uint32(0x9E3779B9)
+PHILOX_W1 = np.uint32(0xBB67AE85)
+PHILOX_ROUNDS = 10
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHIFT32 = np.uint64(32)
+
+
+def philox4x32(counter: np.ndarray, key: np.ndarray, rounds: int = PHILOX_ROUNDS) -> np.ndarray:
+    counter = np.asarray(counter, dtype=np.uint32)
+    key = np.asarray(key, dtype=np.uint32)
+    c0, c1, c2, c3 = (counter[..., i].astype(np.uint64) for i in range(4))
+    k0, k1 = key[..., 0].copy(), key[..., 1].copy()
+    with np.errstate(over='ignore'):
+        for round_index in range(rounds):
+            if round_index:
+                k0 += PHILOX_W0
+                k1 += PHILOX_W1
+            product0 = PHILOX_M0 * c0
+            product1 = PHILOX_M1 * c2
+            c0, c1, c2, c3 = ((product1 >> _SHIFT32) ^ c1 ^ k0.astype(np.uint64), product1 & _MASK32,
+                              (product0 >> _SHIFT32) ^ c3 ^ k1.astype(np.uint64), product0 & _MASK32)
+    return np.stack([c0, c1, c2, c3], axis=-1).astype(np.uint32)
+
+
+def _to_unit_interval(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    return ((high >> np.uint32(5)).astype(np.float64) * 67108864.0 + (low >> np.uint32(6))) / 9007199254740992.0
+
+
+def counter_uniforms(seed: int, lgd_codes, years, stream: int = 0) -> np.ndarray:
+    lgd_codes, years = np.broadcast_arrays(np.asarray(lgd_codes, dtype=np.int64), np.asarray(years, dtype=np.int64))
+    key = np.stack(np.broadcast_arrays(np.uint32(seed & 0xFFFFFFFF), lgd_codes.astype(np.uint32)), axis=-1)
+    zeros = np.zeros(years.shape, dtype=np.uint32)
+    counter = np.stack([years.astype(np.uint32), zeros + np.uint32(stream), zeros,
+                        zeros + np.uint32((seed >> 32) & 0xFFFFFFFF)], axis=-1)
+    words = philox4x32(counter, key)
+    return np.stack([_to_unit_interval(words[..., 0], words[..., 1]),
+                     _to_unit_interval(words[..., 2], words[..., 3])], axis=-1)
+
+
+def counter_normal(seed: int, lgd_codes, years, loc: float = 0.0, scale: float = 1.0, stream: int = 0) -> np.ndarray:
+    uniforms = counter_uniforms(seed, lgd_codes, years, stream)
+    radius = np.sqrt(-2.0 * np.log1p(-uniforms[..., 0]))
+    return loc + scale * radius * np.cos(2.0 * np.pi * uniforms[..., 1])
@@ -0,0 +1,153 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lineage_arrays import explode_parents, hashes_version, row_hashes
+from lineage_checks import IncrementalTopologicalOrder
+
+EDGE_KEY_BITS = 32
+
+
+class ChangeSet(NamedTuple):
+    old_version: str
+    new_version: str
+    added: pd.DataFrame
+    removed: pd.DataFrame
+    renamed: pd.DataFrame
+    reparented: pd.DataFrame
+    area_revised: pd.DataFrame
+    year_changed: pd.DataFrame
+    added_edges: pd.DataFrame
+    removed_edges: pd.DataFrame
+
+
+CHANGE_FIELDS = ChangeSet._fields[2:]
+
+
+def _code_order(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    codes = df['lgd_code'].to_numpy(dtype=np.int64)
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    if len(codes) and (np.diff(codes) == 0).any():
+        duplicates = np.unique(codes[1:][np.diff(codes) == 0])
+        raise ValueError(f"Duplicate LGD code(s): {duplicates.tolist()}")
+    return codes, order
+
+
+def _edge_keys(df: pd.DataFrame) -> np.ndarray:
+    # (child, parent) pairs packed into one uint64 so edge sets diff as sorted arrays.
+    parent_codes, child_codes = explode_parents(df)
+    if len(parent_codes) and max(parent_codes.max(), child_codes.max()) >= 2 ** EDGE_KEY_BITS:
+        raise ValueError(f"LGD codes must fit in {EDGE_KEY_BITS} bits to be diffed")
+    keys = np.sort((child_codes.astype(np.uint64) << np.uint64(EDGE_KEY_BITS)) | parent_codes.astype(np.uint64))
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+
+def _edge_frame(keys: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({'parent_lgd': (keys & np.uint64(2 ** EDGE_KEY_BITS - 1)).astype(np.int64),
+                         'child_lgd': (keys >> np.uint64(EDGE_KEY_BITS)).astype(np.int64)})
+
+
+def _column_changes(old: pd.DataFrame, new: pd.DataFrame, old_rows: np.ndarray, new_rows: np.ndarray,
+                    codes: np.ndarray, column: str) -> pd.DataFrame:
+    # Only the changed rows are materialized; the comparison itself stays columnar.
+    before = old[column].take(old_rows).reset_index(drop=True)
+    after = new[column].take(new_rows).reset_index(drop=True)
+    both_missing = (before.isna() & after.isna()).to_numpy(dtype=bool)
+    changed = before.ne(after).fillna(True).to_numpy(dtype=bool) & ~both_missing
+    return pd.DataFrame({'lgd_code': codes[changed], f'old_{column}': before[changed].to_numpy(),
+                         f'new_{column}': after[changed].to_numpy()})
+
+
+def _parent_lists(keys: np.ndarray, codes: np.ndarray) -> List[List[int]]:
+    children = (keys >> np.uint64(EDGE_KEY_BITS)).astype(np.int64)
+    parents = (keys & np.uint64(2 ** EDGE_KEY_BITS - 1)).astype(np.int64)
+    lo = np.searchsorted(children, codes, side='left')
+    hi = np.searchsorted(children, codes, side='right')
+    return [parents[start:stop].tolist() for start, stop in zip(lo.tolist(), hi.tolist())]
+
+
+def diff_datasets(old_df: pd.DataFrame, new_df: pd.DataFrame, old_version: Optional[str] = None,
+                  new_version: Optional[str] = None) -> ChangeSet:
+    old_codes, old_order = _code_order(old_df)
+    new_codes, new_order = _code_order(new_df)
+    common, old_pos, new_pos = np.intersect1d(old_codes, new_codes, assume_unique=True, return_indices=True)
+    old_rows, new_rows = old_order[old_pos], new_order[new_pos]
+
+    # Rows are hashed once, columnwise; the hashes give both release versions and
+    # the handful of matched rows that differ at all, and only those are compared
+    # field by field or have their parent lists exploded.
+    old_hashes = row_hashes(old_df)
+    new_hashes = row_hashes(new_df)
+    dirty = old_hashes[old_rows] != new_hashes[new_rows]
+    old_rows, new_rows, dirty_codes = old_rows[dirty], new_rows[dirty], common[dirty]
+
+    added_rows = np.sort(new_order[~np.isin(new_codes, common, assume_unique=True)])
+    removed_rows = np.sort(old_order[~np.isin(old_codes, common, assume_unique=True)])
+    old_edges = _edge_keys(old_df.iloc[np.sort(np.concatenate([old_rows, removed_rows]))])
+    new_edges = _edge_keys(new_df.iloc[np.sort(np.concatenate([new_rows, added_rows]))])
+    added_keys = np.setdiff1d(new_edges, old_edges, assume_unique=True)
+    removed_keys = np.setdiff1d(old_edges, new_edges, assume_unique=True)
+    touched = np.union1d(added_keys >> np.uint64(EDGE_KEY_BITS), removed_keys >> np.uint64(EDGE_KEY_BITS))
+    reparented_codes = np.intersect1d(touched.astype(np.int64), dirty_codes, assume_unique=True)
+
+    old_area = old_df['area'].to_numpy(dtype=np.float64)[old_rows]
+    new_area = new_df['area'].to_numpy(dtype=np.float64)[new_rows]
+    revised = (old_area != new_area) & ~(np.isnan(old_area) & np.isnan(new_area))
+    return ChangeSet(
+        old_version=old_version or hashes_version(old_hashes[old_order]),
+        new_version=new_version or hashes_version(new_hashes[new_order]),
+        added=new_df.iloc[added_rows].reset_index(drop=True),
+        removed=old_df.iloc[removed_rows].reset_index(drop=True),
+        renamed=_column_changes(old_df, new_df, old_rows, new_rows, dirty_codes, 'district'),
+        reparented=pd.DataFrame({'lgd_code': reparented_codes,
+                                 'old_parents': _parent_lists(old_edges, reparented_codes),
+                                 'new_parents': _parent_lists(new_edges, reparented_codes)}),
+        area_revised=pd.DataFrame({'lgd_code': dirty_codes[revised], 'old_area': old_area[revised],
+                                   'new_area': new_area[revised]}),
+        year_changed=_column_changes(old_df, new_df, old_rows, new_rows, dirty_codes, 'year'),
+        added_edges=_edge_frame(added_keys),
+        removed_edges=_edge_frame(removed_keys),
+    )
+
+
+def changed_codes(changes: ChangeSet) -> np.ndarray:
+    # Only the units whose own rows or parent lists changed. Cached lineage
+    # queries also go stale for their ancestors and descendants; callers that
+    # cache those expand this set through the CSR, as static_site does.
+    return np.unique(np.concatenate([
+        changes.added['lgd_code'].to_numpy(dtype=np.int64),
+        changes.removed['lgd_code'].to_numpy(dtype=np.int64),
+        changes.renamed['lgd_code'].to_numpy(dtype=np.int64),
+        changes.reparented['lgd_code'].to_numpy(dtype=np.int64),
+        changes.area_revised['lgd_code'].to_numpy(dtype=np.int64),
+        changes.year_changed['lgd_code'].to_numpy(dtype=np.int64),
+    ]))
+
+
+def apply_to_order(order: IncrementalTopologicalOrder, changes: ChangeSet) -> None:
+    for parent, child in changes.removed_edges.itertuples(index=False):
+        order.remove_edge(parent, child)
+    for code in changes.removed['lgd_code'].tolist():
+        order.remove_node(code)
+    for code in changes.added['lgd_code'].tolist():
+        order.add_node(code)
+    order.add_edges_from(changes.added_edges.itertuples(index=False))
+
+
+def change_counts(changes: ChangeSet) -> Dict[str, int]:
+    return {field: len(getattr(changes, field)) for field in CHANGE_FIELDS}
+
+
+def print_change_summary(changes: ChangeSet) -> None:
+    print("\n" + "=" * 50)
+    print(f"Release diff {changes.old_version} -> {changes.new_version}")
+    print("=" * 50)
+    for field, n in change_counts(changes).items():
+        print(f"{field.replace('_', ' ').capitalize():<25}{n:>10}")
+    for row in changes.renamed.head(10).itertuples(index=False):
+        print(f"  renamed {row.lgd_code}: {row.old_district} -> {row.new_district}")
+    for row in changes.reparented.head(10).itertuples(index=False):
+        print(f"  reparented {row.lgd_code}: {row.old_parents} -> {row.new_parents}")
+    print("=" * 50)
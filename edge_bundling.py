@@ -0,0 +1,184 @@
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+BUNDLE_MIN_EDGES = 500
+BUNDLING_STRENGTH = 0.85
+SAMPLES_PER_SEGMENT = 8
+SPLINE_DEGREE = 3
+PIXEL_TOLERANCE = 0.5
+FIGURE_WIDTH_PX = 1200
+
+
+class EdgePolylines(NamedTuple):
+    x: np.ndarray
+    y: np.ndarray
+    offsets: np.ndarray
+
+
+def _node_positions(G: nx.DiGraph, pos: Dict[Hashable, Tuple[float, float]]) -> Tuple[Dict[Hashable, int], np.ndarray]:
+    index = {node: i for i, node in enumerate(G.nodes())}
+    xy = np.array([pos[node] for node in G.nodes()], dtype=np.float64).reshape(-1, 2)
+    return index, xy
+
+
+def _edge_index(G: nx.DiGraph, index: Dict[Hashable, int]) -> np.ndarray:
+    edges = np.fromiter((index[node] for edge in G.edges() for node in edge), dtype=np.int64,
+                        count=2 * G.number_of_edges())
+    return edges.reshape(-1, 2)
+
+
+def lineage_tree(G: nx.DiGraph, index: Dict[Hashable, int]) -> np.ndarray:
+    # Each node hangs under its first-listed predecessor, the primary parent in
+    # the source data; roots hang under a virtual root with id len(G).
+    n = len(index)
+    tree_parent = np.full(n + 1, n, dtype=np.int64)
+    for node, i in index.items():
+        for parent in G.predecessors(node):
+            tree_parent[i] = index[parent]
+            break
+    return tree_parent
+
+
+def ancestor_table(tree_parent: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    root = len(tree_parent) - 1
+    columns = [np.arange(len(tree_parent))]
+    depth = np.zeros(len(tree_parent), dtype=np.int64)
+    while True:
+        above = tree_parent[columns[-1]]
+        if np.array_equal(above, columns[-1]):
+            break
+        depth += columns[-1] != root
+        columns.append(above)
+    return np.stack(columns, axis=1), depth
+
+
+def _tree_paths(table: np.ndarray, depth: np.ndarray, u: np.ndarray, v: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    lift_u = np.maximum(depth[u] - depth[v], 0)
+    lift_v = np.maximum(depth[v] - depth[u], 0)
+    meet = np.argmax(table[table[u, lift_u]] == table[table[v, lift_v]], axis=1)
+    up, down = lift_u + meet, lift_v + meet
+
+    # Holten's control polygon: u up to the common ancestor and down to v. The
+    # ancestor itself is dropped when both sides are non-empty, which keeps
+    # sibling-to-sibling curves from all converging on one point.
+    keep_lca = (up == 0) | (down == 0)
+    lengths = up + down + keep_lca
+    width = int(lengths.max()) if len(lengths) else 0
+    j = np.arange(width)[None, :]
+    from_u = table[u[:, None], np.minimum(j, table.shape[1] - 1)]
+    from_v = table[v[:, None], np.clip(lengths[:, None] - 1 - j, 0, table.shape[1] - 1)]
+    paths = np.where(j < up[:, None] + keep_lca[:, None], from_u, from_v)
+    return paths, lengths
+
+
+def bspline_basis(n_control: int, n_samples: int, degree: int = SPLINE_DEGREE) -> np.ndarray:
+    degree = min(degree, n_control - 1)
+    inner = np.arange(1, n_control - degree) / (n_control - degree)
+    knots = np.concatenate((np.zeros(degree + 1), inner, np.ones(degree + 1)))
+    t = np.linspace(0.0, 1.0, n_samples)[:, None]
+
+    basis = ((knots[:-1] <= t) & (t < knots[1:])).astype(np.float64)
+    basis[-1, n_control - 1] = 1.0
+    for p in range(1, degree + 1):
+        left_span = knots[p:-1] - knots[:-p - 1]
+        right_span = knots[p + 1:] - knots[1:-p]
+        left = np.divide(t - knots[:-p - 1], left_span, out=np.zeros((n_samples, len(left_span))),
+                         where=left_span > 0)
+        right = np.divide(knots[p + 1:] - t, right_span, out=np.zeros((n_samples, len(right_span))),
+                          where=right_span > 0)
+        basis = left * basis[:, :-1] + right * basis[:, 1:]
+    return basis
+
+
+def simplify_polylines(xy: np.ndarray, offsets: np.ndarray, tolerance: float) -> np.ndarray:
+    # Douglas-Peucker over every polyline at once: each pass splits all open
+    # segments at their farthest point, so the loop runs once per recursion level.
+    keep = np.zeros(len(xy), dtype=bool)
+    keep[offsets[:-1]] = True
+    keep[offsets[1:] - 1] = True
+    lo, hi = offsets[:-1], offsets[1:] - 1
+    while len(lo):
+        span = hi - lo - 1
+        lo, hi, span = lo[span > 0], hi[span > 0], span[span > 0]
+        if not len(lo):
+            break
+        starts = np.concatenate(([0], np.cumsum(span)[:-1]))
+        segment = np.repeat(np.arange(len(lo)), span)
+        points = np.arange(span.sum()) - starts[segment] + lo[segment] + 1
+
+        a = xy[lo[segment]]
+        ab = xy[hi[segment]] - a
+        ap = xy[points] - a
+        length2 = np.einsum('ij,ij->i', ab, ab)
+        t = np.clip(np.einsum('ij,ij->i', ap, ab) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+        distance = np.hypot(*(ap - t[:, None] * ab).T)
+
+        farthest = np.lexsort((-distance, segment))[starts]
+        split = distance[farthest] > tolerance
+        mid = points[farthest[split]]
+        keep[mid] = True
+        lo, hi = np.concatenate((lo[split], mid)), np.concatenate((mid, hi[split]))
+    return keep
+
+
+def _separated(xy: np.ndarray, offsets: np.ndarray) -> EdgePolylines:
+    counts = np.diff(offsets)
+    out_offsets = offsets[:-1] + np.arange(len(counts))
+    x = np.full(len(xy) + len(counts), np.nan, dtype=np.float32)
+    y = np.full(len(xy) + len(counts), np.nan, dtype=np.float32)
+    target = np.arange(len(xy)) + np.repeat(np.arange(len(counts)), counts)
+    x[target] = xy[:, 0]
+    y[target] = xy[:, 1]
+    return EdgePolylines(x, y, out_offsets)
+
+
+def straight_edges(G: nx.DiGraph, pos: Dict[Hashable, Tuple[float, float]]) -> EdgePolylines:
+    index, xy = _node_positions(G, pos)
+    edges = _edge_index(G, index)
+    return _separated(xy[edges.reshape(-1)], np.arange(0, 2 * len(edges) + 1, 2))
+
+
+def pixel_tolerance(xy: np.ndarray, pixels: float = PIXEL_TOLERANCE, width_px: int = FIGURE_WIDTH_PX) -> float:
+    if not len(xy):
+        return 0.0
+    extent = float((xy.max(axis=0) - xy.min(axis=0)).max())
+    return pixels * extent / width_px
+
+
+def bundle_edges(G: nx.DiGraph, pos: Dict[Hashable, Tuple[float, float]], strength: float = BUNDLING_STRENGTH,
+                 samples_per_segment: int = SAMPLES_PER_SEGMENT, pixels: float = PIXEL_TOLERANCE,
+                 width_px: int = FIGURE_WIDTH_PX) -> EdgePolylines:
+    if not 0.0 <= strength <= 1.0:
+        raise ValueError(f"Bundling strength must be between 0 and 1, got {strength}")
+    index, xy = _node_positions(G, pos)
+    edges = _edge_index(G, index)
+    if not len(edges):
+        return _separated(np.zeros((0, 2)), np.zeros(1, dtype=np.int64))
+    table, depth = ancestor_table(lineage_tree(G, index))
+    paths, lengths = _tree_paths(table, depth, edges[:, 0], edges[:, 1])
+
+    counts = np.where(lengths == 2, 2, samples_per_segment * (lengths - 1) + 1)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    points = np.empty((offsets[-1], 2))
+    for length in np.unique(lengths).tolist():
+        group = np.flatnonzero(lengths == length)
+        control = xy[paths[group, :length]]
+        if length > 2:
+            first, last = control[:, :1], control[:, -1:]
+            t = np.linspace(0.0, 1.0, length)[None, :, None]
+            control = strength * control + (1.0 - strength) * (first + t * (last - first))
+            control = np.einsum('sl,eld->esd', bspline_basis(length, counts[group[0]]), control)
+        points[offsets[group][:, None] + np.arange(control.shape[1])] = control
+
+    keep = simplify_polylines(points, offsets, pixel_tolerance(xy, pixels, width_px))
+    kept_offsets = np.concatenate(([0], np.cumsum(np.add.reduceat(keep.astype(np.int64), offsets[:-1]))))
+    return _separated(points[keep], kept_offsets)
+
+
+def edge_polylines(G: nx.DiGraph, pos: Dict[Hashable, Tuple[float, float]],
+                   bundled: Optional[bool] = None) -> EdgePolylines:
+    if bundled is None:
+        bundled = G.number_of_edges() >= BUNDLE_MIN_EDGES
+    return bundle_edges(G, pos) if bundled else straight_edges(G, pos)
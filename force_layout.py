@@ -0,0 +1,114 @@
+from itertools import product
+from typing import Dict, Hashable, Optional
+
+import networkx as nx
+import numpy as np
+
+EXACT_REPULSION_MAX_NODES = 2000
+
+
+def _cloud_in_cell(grid_pos: np.ndarray, grid_size: int):
+    base = np.floor(grid_pos).astype(np.int64)
+    frac = grid_pos - base
+    dim = grid_pos.shape[1]
+    strides = grid_size ** np.arange(dim - 1, -1, -1)
+    for corner in product((0, 1), repeat=dim):
+        corner = np.array(corner)
+        weight = np.prod(np.where(corner, frac, 1 - frac), axis=1)
+        yield (base + corner) @ strides, weight
+
+
+def _kernel_spectrum(grid_size: int, dim: int) -> np.ndarray:
+    # ln|d| is the potential whose gradient is the d / |d|^2 repulsion, so one
+    # convolution plus a finite-difference gradient gives all force components.
+    offsets = np.fft.fftfreq(2 * grid_size, d=1.0 / (2 * grid_size))
+    mesh = np.meshgrid(*([offsets] * dim), indexing='ij')
+    dist2 = sum(axis ** 2 for axis in mesh)
+    dist2[(0,) * dim] = 1.0
+    return np.fft.rfftn(0.5 * np.log(dist2))
+
+
+def _mesh_repulsion(pos: np.ndarray, grid_size: int, spectrum: np.ndarray) -> np.ndarray:
+    n, dim = pos.shape
+    lo = pos.min(axis=0)
+    cell = max(float((pos.max(axis=0) - lo).max()) / (grid_size - 3), 1e-9)
+    grid_pos = (pos - lo) / cell + 1.0
+    corners = list(_cloud_in_cell(grid_pos, grid_size))
+
+    density = np.zeros(grid_size ** dim)
+    for flat, weight in corners:
+        density += np.bincount(flat, weights=weight, minlength=grid_size ** dim)
+    padded = np.zeros((2 * grid_size,) * dim)
+    padded[(slice(0, grid_size),) * dim] = density.reshape((grid_size,) * dim)
+    potential = np.fft.irfftn(np.fft.rfftn(padded) * spectrum, s=padded.shape, axes=tuple(range(dim)))
+    potential = potential[(slice(0, grid_size),) * dim]
+
+    force = np.zeros_like(pos)
+    for axis, field in enumerate(np.gradient(potential)):
+        field = field.ravel()
+        for flat, weight in corners:
+            force[:, axis] += field[flat] * weight
+    return force / cell
+
+
+def _exact_repulsion(pos: np.ndarray) -> np.ndarray:
+    delta = pos[:, None, :] - pos[None, :, :]
+    dist2 = np.einsum('ijk,ijk->ij', delta, delta)
+    np.fill_diagonal(dist2, np.inf)
+    return np.einsum('ijk,ij->ik', delta, 1.0 / np.maximum(dist2, 1e-9))
+
+
+def force_layout(n_nodes: int, src: np.ndarray, dst: np.ndarray, dim: int = 3, iterations: int = 50,
+                 seed: int = 42, fixed_axis: Optional[np.ndarray] = None, grid_size: Optional[int] = None) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    scale = max(n_nodes, 1) ** (1.0 / dim)
+    pos = rng.uniform(-scale, scale, size=(n_nodes, dim))
+    if fixed_axis is not None:
+        fixed = np.asarray(fixed_axis, dtype=np.float64)
+        span = np.ptp(fixed) or 1.0
+        pos[:, -1] = (fixed - fixed.min()) / span * 2 * scale - scale
+    if n_nodes < 2:
+        return pos
+
+    # Against exact pairwise forces on uniformly spread nodes the mesh is within
+    # about 2% in 3D but only 6-9% in 2D (3-4% median): the 2D error sits on
+    # close pairs a finer grid does not resolve, and grows as the layout clusters.
+    use_mesh = n_nodes > EXACT_REPULSION_MAX_NODES
+    if use_mesh:
+        if grid_size is None:
+            grid_size = int(np.clip(2 * np.ceil(n_nodes ** (1.0 / dim)), 16, 48 if dim == 3 else 512))
+        spectrum = _kernel_spectrum(grid_size, dim)
+
+    temperature = scale
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        displacement = _mesh_repulsion(pos, grid_size, spectrum) if use_mesh else _exact_repulsion(pos)
+        delta = pos[dst] - pos[src]
+        length = np.linalg.norm(delta, axis=1, keepdims=True)
+        pull = delta * length
+        for axis in range(dim):
+            displacement[:, axis] += np.bincount(src, weights=pull[:, axis], minlength=n_nodes)
+            displacement[:, axis] -= np.bincount(dst, weights=pull[:, axis], minlength=n_nodes)
+        if fixed_axis is not None:
+            displacement[:, -1] = 0.0
+        magnitude = np.linalg.norm(displacement, axis=1, keepdims=True)
+        pos += displacement / np.maximum(magnitude, 1e-9) * np.minimum(magnitude, temperature)
+        temperature -= cooling
+
+    pos -= pos.mean(axis=0)
+    return pos / max(np.abs(pos).max(), 1e-9)
+
+
+def graph_layout(G: nx.Graph, dim: int = 3, iterations: int = 50, seed: int = 42,
+                 year_axis: bool = False) -> Dict[Hashable, np.ndarray]:
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    fixed_axis = None
+    if year_axis:
+        fixed_axis = np.array([G.nodes[node].get('year', 0) for node in nodes], dtype=np.float64)
+    pos = force_layout(len(nodes), edges[:, 0], edges[:, 1], dim=dim, iterations=iterations, seed=seed,
+                       fixed_axis=fixed_axis)
+    return dict(zip(nodes, pos))
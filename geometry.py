@@ -0,0 +1,271 @@
+import json
+from typing import Any, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+OPEN_ENDED = np.iinfo(np.int64).max
+EARTH_RADIUS_KM = 6371.0088
+NODE_CAPACITY = 16
+MAX_BANDS = 4096
+
+Ring = Sequence[Sequence[float]]
+Polygon = Sequence[Ring]
+
+
+class DistrictGeometries(NamedTuple):
+    codes: np.ndarray
+    valid_from: np.ndarray
+    valid_to: np.ndarray
+    ring_ptr: np.ndarray
+    vertex_ptr: np.ndarray
+    xy: np.ndarray
+    hole: np.ndarray
+    bounds: np.ndarray
+
+
+def build_geometries(records: Iterable[Tuple[int, Optional[int], Optional[int], Sequence[Polygon]]]) -> DistrictGeometries:
+    # Each record is (lgd_code, valid_from, valid_to, polygons); a polygon is a list of
+    # rings whose first ring is the exterior and the rest are holes (GeoJSON order).
+    codes, valid_from, valid_to, ring_counts, vertex_counts, holes, rings = [], [], [], [], [], [], []
+    for code, start, end, polygons in records:
+        n_rings = 0
+        for polygon in polygons:
+            for position, ring in enumerate(polygon):
+                ring = np.asarray(ring, dtype=np.float64)[:, :2]
+                if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+                    ring = ring[:-1]
+                if len(ring) < 3:
+                    raise ValueError(f"Ring of LGD code {code} has fewer than 3 distinct vertices")
+                rings.append(ring)
+                vertex_counts.append(len(ring))
+                holes.append(position > 0)
+                n_rings += 1
+        if n_rings == 0:
+            raise ValueError(f"LGD code {code} has no polygon rings")
+        codes.append(code)
+        valid_from.append(-OPEN_ENDED if start is None or pd.isna(start) else start)
+        valid_to.append(OPEN_ENDED if end is None or pd.isna(end) else end)
+        ring_counts.append(n_rings)
+
+    ring_ptr = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(ring_counts, out=ring_ptr[1:])
+    vertex_ptr = np.zeros(len(rings) + 1, dtype=np.int64)
+    np.cumsum(vertex_counts, out=vertex_ptr[1:])
+    xy = np.concatenate(rings) if rings else np.zeros((0, 2))
+
+    bounds = np.empty((len(codes), 4))
+    vertex_starts = vertex_ptr[ring_ptr[:-1]]
+    bounds[:, 0] = np.minimum.reduceat(xy[:, 0], vertex_starts)
+    bounds[:, 1] = np.minimum.reduceat(xy[:, 1], vertex_starts)
+    bounds[:, 2] = np.maximum.reduceat(xy[:, 0], vertex_starts)
+    bounds[:, 3] = np.maximum.reduceat(xy[:, 1], vertex_starts)
+    return DistrictGeometries(codes=np.asarray(codes, dtype=np.int64), valid_from=np.asarray(valid_from, dtype=np.int64),
+                              valid_to=np.asarray(valid_to, dtype=np.int64), ring_ptr=ring_ptr, vertex_ptr=vertex_ptr,
+                              xy=xy, hole=np.asarray(holes, dtype=bool), bounds=bounds)
+
+
+def load_geojson(source: Any, code_field: str = 'lgd_code', from_field: str = 'valid_from',
+                 to_field: str = 'valid_to') -> DistrictGeometries:
+    if isinstance(source, dict):
+        collection = source
+    else:
+        with open(source) as handle:
+            collection = json.load(handle)
+
+    records = []
+    for feature in collection['features']:
+        props = feature.get('properties') or {}
+        geometry = feature['geometry']
+        if geometry['type'] == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry['type'] == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            raise ValueError(f"Unsupported geometry type '{geometry['type']}' for LGD code {props.get(code_field)}")
+        records.append((int(props[code_field]), props.get(from_field), props.get(to_field), polygons))
+    return build_geometries(records)
+
+
+def ring_areas(geoms: DistrictGeometries, geographic: bool = True) -> np.ndarray:
+    x = geoms.xy[:, 0]
+    y = geoms.xy[:, 1]
+    ring_of_vertex = np.repeat(np.arange(len(geoms.hole)), np.diff(geoms.vertex_ptr))
+    nxt = np.arange(len(x)) + 1
+    nxt[geoms.vertex_ptr[1:] - 1] = geoms.vertex_ptr[:-1]
+    if geographic:
+        # Spherical ring area in lon/lat degrees (the equal-area formulation used by
+        # d3-geo and turf): R^2 / 2 * sum (lon2 - lon1) * (2 + sin lat1 + sin lat2).
+        lon, lat = np.radians(x), np.radians(y)
+        dlon = (lon[nxt] - lon + np.pi) % (2 * np.pi) - np.pi
+        terms = dlon * (2 + np.sin(lat) + np.sin(lat[nxt])) * EARTH_RADIUS_KM ** 2 / 2
+    else:
+        terms = (x * y[nxt] - x[nxt] * y) / 2
+    return np.abs(np.bincount(ring_of_vertex, weights=terms, minlength=len(geoms.hole)))
+
+
+def geometry_areas(geoms: DistrictGeometries, geographic: bool = True) -> np.ndarray:
+    areas = ring_areas(geoms, geographic)
+    signed = np.where(geoms.hole, -areas, areas)
+    unit_of_ring = np.repeat(np.arange(len(geoms.codes)), np.diff(geoms.ring_ptr))
+    return np.bincount(unit_of_ring, weights=signed, minlength=len(geoms.codes))
+
+
+def area_check(df: pd.DataFrame, geoms: DistrictGeometries, tolerance: float = 0.05,
+               geographic: bool = True) -> pd.DataFrame:
+    computed = pd.DataFrame({'lgd_code': geoms.codes, 'valid_from': geoms.valid_from, 'valid_to': geoms.valid_to,
+                             'geometry_area': geometry_areas(geoms, geographic)})
+    merged = df[['lgd_code', 'district', 'year', 'area']].merge(computed, on='lgd_code', how='left')
+    # The recorded area is the area at formation, so compare against the boundary
+    # that was valid in the formation year.
+    at_formation = merged['geometry_area'].isna() | ((merged['valid_from'] <= merged['year']) &
+                                                     (merged['year'] < merged['valid_to']))
+    merged = merged[at_formation].drop_duplicates('lgd_code').drop(columns=['valid_from', 'valid_to'])
+    merged['relative_difference'] = (merged['geometry_area'] - merged['area']) / merged['area']
+    merged['flagged'] = merged['relative_difference'].abs() > tolerance
+    return merged.reset_index(drop=True)
+
+
+class PackedSTRTree:
+    # Sort-Tile-Recursive packing: items are tiled into vertical slices by x centre and
+    # sorted by y centre within each slice, then grouped bottom-up into full nodes, so
+    # the tree is a handful of flat bbox arrays with implicit child ranges.
+    def __init__(self, bounds: np.ndarray, node_capacity: int = NODE_CAPACITY) -> None:
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        self.node_capacity = node_capacity
+        n = len(bounds)
+        cx = (bounds[:, 0] + bounds[:, 2]) / 2
+        cy = (bounds[:, 1] + bounds[:, 3]) / 2
+        n_leaves = max(1, -(-n // node_capacity))
+        slice_size = int(np.ceil(np.sqrt(n_leaves))) * node_capacity
+        by_x = np.argsort(cx, kind='stable')
+        slice_id = np.arange(n) // slice_size
+        self.item_order = by_x[np.lexsort((cy[by_x], slice_id))]
+
+        self.levels: List[np.ndarray] = [bounds[self.item_order]]
+        while len(self.levels[-1]) > 1:
+            below = self.levels[-1]
+            starts = np.arange(0, len(below), node_capacity)
+            self.levels.append(np.column_stack([np.minimum.reduceat(below[:, 0], starts),
+                                                np.minimum.reduceat(below[:, 1], starts),
+                                                np.maximum.reduceat(below[:, 2], starts),
+                                                np.maximum.reduceat(below[:, 3], starts)]))
+
+        # Child boxes are padded to (nodes, capacity) blocks with empty boxes, so each
+        # level of the descent is one broadcast comparison instead of a ragged expansion.
+        # They are stored as float32 rounded outward: candidates may only grow, and the
+        # exact point-in-polygon test runs afterwards anyway.
+        self.child_boxes: List[Optional[Tuple[np.ndarray, ...]]] = [None]
+        for depth in range(1, len(self.levels)):
+            below = self.levels[depth - 1]
+            padded = np.empty((len(self.levels[depth]) * node_capacity, 4))
+            padded[:] = (np.inf, np.inf, -np.inf, -np.inf)
+            padded[:len(below)] = below
+            padded = padded.reshape(-1, node_capacity, 4).astype(np.float32)
+            lower = np.nextafter(padded[:, :, :2], np.float32(-np.inf))
+            upper = np.nextafter(padded[:, :, 2:], np.float32(np.inf))
+            self.child_boxes.append(tuple(np.ascontiguousarray(block) for block in
+                                          (lower[:, :, 0], lower[:, :, 1], upper[:, :, 0], upper[:, :, 1])))
+
+    def __len__(self) -> int:
+        return len(self.item_order)
+
+    def query_points(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if not len(self.item_order):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        root = self.levels[-1][0]
+        points = np.flatnonzero((root[0] <= x) & (x <= root[2]) & (root[1] <= y) & (y <= root[3]))
+        nodes = np.zeros(len(points), dtype=np.int64)
+        x32 = x.astype(np.float32)
+        y32 = y.astype(np.float32)
+        for depth in range(len(self.levels) - 1, 0, -1):
+            min_x, min_y, max_x, max_y = self.child_boxes[depth]
+            px = x32[points][:, None]
+            py = y32[points][:, None]
+            hit = min_x[nodes] <= px
+            hit &= px <= max_x[nodes]
+            hit &= min_y[nodes] <= py
+            hit &= py <= max_y[nodes]
+            rows, cols = np.nonzero(hit)
+            points = points[rows]
+            nodes = nodes[rows] * self.node_capacity + cols
+        return points, self.item_order[nodes]
+
+
+class DistrictLocator:
+    def __init__(self, geoms: DistrictGeometries, node_capacity: int = NODE_CAPACITY) -> None:
+        self.geoms = geoms
+        self.tree = PackedSTRTree(geoms.bounds, node_capacity)
+        self._build_edge_bands()
+
+    def _build_edge_bands(self) -> None:
+        # Each unit's edges are bucketed into horizontal bands over its bbox (about two
+        # edges per band), so a point is ray-cast only against the edges in its own band.
+        geoms = self.geoms
+        nxt = np.arange(len(geoms.xy)) + 1
+        nxt[geoms.vertex_ptr[1:] - 1] = geoms.vertex_ptr[:-1]
+        self.edges = np.column_stack([geoms.xy, geoms.xy[nxt]])
+        ring_of_edge = np.repeat(np.arange(len(geoms.hole)), np.diff(geoms.vertex_ptr))
+        unit_of_ring = np.repeat(np.arange(len(geoms.codes)), np.diff(geoms.ring_ptr))
+        unit_of_edge = unit_of_ring[ring_of_edge]
+
+        edges_per_unit = np.bincount(unit_of_edge, minlength=len(geoms.codes))
+        self.n_bands = np.clip(edges_per_unit // 2, 1, MAX_BANDS).astype(np.int64)
+        self.band_offset = np.cumsum(self.n_bands) - self.n_bands
+        height = geoms.bounds[:, 3] - geoms.bounds[:, 1]
+        self.band_height = np.where(height > 0, height / self.n_bands, 1.0)
+
+        lo = self._band(unit_of_edge, np.minimum(self.edges[:, 1], self.edges[:, 3]))
+        hi = self._band(unit_of_edge, np.maximum(self.edges[:, 1], self.edges[:, 3]))
+        span = hi - lo + 1
+        edge_ids = np.repeat(np.arange(len(self.edges)), span)
+        band_ids = np.repeat(self.band_offset[unit_of_edge] + lo, span) + \
+            (np.arange(int(span.sum())) - np.repeat(np.cumsum(span) - span, span))
+        order = np.argsort(band_ids, kind='stable')
+        self.band_ptr = np.zeros(int(self.n_bands.sum()) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(band_ids, minlength=len(self.band_ptr) - 1), out=self.band_ptr[1:])
+        self.band_edges = edge_ids[order]
+
+    def _band(self, units: np.ndarray, y: np.ndarray) -> np.ndarray:
+        band = np.floor((y - self.geoms.bounds[units, 1]) / self.band_height[units]).astype(np.int64)
+        return np.clip(band, 0, self.n_bands[units] - 1)
+
+    def contains(self, units: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        units = np.asarray(units, dtype=np.int64)
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        bands = self.band_offset[units] + self._band(units, y)
+        starts = self.band_ptr[bands]
+        counts = self.band_ptr[bands + 1] - starts
+        pair = np.repeat(np.arange(len(units)), counts)
+        edge = self.band_edges[np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(int(counts.sum()))]
+        x1, y1, x2, y2 = self.edges[edge].T
+        px, py = x[pair], y[pair]
+        straddles = (y1 > py) != (y2 > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing = straddles & (px < x1 + (py - y1) * (x2 - x1) / (y2 - y1))
+        return np.bincount(pair, weights=crossing, minlength=len(units)).astype(np.int64) % 2 == 1
+
+    def locate(self, x, y, year=None, chunk_size: int = 250_000) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        years = None if year is None else np.broadcast_to(np.asarray(year, dtype=np.int64), x.shape)
+        result = np.full(len(x), -1, dtype=np.int64)
+        for start in range(0, len(x), chunk_size):
+            stop = start + chunk_size
+            points, units = self.tree.query_points(x[start:stop], y[start:stop])
+            if years is None:
+                valid = self.geoms.valid_to[units] == OPEN_ENDED
+            else:
+                point_years = years[start:stop][points]
+                valid = (self.geoms.valid_from[units] <= point_years) & (point_years < self.geoms.valid_to[units])
+            points, units = points[valid], units[valid]
+            inside = self.contains(units, x[start:stop][points], y[start:stop][points])
+            points, units = points[inside], units[inside]
+            # Where boundaries overlap, the unit listed first wins.
+            order = np.lexsort((units, points))
+            points, first = np.unique(points[order], return_index=True)
+            result[start + points] = self.geoms.codes[units[order][first]]
+        return result
@@ -0,0 +1,156 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_ENV_VAR = 'LINEAGE_TRACE'
+
+_enabled = False
+_events: List[Dict[str, Any]] = []
+_counters: Dict[str, int] = defaultdict(int)
+_lock = threading.Lock()
+_origin_ns = time.perf_counter_ns()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def count(self, name: str, n: int = 1) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start_ns')
+
+    def __init__(self, name: str, args: Dict[str, Any]) -> None:
+        self.name = name
+        self.args = args
+        self.start_ns = 0
+
+    def __enter__(self) -> '_Span':
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        event = {'name': self.name, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                 'ts': (self.start_ns - _origin_ns) / 1000, 'dur': (end_ns - self.start_ns) / 1000,
+                 'args': self.args}
+        with _lock:
+            _events.append(event)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.args[name] = self.args.get(name, 0) + n
+        count(name, n)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(trace_path: Optional[str] = None) -> None:
+    global _enabled
+    _enabled = True
+    if trace_path:
+        atexit.register(_export_at_exit, trace_path)
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def reset() -> None:
+    with _lock:
+        _events.clear()
+        _counters.clear()
+
+
+def span(name: str, **args: Any):
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, n: int = 1) -> None:
+    if _enabled:
+        with _lock:
+            _counters[name] += n
+
+
+def counters() -> Dict[str, int]:
+    return dict(_counters)
+
+
+def summary() -> List[Dict[str, Any]]:
+    totals: Dict[str, List[float]] = defaultdict(list)
+    for event in _events:
+        totals[event['name']].append(event['dur'] / 1000)
+    rows = [{'span': name, 'calls': len(durations), 'total_ms': sum(durations),
+             'mean_ms': sum(durations) / len(durations), 'max_ms': max(durations)}
+            for name, durations in totals.items()]
+    return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+
+def print_summary() -> None:
+    rows = summary()
+    print("\n" + "=" * 72)
+    print(f"{'Span':<36}{'Calls':>8}{'Total ms':>10}{'Mean ms':>9}{'Max ms':>9}")
+    print("=" * 72)
+    for row in rows:
+        print(f"{row['span']:<36}{row['calls']:>8}{row['total_ms']:>10.2f}{row['mean_ms']:>9.2f}{row['max_ms']:>9.2f}")
+    if _counters:
+        print("-" * 72)
+        for name, value in sorted(_counters.items()):
+            print(f"{name:<36}{value:>8}")
+    print("=" * 72)
+
+
+def export_chrome_trace(path: str) -> None:
+    with _lock:
+        events = list(_events)
+        totals = dict(_counters)
+    end_ts = max((event['ts'] + event['dur'] for event in events), default=0)
+    if totals:
+        events.append({'name': 'counters', 'ph': 'C', 'pid': os.getpid(), 'tid': 0, 'ts': end_ts, 'args': totals})
+    with open(path, 'w') as handle:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, handle)
+
+
+def _export_at_exit(path: str) -> None:
+    export_chrome_trace(path)
+    print_summary()
+    print(f"Trace saved as '{path}' (open it in chrome://tracing or Perfetto)")
+
+
+if os.environ.get(TRACE_ENV_VAR):
+    enable(os.environ[TRACE_ENV_VAR])
@@ -0,0 +1,62 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+from typing import Any, Dict, List
+
+_lock = threading.RLock()
+_proxies: Dict[str, 'LazyModule'] = {}
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        proxy = _proxies.get(name)
+        if proxy is None:
+            proxy = LazyModule(name)
+            _proxies[name] = proxy
+        return proxy
+
+
+def is_loaded(module: types.ModuleType) -> bool:
+    if isinstance(module, LazyModule):
+        return module.__dict__['_lazy_module'] is not None
+    return True
+
+
+def module_available(name: str) -> bool:
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -0,0 +1,191 @@
+import hashlib
+from itertools import chain
+from typing import NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+STRING_HASH_BLOCK = 65536
+FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+
+
+class LineageArrays(NamedTuple):
+    codes: np.ndarray
+    years: np.ndarray
+    areas: np.ndarray
+    names: np.ndarray
+    src: np.ndarray
+    dst: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    rev_indptr: np.ndarray
+    rev_indices: np.ndarray
+
+
+def parent_lists(df: pd.DataFrame) -> pd.Series:
+    return df['parent_lgd'].apply(lambda x: x if isinstance(x, list) else ([x] if pd.notna(x) else []))
+
+
+def _parent_layout(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Single-parent rows (the overwhelming majority) are handled as one vectorized
+    # cast; only multi-parent list rows are walked in Python.
+    values = df['parent_lgd'].to_numpy(dtype=object)
+    is_list = np.fromiter((type(value) is list for value in values), dtype=bool, count=len(values))
+    scalar = ~is_list & pd.notna(values)
+    list_rows = np.flatnonzero(is_list)
+    counts = scalar.astype(np.int64)
+    counts[list_rows] = [len(values[row]) for row in list_rows]
+    return values, scalar, counts
+
+
+def _exploded_parents(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    values, scalar, counts = _parent_layout(df)
+    offsets = np.cumsum(counts) - counts
+    parent_codes = np.empty(int(counts.sum()), dtype=np.int64)
+    parent_codes[offsets[scalar]] = values[scalar].astype(np.int64)
+    list_rows = np.flatnonzero(~scalar & (counts > 0))
+    if len(list_rows):
+        positions = np.repeat(offsets[list_rows] - np.cumsum(counts[list_rows]) + counts[list_rows],
+                              counts[list_rows]) + np.arange(int(counts[list_rows].sum()))
+        parent_codes[positions] = np.fromiter(chain.from_iterable(values[list_rows]), dtype=np.int64,
+                                              count=len(positions))
+    return parent_codes, counts
+
+
+def explode_parents(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    parent_codes, counts = _exploded_parents(df)
+    return parent_codes, np.repeat(df['lgd_code'].to_numpy(dtype=np.int64), counts)
+
+
+def code_index(arrays: LineageArrays, codes) -> np.ndarray:
+    codes = np.asarray(codes, dtype=np.int64)
+    idx = np.searchsorted(arrays.codes, codes)
+    idx = np.minimum(idx, len(arrays.codes) - 1)
+    missing = arrays.codes[idx] != codes
+    if missing.any():
+        raise KeyError(f"Unknown LGD code(s): {sorted(set(codes[missing].tolist()))}")
+    return idx
+
+
+def _csr(rows: np.ndarray, cols: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32)
+
+
+def build_lineage_arrays(df: pd.DataFrame) -> LineageArrays:
+    ordered = df.sort_values('lgd_code', kind='stable')
+    codes = ordered['lgd_code'].to_numpy(dtype=np.int64)
+    if len(codes) and (np.diff(codes) == 0).any():
+        duplicates = np.unique(codes[1:][np.diff(codes) == 0])
+        raise ValueError(f"Duplicate LGD code(s): {duplicates.tolist()}")
+
+    parent_codes, child_codes = explode_parents(ordered)
+    src = np.searchsorted(codes, parent_codes)
+    dangling = (src == len(codes)) | (codes[np.minimum(src, len(codes) - 1)] != parent_codes)
+    if dangling.any():
+        raise ValueError(f"Parent LGD code(s) not present in the dataset: {sorted(set(parent_codes[dangling].tolist()))}")
+    src = src.astype(np.int32)
+    dst = np.searchsorted(codes, child_codes).astype(np.int32)
+
+    n = len(codes)
+    indptr, indices = _csr(src, dst, n)
+    rev_indptr, rev_indices = _csr(dst, src, n)
+    return LineageArrays(codes=codes, years=ordered['year'].to_numpy(dtype=np.int64),
+                         areas=ordered['area'].to_numpy(dtype=np.float64),
+                         names=ordered['district'].to_numpy(dtype=object), src=src, dst=dst,
+                         indptr=indptr, indices=indices, rev_indptr=rev_indptr, rev_indices=rev_indices)
+
+
+def children_of(arrays: LineageArrays, idx: int) -> np.ndarray:
+    return arrays.indices[arrays.indptr[idx]:arrays.indptr[idx + 1]]
+
+
+def parents_of(arrays: LineageArrays, idx: int) -> np.ndarray:
+    return arrays.rev_indices[arrays.rev_indptr[idx]:arrays.rev_indptr[idx + 1]]
+
+
+def gather_neighbors(indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    nodes = np.asarray(nodes, dtype=np.int64)
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    offsets = np.arange(total, dtype=np.int64) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return indices[offsets], np.repeat(nodes, counts)
+
+
+def topological_levels(arrays: LineageArrays) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(arrays.codes)
+    remaining = np.diff(arrays.rev_indptr)
+    level = np.zeros(n, dtype=np.int32)
+    frontier = np.flatnonzero(remaining == 0)
+    order = []
+    depth = 0
+    while len(frontier):
+        order.append(frontier)
+        level[frontier] = depth
+        children, _ = gather_neighbors(arrays.indptr, arrays.indices, frontier)
+        remaining = remaining - np.bincount(children, minlength=n)
+        frontier = np.unique(children[remaining[children] == 0])
+        depth += 1
+    order = np.concatenate(order) if order else np.zeros(0, dtype=np.int64)
+    if len(order) != n:
+        raise ValueError("Lineage graph contains a cycle")
+    return order, level
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer; uint64 arithmetic wraps, which is the point.
+    values = values.astype(np.uint64)
+    values ^= values >> np.uint64(30)
+    values *= np.uint64(0xBF58476D1CE4E5B9)
+    values ^= values >> np.uint64(27)
+    values *= np.uint64(0x94D049BB133111EB)
+    values ^= values >> np.uint64(31)
+    return values
+
+
+def _string_hashes(values: np.ndarray) -> np.ndarray:
+    # FNV-1a over UCS-4 code points, one character column at a time across a block
+    # of rows; padding past the end of a string is skipped, so a string hashes the
+    # same whatever the width of the block it lands in.
+    hashes = np.empty(len(values), dtype=np.uint64)
+    for start in range(0, len(values), STRING_HASH_BLOCK):
+        block = np.asarray(values[start:start + STRING_HASH_BLOCK], dtype=np.str_)
+        chars = block.view(np.uint32).reshape(len(block), -1)
+        h = np.full(len(block), FNV_OFFSET, dtype=np.uint64)
+        for column in chars.T:
+            h = np.where(column != 0, (h ^ column) * FNV_PRIME, h)
+        hashes[start:start + len(block)] = h
+    return hashes
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    # Each column is hashed as a whole and the columns are then folded together,
+    # so no per-row Python objects are built. Parent lists hash as sets: a scalar
+    # parent and a one-element list, or [] and a missing parent, are the same row.
+    n = len(df)
+    parent_codes, counts = _exploded_parents(df)
+    parents = np.zeros(n, dtype=np.uint64)
+    np.add.at(parents, np.repeat(np.arange(n), counts), _mix(parent_codes))
+    area = df['area'].to_numpy(dtype=np.float64) + 0.0
+    area[np.isnan(area)] = np.nan
+    columns = (df['lgd_code'].to_numpy(dtype=np.int64), df['year'].to_numpy(dtype=np.int64), area.view(np.uint64),
+               _string_hashes(df['district'].astype(str).to_numpy(dtype=object)), parents)
+    hashes = np.zeros(n, dtype=np.uint64)
+    for column in columns:
+        hashes = _mix(hashes * np.uint64(FNV_PRIME) + column.astype(np.uint64))
+    return hashes
+
+
+def hashes_version(sorted_hashes: np.ndarray) -> str:
+    # Takes row hashes already in lgd_code order, so callers that have sorted the
+    # codes anyway do not sort again.
+    return hashlib.sha1(np.ascontiguousarray(sorted_hashes, dtype=np.uint64).tobytes()).hexdigest()[:16]
+
+
+def dataset_version(df: pd.DataFrame) -> str:
+    order = np.argsort(df['lgd_code'].to_numpy(dtype=np.int64), kind='stable')
+    return hashes_version(row_hashes(df)[order])
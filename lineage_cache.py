@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Tuple
+
+import networkx as nx
+import numpy as np
+
+QUERY_KINDS = ('ancestors', 'descendants', 'parents', 'children')
+
+
+class LineageQueryCache:
+    def __init__(self, G: nx.DiGraph, version: str, maxsize: int = 256) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._G = G
+        self._version = version
+        self._entries: 'OrderedDict[Tuple[str, Hashable, str], np.ndarray]' = OrderedDict()
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_dataset(self, G: nx.DiGraph, version: str) -> None:
+        self._G = G
+        if version != self._version:
+            self._version = version
+            self.invalidate()
+
+    def invalidate(self, lgd_code: Hashable = None) -> None:
+        if lgd_code is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[1] == lgd_code]:
+            del self._entries[key]
+
+    def get(self, lgd_code: Hashable, kind: str) -> np.ndarray:
+        key = (self._version, lgd_code, kind)
+        result = self._entries.get(key)
+        if result is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return result
+        self.misses += 1
+        result = self._compute(lgd_code, kind)
+        self._entries[key] = result
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return result
+
+    def _compute(self, lgd_code: Hashable, kind: str) -> np.ndarray:
+        G = self._G
+        if kind == 'ancestors':
+            codes = list(nx.ancestors(G, lgd_code))
+        elif kind == 'descendants':
+            codes = list(nx.descendants(G, lgd_code))
+        elif kind == 'parents':
+            codes = list(G.predecessors(lgd_code))
+        elif kind == 'children':
+            codes = list(G.successors(lgd_code))
+        else:
+            raise ValueError(f"Unknown query kind '{kind}', expected one of {QUERY_KINDS}")
+        result = np.array(codes, dtype=np.int64)
+        # The tracer lists ancestors and descendants by year; direct parents and
+        # children keep the graph's insertion order, as they always have.
+        if kind in ('ancestors', 'descendants'):
+            years = np.array([G.nodes[code]['year'] for code in codes], dtype=np.int64)
+            result = result[np.argsort(years, kind='stable')]
+        result.setflags(write=False)
+        return result
+
+    def info(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
@@ -0,0 +1,168 @@
+import warnings
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Set
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from lineage_arrays import explode_parents
+
+
+class LineageCycleError(ValueError):
+    pass
+
+
+class IncrementalTopologicalOrder:
+    # Pearce-Kelly dynamic topological sort: an edge that already agrees with the
+    # current order costs O(1); otherwise only the nodes whose positions lie between
+    # the two endpoints are searched and reshuffled.
+    def __init__(self) -> None:
+        self._position: Dict[Hashable, int] = {}
+        self._successors: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+        self._predecessors: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+        self._next_position = 0
+
+    def __len__(self) -> int:
+        return len(self._position)
+
+    def __contains__(self, node: Hashable) -> bool:
+        return node in self._position
+
+    def add_node(self, node: Hashable) -> None:
+        if node not in self._position:
+            self._position[node] = self._next_position
+            self._next_position += 1
+
+    def add_edge(self, u: Hashable, v: Hashable) -> None:
+        if u == v:
+            raise LineageCycleError(f"Edge {u} -> {v} is a self-loop")
+        self.add_node(u)
+        self.add_node(v)
+        if v in self._successors[u]:
+            return
+        lower, upper = self._position[v], self._position[u]
+        if lower < upper:
+            forward = self._search_forward(v, upper, u)
+            backward = self._search_backward(u, lower)
+            self._reorder(forward, backward)
+        self._successors[u].add(v)
+        self._predecessors[v].add(u)
+
+    def add_edges_from(self, edges: Iterable) -> None:
+        for u, v in edges:
+            self.add_edge(u, v)
+
+    # Dropping an edge or a node never invalidates the current order, so removals
+    # only touch the adjacency sets.
+    def remove_edge(self, u: Hashable, v: Hashable) -> None:
+        self._successors[u].discard(v)
+        self._predecessors[v].discard(u)
+
+    def remove_node(self, node: Hashable) -> None:
+        if node not in self._position:
+            return
+        for succ in self._successors.pop(node, ()):
+            self._predecessors[succ].discard(node)
+        for pred in self._predecessors.pop(node, ()):
+            self._successors[pred].discard(node)
+        del self._position[node]
+
+    def topological_order(self) -> List[Hashable]:
+        return sorted(self._position, key=self._position.__getitem__)
+
+    def _search_forward(self, start: Hashable, upper: int, target: Hashable) -> List[Hashable]:
+        visited = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for succ in self._successors[node]:
+                if succ == target:
+                    raise LineageCycleError(f"Edge {target} -> {start} would create a cycle")
+                if succ not in visited and self._position[succ] < upper:
+                    visited.add(succ)
+                    stack.append(succ)
+        return list(visited)
+
+    def _search_backward(self, start: Hashable, lower: int) -> List[Hashable]:
+        visited = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for pred in self._predecessors[node]:
+                if pred not in visited and lower < self._position[pred]:
+                    visited.add(pred)
+                    stack.append(pred)
+        return list(visited)
+
+    def _reorder(self, forward: List[Hashable], backward: List[Hashable]) -> None:
+        forward.sort(key=self._position.__getitem__)
+        backward.sort(key=self._position.__getitem__)
+        nodes = backward + forward
+        slots = sorted(self._position[node] for node in nodes)
+        for node, slot in zip(nodes, slots):
+            self._position[node] = slot
+
+
+def check_acyclic(G: nx.DiGraph) -> None:
+    # One-shot builds only need a yes/no answer; IncrementalTopologicalOrder is for
+    # graphs that keep taking edges afterwards.
+    try:
+        cycle = nx.find_cycle(G)
+    except nx.NetworkXNoCycle:
+        return
+    raise LineageCycleError(f"Lineage graph contains a cycle: {' -> '.join(str(u) for u, _ in cycle)}")
+
+
+def _edge_frame(df: pd.DataFrame) -> pd.DataFrame:
+    parent_codes, child_codes = explode_parents(df)
+    return pd.DataFrame({'child_lgd': child_codes, 'parent_lgd': parent_codes})
+
+
+def find_dangling_parents(df: pd.DataFrame) -> pd.DataFrame:
+    edges = _edge_frame(df)
+    known = np.isin(edges['parent_lgd'].to_numpy(), df['lgd_code'].to_numpy(dtype=np.int64))
+    return edges[~known].reset_index(drop=True)
+
+
+def _edges_with_attributes(df: pd.DataFrame) -> pd.DataFrame:
+    edges = _edge_frame(df)
+    attrs = df.drop_duplicates('lgd_code').set_index('lgd_code')[['year', 'area']]
+    edges = edges[edges['parent_lgd'].isin(attrs.index)]
+    edges = edges.join(attrs, on='child_lgd').join(attrs, on='parent_lgd', rsuffix='_parent')
+    return edges.rename(columns={'year': 'child_year', 'area': 'child_area',
+                                 'year_parent': 'parent_year', 'area_parent': 'parent_area'})
+
+
+def find_children_before_parents(df: pd.DataFrame) -> pd.DataFrame:
+    edges = _edges_with_attributes(df)
+    bad = edges['child_year'].to_numpy() < edges['parent_year'].to_numpy()
+    return edges.loc[bad, ['child_lgd', 'parent_lgd', 'child_year', 'parent_year']].reset_index(drop=True)
+
+
+def find_oversized_children(df: pd.DataFrame) -> pd.DataFrame:
+    edges = _edges_with_attributes(df)
+    bad = edges['child_area'].to_numpy() > edges['parent_area'].to_numpy()
+    return edges.loc[bad, ['child_lgd', 'parent_lgd', 'child_area', 'parent_area']].reset_index(drop=True)
+
+
+def validate_district_data(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    codes = df['lgd_code']
+    return {
+        'duplicate_codes': df.loc[codes.duplicated(keep=False), ['lgd_code', 'district']].reset_index(drop=True),
+        'dangling_parents': find_dangling_parents(df),
+        'children_before_parents': find_children_before_parents(df),
+        'oversized_children': find_oversized_children(df),
+    }
+
+
+def check_district_data(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    issues = validate_district_data(df)
+    for name in ('duplicate_codes', 'dangling_parents'):
+        if len(issues[name]):
+            raise ValueError(f"Invalid district data ({name.replace('_', ' ')}):\n{issues[name].to_string(index=False)}")
+    for name in ('children_before_parents', 'oversized_children'):
+        if len(issues[name]):
+            warnings.warn(f"District data check '{name.replace('_', ' ')}' flagged {len(issues[name])} edge(s):\n"
+                          f"{issues[name].to_string(index=False)}")
+    return issues
@@ -0,0 +1,151 @@
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from lineage_arrays import LineageArrays, code_index, topological_levels
+
+ANCESTOR_CACHE_SIZE = 4096
+
+
+class LineageLCA:
+    def __init__(self, arrays: LineageArrays, ancestor_cache_size: int = ANCESTOR_CACHE_SIZE) -> None:
+        if ancestor_cache_size < 1:
+            raise ValueError("ancestor_cache_size must be at least 1")
+        self.arrays = arrays
+        self.ancestor_cache_size = ancestor_cache_size
+        n = len(arrays.codes)
+        self._root = n
+        order, self.level = topological_levels(arrays)
+
+        in_degree = np.diff(arrays.rev_indptr)
+        tree_parent = np.full(n, n, dtype=np.int64)
+        single = np.flatnonzero(in_degree == 1)
+        tree_parent[single] = arrays.rev_indices[arrays.rev_indptr[single]]
+
+        # A node whose ancestry passes through a multi-parent formation is not
+        # described by its tree-parent chain and goes through the fallback path.
+        self.multi_lineage = in_degree > 1
+        for node in order:
+            parent = tree_parent[node]
+            if parent != n and self.multi_lineage[parent]:
+                self.multi_lineage[node] = True
+
+        self._build_euler_tour(tree_parent)
+        self._ancestor_cache: 'OrderedDict[int, Dict[int, int]]' = OrderedDict()
+
+    def _build_euler_tour(self, tree_parent: np.ndarray) -> None:
+        n = self._root
+        child_order = np.argsort(tree_parent, kind='stable')
+        child_ptr = np.zeros(n + 2, dtype=np.int64)
+        np.cumsum(np.bincount(tree_parent, minlength=n + 1), out=child_ptr[1:])
+
+        euler = np.empty(2 * n + 1, dtype=np.int64)
+        depth = np.empty(2 * n + 1, dtype=np.int32)
+        self.tree_depth = np.zeros(n + 1, dtype=np.int32)
+        self._first = np.empty(n + 1, dtype=np.int64)
+        pos = 0
+        stack = [(n, child_ptr[n])]
+        self.tree_depth[n] = -1
+        euler[pos], depth[pos] = n, -1
+        self._first[n] = pos
+        pos += 1
+        while stack:
+            node, cursor = stack[-1]
+            if cursor < child_ptr[node + 1]:
+                stack[-1] = (node, cursor + 1)
+                child = child_order[cursor]
+                self.tree_depth[child] = self.tree_depth[node] + 1
+                self._first[child] = pos
+                euler[pos], depth[pos] = child, self.tree_depth[child]
+                pos += 1
+                stack.append((child, child_ptr[child]))
+            else:
+                stack.pop()
+                if stack:
+                    parent = stack[-1][0]
+                    euler[pos], depth[pos] = parent, self.tree_depth[parent]
+                    pos += 1
+        self._euler = euler[:pos]
+        self._euler_depth = depth[:pos]
+
+        levels = [np.arange(pos, dtype=np.int32)]
+        span = 1
+        while 2 * span <= pos:
+            prev = levels[-1]
+            left, right = prev[:pos - 2 * span + 1], prev[span:pos - span + 1]
+            levels.append(np.where(depth[left] <= depth[right], left, right))
+            span *= 2
+        self._sparse = np.full((len(levels), pos), -1, dtype=np.int32)
+        for k, row in enumerate(levels):
+            self._sparse[k, :len(row)] = row
+
+    def _tree_lca(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        lo = np.minimum(self._first[a], self._first[b])
+        hi = np.maximum(self._first[a], self._first[b]) + 1
+        k = np.floor(np.log2(hi - lo)).astype(np.int64)
+        left = self._sparse[k, lo]
+        right = self._sparse[k, hi - (1 << k)]
+        best = np.where(self._euler_depth[left] <= self._euler_depth[right], left, right)
+        return self._euler[best]
+
+    def _ancestor_distances(self, node: int) -> Dict[int, int]:
+        cached = self._ancestor_cache.get(node)
+        if cached is not None:
+            self._ancestor_cache.move_to_end(node)
+            return cached
+        arrays = self.arrays
+        distances = {node: 0}
+        queue = deque([node])
+        while queue:
+            current = queue.popleft()
+            for parent in arrays.rev_indices[arrays.rev_indptr[current]:arrays.rev_indptr[current + 1]]:
+                parent = int(parent)
+                if parent not in distances:
+                    distances[parent] = distances[current] + 1
+                    queue.append(parent)
+        self._ancestor_cache[node] = distances
+        if len(self._ancestor_cache) > self.ancestor_cache_size:
+            self._ancestor_cache.popitem(last=False)
+        return distances
+
+    def _dag_query(self, a: int, b: int) -> Tuple[int, int]:
+        up_a = self._ancestor_distances(a)
+        up_b = self._ancestor_distances(b)
+        if len(up_a) > len(up_b):
+            up_a, up_b = up_b, up_a
+        best, best_key = -1, None
+        for node, dist in up_a.items():
+            other = up_b.get(node)
+            if other is None:
+                continue
+            key = (dist + other, -int(self.level[node]))
+            if best_key is None or key < best_key:
+                best, best_key = node, key
+        return (best, best_key[0]) if best_key is not None else (-1, -1)
+
+    def _query(self, a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        lca = self._tree_lca(a, b)
+        distance = self.tree_depth[a] + self.tree_depth[b] - 2 * self.tree_depth[lca]
+        no_origin = lca == self._root
+        lca = np.where(no_origin, -1, lca)
+        distance = np.where(no_origin, -1, distance)
+        for i in np.flatnonzero(self.multi_lineage[a] | self.multi_lineage[b]):
+            lca[i], distance[i] = self._dag_query(int(a[i]), int(b[i]))
+        return lca, distance
+
+    def common_origin_batch(self, a_codes, b_codes) -> np.ndarray:
+        lca, _ = self._query(code_index(self.arrays, a_codes), code_index(self.arrays, b_codes))
+        return np.where(lca >= 0, self.arrays.codes[np.maximum(lca, 0)], -1)
+
+    def lineage_distance_batch(self, a_codes, b_codes) -> np.ndarray:
+        _, distance = self._query(code_index(self.arrays, a_codes), code_index(self.arrays, b_codes))
+        return distance
+
+    def common_origin(self, a_code: int, b_code: int) -> Optional[int]:
+        origin = int(self.common_origin_batch([a_code], [b_code])[0])
+        return origin if origin >= 0 else None
+
+    def lineage_distance(self, a_code: int, b_code: int) -> Optional[int]:
+        distance = int(self.lineage_distance_batch([a_code], [b_code])[0])
+        return distance if distance >= 0 else None
@@ -0,0 +1,257 @@
+import argparse
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+import py1
+from lineage_arrays import dataset_version
+from lineage_cache import QUERY_KINDS, LineageQueryCache
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+RESPONSE_CACHE_SIZE = 1024
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if pd.isna(value):
+        return None
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _parse_code(text: str) -> int:
+    try:
+        return int(text)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{text}' is not a valid LGD code") from None
+
+
+class LineageService:
+    def __init__(self, df: pd.DataFrame, response_cache_size: int = RESPONSE_CACHE_SIZE) -> None:
+        # One worker: the query cache and graph are not thread-safe, and the event
+        # loop stays free to accept and coalesce requests while a query runs.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lineage-query')
+        self._responses: 'OrderedDict[Tuple[str, str], Tuple[str, bytes]]' = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.response_cache_size = response_cache_size
+        self.coalesced = 0
+        self.routes: Dict[str, Callable[[List[str], Dict[str, List[str]]], Any]] = {
+            'health': self.health,
+            'lineage': self.lineage,
+            'snapshot': self.snapshot,
+            'statistics': self.statistics,
+            'area-evolution': self.area_evolution,
+        }
+        self.cache: Optional[LineageQueryCache] = None
+        self.set_dataset(df)
+
+    def set_dataset(self, df: pd.DataFrame) -> None:
+        G = py1.create_district_graph(df)
+        version = dataset_version(df)
+        self.df = df
+        self.G = G
+        self.version = version
+        if self.cache is None:
+            self.cache = LineageQueryCache(G, version)
+        else:
+            self.cache.set_dataset(G, version)
+        self._responses.clear()
+
+    def _district(self, code: int) -> Dict[str, Any]:
+        if code not in self.G:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"LGD code {code} not found")
+        data = self.G.nodes[code]
+        return {'lgd_code': code, 'district': data['district'], 'year': data['year'], 'area': data['area']}
+
+    def _related(self, code: int, kind: str) -> List[Dict[str, Any]]:
+        return [self._district(related) for related in self.cache.get(code, kind).tolist()]
+
+    def health(self, path: List[str], params: Dict[str, List[str]]) -> Dict[str, Any]:
+        return {'status': 'ok', 'version': self.version, 'districts': self.G.number_of_nodes(),
+                'query_cache': self.cache.info(), 'responses_cached': len(self._responses),
+                'coalesced': self.coalesced}
+
+    def lineage(self, path: List[str], params: Dict[str, List[str]]) -> Dict[str, Any]:
+        kinds = params.get('kind', list(QUERY_KINDS))
+        unknown = [kind for kind in kinds if kind not in QUERY_KINDS]
+        if unknown:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown kind(s) {unknown}, expected {list(QUERY_KINDS)}")
+        if path:
+            codes = [_parse_code(path[0])]
+        elif 'codes' in params:
+            codes = [_parse_code(code) for value in params['codes'] for code in value.split(',') if code]
+        else:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Use /lineage/<code> or /lineage?codes=<code>,<code>")
+        results = [dict(self._district(code), **{kind: self._related(code, kind) for kind in kinds})
+                   for code in codes]
+        return results[0] if path else {'results': results}
+
+    def snapshot(self, path: List[str], params: Dict[str, List[str]]) -> Dict[str, Any]:
+        if not path:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Use /snapshot/<year>")
+        try:
+            year = int(path[0])
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{path[0]}' is not a valid year") from None
+        existing = self.df[self.df['year'] <= year].sort_values(['year', 'district'])
+        return {'year': year, 'count': len(existing), 'total_area': existing['area'].sum(),
+                'districts': existing[['lgd_code', 'district', 'year', 'area', 'parent_lgd']].to_dict('records')}
+
+    def statistics(self, path: List[str], params: Dict[str, List[str]]) -> Dict[str, Any]:
+        top_parents = int(params.get('top', ['5'])[0])
+        stats = py1.compute_statistics(self.df, self.G, top_parents=top_parents)
+        row_fields = ['lgd_code', 'district', 'year', 'area']
+        return dict(stats,
+                    largest_district=stats['largest_district'][row_fields].to_dict(),
+                    smallest_district=stats['smallest_district'][row_fields].to_dict(),
+                    formations_by_year={str(year): n for year, n in stats['formations_by_year'].items()},
+                    most_prolific_parents=[dict(self._district(code), children=n)
+                                           for code, n in stats['most_prolific_parents']])
+
+    def area_evolution(self, path: List[str], params: Dict[str, List[str]]) -> Dict[str, Any]:
+        if not path:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Use /area-evolution/<code>")
+        code = _parse_code(path[0])
+        self._district(code)
+        evolution = py1.compute_area_evolution(self.df, self.G, code)
+        return {'lgd_code': code, 'years': [int(year) for year in evolution.columns],
+                'series': [dict(self._district(member), area=evolution.loc[member].tolist())
+                           for member in evolution.index]}
+
+    def render(self, target: str) -> bytes:
+        parts = urlsplit(target)
+        segments = [segment for segment in parts.path.split('/') if segment]
+        if not segments or segments[0] not in self.routes:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No endpoint at '{parts.path}'")
+        try:
+            payload = self.routes[segments[0]](segments[1:], parse_qs(parts.query))
+        except (KeyError, nx.NetworkXError) as error:
+            raise HTTPError(HTTPStatus.NOT_FOUND, str(error)) from None
+        except ValueError as error:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(error)) from None
+        return json.dumps(payload, default=_json_default).encode()
+
+    async def respond(self, target: str, if_none_match: Optional[str] = None) -> Tuple[HTTPStatus, Dict[str, str], bytes]:
+        if target.startswith('/health'):
+            body = self.render(target)
+            return HTTPStatus.OK, {'Cache-Control': 'no-store'}, body
+
+        key = (self.version, target)
+        cached = self._responses.get(key)
+        if cached is None:
+            # Identical requests that arrive while a query is running share its result.
+            future = self._inflight.get(key)
+            if future is None:
+                future = asyncio.get_running_loop().run_in_executor(self._executor, self.render, target)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            else:
+                self.coalesced += 1
+            body = await asyncio.shield(future)
+            etag = f'"{self.version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+            cached = (etag, body)
+            self._responses[key] = cached
+            if len(self._responses) > self.response_cache_size:
+                self._responses.popitem(last=False)
+        else:
+            self._responses.move_to_end(key)
+
+        etag, body = cached
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if if_none_match is not None and etag in [tag.strip() for tag in if_none_match.split(',')]:
+            return HTTPStatus.NOT_MODIFIED, headers, b''
+        return HTTPStatus.OK, headers, body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                method, target, version = (request_line.split(' ') + ['', '', ''])[:3]
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                if method not in ('GET', 'HEAD'):
+                    status, extra, body = HTTPStatus.METHOD_NOT_ALLOWED, {'Allow': 'GET, HEAD'}, b''
+                else:
+                    try:
+                        status, extra, body = await self.respond(target, headers.get('if-none-match'))
+                    except HTTPError as error:
+                        status, extra = error.status, {}
+                        body = json.dumps({'error': str(error)}).encode()
+                    except Exception as error:
+                        status, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {}
+                        body = json.dumps({'error': f"{type(error).__name__}: {error}"}).encode()
+
+                lines = [f"HTTP/1.1 {status.value} {status.phrase}", 'Content-Type: application/json',
+                         f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                lines += [f"{name}: {value}" for name, value in extra.items()]
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    ready: Optional[asyncio.Event] = None) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        self.port = server.sockets[0].getsockname()[1]
+        print(f"Lineage service for dataset {self.version} listening on http://{host}:{self.port}")
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve district lineage queries over local HTTP/JSON.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--response-cache', type=int, default=RESPONSE_CACHE_SIZE)
+    args = parser.parse_args()
+
+    service = LineageService(py1.load_district_data(), response_cache_size=args.response_cache)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
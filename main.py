@@ -1,12 +1,17 @@
 import networkx as nx
-import plotly.graph_objects as go
 import pandas as pd
 
-try:
-    import pydot
-    PYDOT_AVAILABLE = True
-except ImportError:
-    PYDOT_AVAILABLE = False
+from edge_bundling import edge_polylines
+from force_layout import graph_layout
+from lazy_imports import lazy_import, module_available
+from lineage_arrays import build_lineage_arrays, dataset_version
+from lineage_cache import LineageQueryCache
+from lineage_checks import check_acyclic, check_district_data
+from lineage_lca import LineageLCA
+
+go = lazy_import('plotly.graph_objects')
+
+PYDOT_AVAILABLE = module_available('pydot')
 
 def load_and_prepare_data():
     district_data = [
@@ -47,6 +52,7 @@ def load_and_prepare_data():
     return pd.DataFrame(district_data)
 
 def create_district_graph(df):
+    check_district_data(df)
     G = nx.DiGraph()
     for _, row in df.iterrows():
         G.add_node(row['lgd_code'], year=row['year'], district=row['district'], area=row['area'])
@@ -57,9 +63,10 @@ def create_district_graph(df):
                 parents = [parents]
             for parent_lgd in parents:
                 G.add_edge(int(parent_lgd), row['lgd_code'])
+    check_acyclic(G)
     return G
 
-def visualize_graph(G):
+def visualize_graph(G, bundled=None):
     G.graph['graph'] = {'rankdir': 'LR', 'splines': 'true', 'nodesep': '0.6'}
     try:
         try:
@@ -70,17 +77,11 @@ def visualize_graph(G):
             else:
                 raise ImportError
     except (ImportError, FileNotFoundError):
-        print("Warning: Graphviz/pydot not found. Using spring layout.")
-        pos = nx.spring_layout(G, iterations=50)
-
-    edge_x, edge_y = [], []
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
+        print("Warning: Graphviz/pydot not found. Using force-directed layout.")
+        pos = graph_layout(G, dim=2, iterations=50)
 
-    edge_trace = go.Scatter(x=edge_x, y=edge_y, line=dict(width=0.7, color='#888'), hoverinfo='none', mode='lines')
+    edges = edge_polylines(G, pos, bundled)
+    edge_trace = go.Scatter(x=edges.x, y=edges.y, line=dict(width=0.7, color='#888'), hoverinfo='none', mode='lines')
 
     node_x, node_y, node_text, node_size = [], [], [], []
     for node in G.nodes():
@@ -120,7 +121,9 @@ def visualize_graph(G):
     )
     fig.show()
 
-def interactive_lineage_tracer(df, G):
+def interactive_lineage_tracer(df, G, cache=None):
+    if cache is None:
+        cache = LineageQueryCache(G, dataset_version(df))
     name_to_lgd = {row['district'].lower(): row['lgd_code'] for _, row in df.iterrows()}
     while True:
         print("\n" + "="*50)
@@ -153,24 +156,24 @@ def interactive_lineage_tracer(df, G):
         print(f"{'='*60}")
         print(f"LGD Code: {lgd_code}")
         print(f"Area: {node_info['area']:,} sq km")
-        ancestors = list(nx.ancestors(G, lgd_code))
+        ancestors = cache.get(lgd_code, 'ancestors').tolist()
         if ancestors:
             print(f"\n🔼 ANCESTORS (Formed From):")
-            for ancestor_lgd in sorted(ancestors, key=lambda x: G.nodes[x]['year']):
+            for ancestor_lgd in ancestors:
                 ancestor_info = G.nodes[ancestor_lgd]
                 print(f"   • {ancestor_info['district']} ({ancestor_info['year']}) - {ancestor_info['area']:,} sq km")
         else:
             print("\n🔼 ANCESTORS: This is an original district (no parents in this dataset).")
-        descendants = list(nx.descendants(G, lgd_code))
+        descendants = cache.get(lgd_code, 'descendants').tolist()
         if descendants:
             print(f"\n🔽 DESCENDANTS (Contributed To):")
-            for descendant_lgd in sorted(descendants, key=lambda x: G.nodes[x]['year']):
+            for descendant_lgd in descendants:
                 descendant_info = G.nodes[descendant_lgd]
                 print(f"   • {descendant_info['district']} ({descendant_info['year']}) - {descendant_info['area']:,} sq km")
         else:
             print("\n🔽 DESCENDANTS: This district has not been split further.")
-        direct_parents = list(G.predecessors(lgd_code))
-        direct_children = list(G.successors(lgd_code))
+        direct_parents = cache.get(lgd_code, 'parents').tolist()
+        direct_children = cache.get(lgd_code, 'children').tolist()
         if direct_parents:
             print(f"\n↗️  DIRECT PARENTS:")
             for parent_lgd in direct_parents:
@@ -183,6 +186,38 @@ def interactive_lineage_tracer(df, G):
                 print(f"   • {child_info['district']} ({child_info['year']})")
         print("="*60)
 
+def common_origin_finder(df, G, lca):
+    name_to_lgd = {row['district'].lower(): row['lgd_code'] for _, row in df.iterrows()}
+    while True:
+        print("\n" + "="*50)
+        print("     Common Origin Finder")
+        print("="*50)
+        print("\nEnter two district names separated by a comma (or 'exit' to quit):")
+        user_input = input("> ").strip()
+        if user_input.lower() == 'exit':
+            break
+        names = [name.strip().lower() for name in user_input.split(',')]
+        if len(names) != 2:
+            print("Error: Please enter exactly two district names, e.g. 'Sakti, Sarangarh-Bilaigarh'.")
+            continue
+        missing = [name for name in names if name not in name_to_lgd]
+        if missing:
+            print(f"Error: District '{missing[0]}' not found in the dataset.")
+            continue
+        first_lgd, second_lgd = name_to_lgd[names[0]], name_to_lgd[names[1]]
+        first_info, second_info = G.nodes[first_lgd], G.nodes[second_lgd]
+        print(f"\n{'='*60}")
+        print(f"  {first_info['district'].upper()} & {second_info['district'].upper()}")
+        print(f"{'='*60}")
+        origin_lgd = lca.common_origin(first_lgd, second_lgd)
+        if origin_lgd is None:
+            print("No common origin: these districts descend from different original districts.")
+        else:
+            origin_info = G.nodes[origin_lgd]
+            print(f"Closest Common Origin: {origin_info['district']} ({origin_info['year']}) - LGD Code: {origin_lgd}")
+            print(f"Lineage Distance: {lca.lineage_distance(first_lgd, second_lgd)} split(s)")
+        print("="*60)
+
 def show_statistics(df, G):
     print("\n" + "="*60)
     print("   📊 CHHATTISGARH DISTRICT STATISTICS")
@@ -228,6 +263,8 @@ def show_statistics(df, G):
 def main():
     district_df = load_and_prepare_data()
     district_graph = create_district_graph(district_df)
+    lineage_lca = LineageLCA(build_lineage_arrays(district_df))
+    lineage_cache = LineageQueryCache(district_graph, dataset_version(district_df))
     while True:
         print("\n" + "="*55)
         print("   🏛️  CHHATTISGARH DISTRICT EVOLUTION EXPLORER")
@@ -235,21 +272,24 @@ def main():
         print("1. 📊 Show Full Interactive Visualization")
         print("2. 🔍 Trace Lineage of a Specific District")
         print("3. 📈 Show District Statistics")
+        print("5. 🧬 Find Common Origin of Two Districts")
         print("4. 🚪 Exit")
         print("="*55)
-        choice = input("Enter your choice (1-4): ").strip()
+        choice = input("Enter your choice (1-5): ").strip()
         if choice == '1':
             print("\n🎨 Generating visualization... Please check your browser or plot viewer.")
             visualize_graph(district_graph)
         elif choice == '2':
-            interactive_lineage_tracer(district_df, district_graph)
+            interactive_lineage_tracer(district_df, district_graph, lineage_cache)
         elif choice == '3':
             show_statistics(district_df, district_graph)
+        elif choice == '5':
+            common_origin_finder(district_df, district_graph, lineage_lca)
         elif choice == '4':
             print("\n👋 Thank you for using the Chhattisgarh District Evolution Explorer!")
             break
         else:
-            print("❌ Invalid choice. Please enter 1, 2, 3, or 4.")
+            print("❌ Invalid choice. Please enter 1, 2, 3, 4, or 5.")
 
 if __name__ == '__main__':
     main()
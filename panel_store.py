@@ -0,0 +1,292 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_import
+from lineage_arrays import LineageArrays, build_lineage_arrays, code_index, row_hashes
+from subgraph import neighbourhood
+
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+pads = lazy_import('pyarrow.dataset')
+
+PANEL_FORMAT = 1
+MANIFEST_FILE = '_manifest.json'
+ROW_GROUP_SIZE = 16 * 1024
+PART_HASH_CHARS = 16
+SORT_COLUMNS = ['family', 'lgd_code']
+RETIRED_RETENTION_SECONDS = 3600
+
+
+def district_families(arrays: LineageArrays) -> np.ndarray:
+    # A district's family is the original district reached through first-listed
+    # parents, so every row of a panel has exactly one family to partition on.
+    n = len(arrays.codes)
+    root = np.arange(n)
+    has_parent = np.diff(arrays.rev_indptr) > 0
+    root[has_parent] = arrays.rev_indices[arrays.rev_indptr[:-1][has_parent]]
+    while True:
+        above = root[root]
+        if np.array_equal(above, root):
+            return arrays.codes[root]
+        root = above
+
+
+def iter_area_evolution_by_year(df: pd.DataFrame, years: Optional[Sequence[int]] = None) -> Iterator[pd.DataFrame]:
+    arrays = build_lineage_arrays(df)
+    families = district_families(arrays)
+    years = np.unique(arrays.years) if years is None else np.asarray(sorted(years), dtype=np.int64)
+
+    # Same remnant rule as py1.compute_area_evolution, one year at a time: each
+    # district's area less the children formed up to that year.
+    child_years = arrays.years[arrays.dst]
+    order = np.argsort(child_years, kind='stable')
+    carved = np.zeros(len(arrays.codes))
+    applied = 0
+    for year in years.tolist():
+        upto = np.searchsorted(child_years[order], year, side='right')
+        edges = order[applied:upto]
+        carved += np.bincount(arrays.src[edges], weights=arrays.areas[arrays.dst[edges]], minlength=len(carved))
+        applied = upto
+        exists = np.flatnonzero(arrays.years <= year)
+        yield pd.DataFrame({
+            'year': np.full(len(exists), year, dtype=np.int64), 'lgd_code': arrays.codes[exists],
+            'district': arrays.names[exists], 'family': families[exists],
+            'area': arrays.areas[exists] - carved[exists],
+        })
+
+
+class PanelStore:
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def manifest(self) -> Dict[str, Any]:
+        path = os.path.join(self.root, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {'format': PANEL_FORMAT, 'columns': None, 'years': {}}
+        with open(path) as handle:
+            manifest = json.load(handle)
+        if manifest.get('format') != PANEL_FORMAT:
+            raise ValueError(f"Panel store '{self.root}' has format {manifest.get('format')}, expected {PANEL_FORMAT}")
+        return manifest
+
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        path = os.path.join(self.root, MANIFEST_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as handle:
+            json.dump(manifest, handle, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def years(self) -> List[int]:
+        return sorted(int(year) for year in self.manifest()['years'])
+
+    def _write_partition(self, year: int, frame: pd.DataFrame) -> Dict[str, Any]:
+        table = pa.Table.from_pandas(frame.sort_values(SORT_COLUMNS, kind='stable'), preserve_index=False)
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, row_group_size=ROW_GROUP_SIZE, compression='zstd',
+                       use_dictionary=['district'], write_statistics=True)
+        body = sink.getvalue().to_pybytes()
+        name = f"year={year}/part-{hashlib.sha256(body).hexdigest()[:PART_HASH_CHARS]}.parquet"
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as handle:
+                handle.write(body)
+            os.replace(tmp_path, path)
+        return {'file': name, 'rows': len(frame), 'bytes': len(body),
+                'families': [int(frame['family'].min()), int(frame['family'].max())] if len(frame) else None}
+
+    def append(self, frames: Iterable[pd.DataFrame], sources: Optional[Dict[int, str]] = None,
+               replace: bool = False) -> List[int]:
+        # Each year is an immutable file named by its content hash; the manifest is
+        # swapped atomically after every year, so readers holding an older manifest
+        # keep reading a complete snapshot while new years are added. Replaced
+        # files are only retired here and removed by vacuum() once they are older
+        # than the retention window.
+        manifest = self.manifest()
+        written: List[int] = []
+        replaced: List[str] = []
+        for frame in frames:
+            missing = [column for column in ('year',) + tuple(SORT_COLUMNS) if column not in frame.columns]
+            if missing:
+                raise KeyError(f"Panel frame is missing column(s) {missing}")
+            columns = list(frame.columns)
+            if manifest['columns'] is None:
+                manifest['columns'] = columns
+            elif columns != manifest['columns']:
+                raise ValueError(f"Panel columns {columns} do not match the store's {manifest['columns']}")
+            for year, part in frame.groupby('year', sort=True):
+                key = str(int(year))
+                if key in manifest['years']:
+                    if not replace:
+                        raise ValueError(f"Year {key} is already stored in '{self.root}'; "
+                                         f"pass replace=True to rewrite it")
+                    replaced.append(manifest['years'][key]['file'])
+                entry = self._write_partition(int(year), part)
+                entry['source'] = (sources or {}).get(int(year))
+                manifest['years'][key] = entry
+                written.append(int(year))
+            live = {entry['file'] for entry in manifest['years'].values()}
+            retired = manifest.setdefault('retired', {})
+            retired.update((name, time.time()) for name in set(replaced) - live - set(retired))
+            self._save_manifest(manifest)
+        self.vacuum()
+        return written
+
+    def vacuum(self, retention: float = RETIRED_RETENTION_SECONDS) -> List[str]:
+        manifest = self.manifest()
+        retired = manifest.get('retired', {})
+        live = {entry['file'] for entry in manifest['years'].values()}
+        expired = sorted(name for name, since in retired.items() if time.time() - since >= retention or name in live)
+        if not expired:
+            return []
+        for name in expired:
+            del retired[name]
+        self._save_manifest(manifest)
+        for name in expired:
+            path = os.path.join(self.root, name)
+            if name not in live and os.path.exists(path):
+                os.remove(path)
+        return [name for name in expired if name not in live]
+
+    def files(self, years: Optional[Tuple[int, int]] = None) -> List[str]:
+        entries = self.manifest()['years']
+        lo, hi = years if years is not None else (-np.inf, np.inf)
+        return [os.path.join(self.root, entries[key]['file']) for key in sorted(entries, key=int)
+                if lo <= int(key) <= hi]
+
+    def dataset(self, years: Optional[Tuple[int, int]] = None):
+        files = self.files(years)
+        if not files:
+            return None
+        return pads.dataset(files, format='parquet')
+
+    def read(self, years: Optional[Tuple[int, int]] = None, families: Optional[Iterable[int]] = None,
+             codes: Optional[Iterable[int]] = None, columns: Optional[List[str]] = None,
+             lineage: Optional[LineageArrays] = None) -> pd.DataFrame:
+        # Year ranges prune whole partitions through the manifest; family and code
+        # filters are pushed down to Parquet row-group statistics, which are tight
+        # because every partition is sorted by (family, lgd_code). The family column
+        # follows first-listed parents only, so a family filter also matches, by
+        # code, members that reach the family through another parent; finding those
+        # needs the lineage the panel was built from.
+        dataset = self.dataset(years)
+        if dataset is None:
+            return pd.DataFrame(columns=columns or self.manifest()['columns'] or [])
+        condition = None
+        if families is not None:
+            if lineage is None:
+                raise ValueError("Filtering panels by family needs the lineage arrays they were built from")
+            families = sorted(set(int(family) for family in families))
+            members = family_members(lineage, families)
+            partition_family = district_families(lineage)[code_index(lineage, members)]
+            others = members[~np.isin(partition_family, families)]
+            condition = _isin_term('family', families)
+            if len(others):
+                condition = condition | _isin_term('lgd_code', others.tolist())
+        if codes is not None:
+            term = _isin_term('lgd_code', sorted(int(code) for code in codes))
+            condition = term if condition is None else condition & term
+        table = dataset.to_table(columns=columns, filter=condition)
+        return table.to_pandas().sort_values(['year'] + [c for c in SORT_COLUMNS if c in table.column_names],
+                                             ignore_index=True)
+
+
+def _isin_term(field: str, values: List[int]):
+    if not values:
+        return pads.scalar(False)
+    return (pads.field(field) >= values[0]) & (pads.field(field) <= values[-1]) & pads.field(field).isin(values)
+
+
+def family_members(arrays: LineageArrays, families: Iterable[int]) -> np.ndarray:
+    # Every district descended from the given originals through any of its parents.
+    return arrays.codes[neighbourhood(arrays, families, direction='descendants')]
+
+
+def year_sources(df: pd.DataFrame, years: Iterable[int], prefix: str = '') -> Dict[int, str]:
+    # A year's panel depends only on districts formed by then, so each partition is
+    # keyed by a multiset hash of those rows: a release that adds later districts
+    # leaves the keys, and so the stored history, untouched.
+    formed = df['year'].to_numpy(dtype=np.int64)
+    order = np.argsort(formed, kind='stable')
+    with np.errstate(over='ignore'):
+        running = np.cumsum(row_hashes(df)[order], dtype=np.uint64)
+    sources = {}
+    for year in sorted(set(int(year) for year in years)):
+        upto = int(np.searchsorted(formed[order], year, side='right'))
+        sources[year] = f"{prefix}{upto}-{int(running[upto - 1]) if upto else 0:016x}"
+    return sources
+
+
+def _pending_years(store: PanelStore, sources: Dict[int, str], replace: bool) -> Tuple[List[int], bool]:
+    entries = store.manifest()['years']
+    pending = [year for year, source in sources.items()
+               if replace or entries.get(str(year), {}).get('source') != source]
+    return pending, replace or any(str(year) in entries for year in pending)
+
+
+def materialize_area_evolution(df: pd.DataFrame, store: PanelStore, years: Optional[Sequence[int]] = None,
+                               replace: bool = False) -> List[int]:
+    sources = year_sources(df, np.unique(df['year']).tolist() if years is None else years)
+    years, replace = _pending_years(store, sources, replace)
+    if not years:
+        return []
+    return store.append(iter_area_evolution_by_year(df, years), sources, replace)
+
+
+def materialize_time_series(store: PanelStore, seed: Optional[int] = None, years: Optional[Sequence[int]] = None,
+                            replace: bool = False) -> List[int]:
+    import visual
+
+    seed = visual.TIME_SERIES_SEED if seed is None else seed
+    districts = visual.load_initial_data()
+    sources = year_sources(districts, visual.TIME_SERIES_YEARS if years is None else years, f"seed={seed}:")
+    years, replace = _pending_years(store, sources, replace)
+    if not years:
+        return []
+    arrays = build_lineage_arrays(districts)
+    families = pd.Series(district_families(arrays), index=arrays.codes)
+    frames = (frame.assign(family=families.loc[frame['lgd_code']].to_numpy())
+              for frame in visual.iter_time_series_by_year(seed, years))
+    return store.append(frames, sources, replace)
+
+
+def area_evolution_from_store(store: PanelStore, codes: Iterable[int], years: Sequence[int]) -> pd.DataFrame:
+    codes = list(codes)
+    missing = sorted(set(years) - set(store.years()))
+    if missing:
+        raise KeyError(f"Panel store '{store.root}' has no partitions for year(s) {missing}")
+    panel = store.read(years=(min(years), max(years)), codes=codes, columns=['year', 'lgd_code', 'area'])
+    table = panel.pivot(index='lgd_code', columns='year', values='area')
+    table = table.reindex(index=[code for code in codes if code in table.index], columns=list(years)).fillna(0.0)
+    return table.rename_axis(columns=None)
+
+
+def main() -> None:
+    from py1 import load_district_data
+
+    parser = argparse.ArgumentParser(description="Materialize district x year panels as year-partitioned Parquet.")
+    parser.add_argument('panel', choices=['area-evolution', 'time-series'])
+    parser.add_argument('root', nargs='?', default=None, help="store directory (default: panels/<panel>)")
+    parser.add_argument('--years', type=int, nargs='+', default=None)
+    parser.add_argument('--replace', action='store_true', help="rewrite years that are already stored")
+    args = parser.parse_args()
+
+    store = PanelStore(args.root or os.path.join('panels', args.panel))
+    if args.panel == 'area-evolution':
+        written = materialize_area_evolution(load_district_data(), store, args.years, args.replace)
+    else:
+        written = materialize_time_series(store, years=args.years, replace=args.replace)
+    print(f"Panel store '{store.root}': {len(written)} year(s) written, {len(store.years())} stored")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,34 @@
+import os
 import warnings
 import networkx as nx
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from collections import defaultdict
-from typing import Tuple
+from itertools import chain
+from typing import NamedTuple, Optional, Tuple
+
+from edge_bundling import edge_polylines
+from force_layout import graph_layout
+from instrumentation import span
+from lazy_imports import lazy_import, module_available
+from lineage_arrays import explode_parents
+from lineage_checks import check_acyclic, check_district_data
+from panel_store import PanelStore, area_evolution_from_store, materialize_area_evolution
+
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
 
 GRAPHVIZ_LAYOUT_CONFIG = {
 }
+PANEL_ROOT_ENV_VAR = 'LINEAGE_PANEL_ROOT'
+AREA_PANEL_DIR = 'area-evolution'
+TIMELINE_JUNCTION, TIMELINE_REMNANT = 0, 1
+
+class DistrictTimeline(NamedTuple):
+    graph: nx.DiGraph
+    first_id: int
+    kind: np.ndarray
+    owner: np.ndarray
+    year: np.ndarray
 
 def load_district_data() -> pd.DataFrame:
     district_data = [
@@ -48,99 +69,137 @@ def load_district_data() -> pd.DataFrame:
     ]
     return pd.DataFrame(district_data)
 
+def create_district_graph(df: pd.DataFrame) -> nx.DiGraph:
+    check_district_data(df)
+    parent_codes, child_codes = explode_parents(df)
+    G = nx.DiGraph()
+    G.add_nodes_from(zip(df['lgd_code'].tolist(), df.drop(columns='lgd_code').to_dict('records')))
+    G.add_edges_from(zip(parent_codes.tolist(), child_codes.tolist()))
+    check_acyclic(G)
+    return G
+
 def create_district_graphs(df: pd.DataFrame) -> Tuple[nx.DiGraph, nx.DiGraph]:
-    df_dict = df.set_index('lgd_code').to_dict('index')
-    G_data = nx.DiGraph()
-    G_visual = nx.DiGraph()
-
-    for lgd_code, data in df_dict.items():
-        G_visual.add_node(lgd_code, **data)
-        G_data.add_node(lgd_code, **data)
-        if data['parent_lgd'] is not None:
-            parents = data['parent_lgd'] if isinstance(data['parent_lgd'], list) else [data['parent_lgd']]
-            for p_code in parents:
-                G_data.add_edge(int(p_code), lgd_code)
-
-    for lgd_code, data in df_dict.items():
-        if data['parent_lgd'] is not None:
-            parents = data['parent_lgd'] if isinstance(data['parent_lgd'], list) else [data['parent_lgd']]
-            if len(parents) > 1:
-                junction_id = f"junction_{lgd_code}"
-                G_visual.add_node(junction_id, year=data['year'], is_junction=True)
-                for p_code in parents:
-                    G_visual.add_edge(int(p_code), junction_id)
-                G_visual.add_edge(junction_id, lgd_code)
+    G = create_district_graph(df)
+    return G, district_timeline(G).graph
+
+def district_timeline(G: nx.DiGraph) -> DistrictTimeline:
+    # Junctions (one per multi-parent district) and remnants (one per parent and
+    # split year) exist only for drawing. They take integer ids above the largest
+    # LGD code and carry no attributes; district attributes stay in G alone.
+    codes = np.fromiter(G.nodes(), dtype=np.int64, count=G.number_of_nodes())
+    edges = np.fromiter(chain.from_iterable(G.edges()), dtype=np.int64,
+                        count=2 * G.number_of_edges()).reshape(-1, 2)
+    parents, children = edges[:, 0], edges[:, 1]
+    order = np.argsort(codes)
+    years = np.fromiter((year for _, year in G.nodes(data='year')), dtype=np.int64, count=len(codes))[order]
+    child_years = years[np.searchsorted(codes[order], children)]
+    first_id = int(codes.max()) + 1 if len(codes) else 0
+
+    merged, counts = np.unique(children, return_counts=True)
+    merged = merged[counts > 1]
+    has_junction = np.isin(children, merged)
+    junction_ids = first_id + np.searchsorted(merged, children[has_junction])
+    merged_years = years[np.searchsorted(codes[order], merged)]
+
+    splits = np.unique(np.stack([parents, child_years]), axis=1)
+    remnant_ids = first_id + len(merged) + np.arange(splits.shape[1])
+    continues = np.zeros(splits.shape[1], dtype=bool)
+    continues[1:] = splits[0, 1:] == splits[0, :-1]
+    previous = np.where(continues, np.roll(remnant_ids, 1), splits[0])
+
+    graph = nx.DiGraph()
+    graph.add_nodes_from(codes.tolist())
+    graph.add_nodes_from(range(first_id, first_id + len(merged) + len(remnant_ids)))
+    graph.add_edges_from(zip(parents[~has_junction].tolist(), children[~has_junction].tolist()))
+    graph.add_edges_from(zip(parents[has_junction].tolist(), junction_ids.tolist()))
+    graph.add_edges_from(zip((first_id + np.arange(len(merged))).tolist(), merged.tolist()))
+    graph.add_edges_from(zip(previous.tolist(), remnant_ids.tolist()))
+    return DistrictTimeline(
+        graph=graph, first_id=first_id,
+        kind=np.repeat([TIMELINE_JUNCTION, TIMELINE_REMNANT], [len(merged), splits.shape[1]]),
+        owner=np.concatenate((merged, splits[0])), year=np.concatenate((merged_years, splits[1])))
+
+def visualize_graph(G: nx.DiGraph, bundled: Optional[bool] = None) -> None:
+    with span('timeline', nodes=G.number_of_nodes(), edges=G.number_of_edges()):
+        timeline = district_timeline(G)
+        layout_graph = timeline.graph
+        layout_graph.graph['graph'] = GRAPHVIZ_LAYOUT_CONFIG
+    with span('layout', nodes=layout_graph.number_of_nodes(), edges=layout_graph.number_of_edges()):
+        try:
+            pos = nx.nx_agraph.graphviz_layout(layout_graph, prog='dot')
+        except (ImportError, FileNotFoundError):
+            warnings.warn("pygraphviz not found. Using a less structured force-directed layout.")
+            pos = graph_layout(layout_graph, dim=2, iterations=50)
+
+    with span('edge_trace', edges=layout_graph.number_of_edges()):
+        edges = edge_polylines(layout_graph, pos, bundled)
+        edge_trace = go.Scatter(x=edges.x, y=edges.y, line=dict(width=0.7, color='#777'), hoverinfo='none',
+                                mode='lines')
+
+    with span('hover_text', nodes=layout_graph.number_of_nodes()):
+        node_x, node_y, node_text, node_size, node_color, node_border_color = [], [], [], [], [], []
+        for node in layout_graph.nodes():
+            x, y = pos[node]
+            node_x.append(x);
+            node_y.append(y);
+            if node >= timeline.first_id:
+                slot = node - timeline.first_id
+                year = int(timeline.year[slot])
+                node_color.append(year)
+                if timeline.kind[slot] == TIMELINE_JUNCTION:
+                    node_text.append("");
+                    node_size.append(0);
+                    node_border_color.append('rgba(0,0,0,0)')
+                else:
+                    district = G.nodes[int(timeline.owner[slot])].get('district', '')
+                    node_text.append(f"<b>{district} (Post-{year})</b><br>Continuation")
+                    node_size.append(15);
+                    node_border_color.append('lightgrey')
             else:
-                G_visual.add_edge(int(parents[0]), lgd_code)
-
-    parents_with_children = defaultdict(lambda: defaultdict(list))
-    for child_code, data in df_dict.items():
-        if data['parent_lgd'] is not None:
-            parents = data['parent_lgd'] if isinstance(data['parent_lgd'], list) else [data['parent_lgd']]
-            for p_code in parents:
-                parents_with_children[p_code][data['year']].append(child_code)
-
-    for p_code, splits_by_year in parents_with_children.items():
-        last_timeline_node = p_code
-        for year in sorted(splits_by_year.keys()):
-            remnant_id = f"remnant_{p_code}_{year}"
-            G_visual.add_node(remnant_id, year=year, district=df_dict[p_code]['district'], is_remnant=True)
-            G_visual.add_edge(last_timeline_node, remnant_id)
-            last_timeline_node = remnant_id
-
-    return G_data, G_visual
-
-def visualize_graph(G: nx.DiGraph) -> None:
-    G.graph['graph'] = GRAPHVIZ_LAYOUT_CONFIG
-    try:
-        pos = nx.nx_agraph.graphviz_layout(G, prog='dot')
-    except (ImportError, FileNotFoundError):
-        warnings.warn("pygraphviz not found. Using a less structured spring layout.")
-        pos = nx.spring_layout(G, iterations=50, k=0.5)
-
-    edge_trace = go.Scatter(x=[x for edge in G.edges() for x in (pos[edge[0]][0], pos[edge[1]][0], None)],
-                            y=[y for edge in G.edges() for y in (pos[edge[0]][1], pos[edge[1]][1], None)],
-                            line=dict(width=0.7, color='#777'), hoverinfo='none', mode='lines')
-
-    node_x, node_y, node_text, node_size, node_color, node_border_color = [], [], [], [], [], []
-    for node, data in G.nodes(data=True):
-        x, y = pos[node]
-        node_x.append(x);
-        node_y.append(y);
-        node_color.append(data.get('year', 1998))
-        if data.get('is_junction', False):
-            node_text.append("");
-            node_size.append(0);
-            node_border_color.append('rgba(0,0,0,0)')
-        elif data.get('is_remnant', False):
-            node_text.append(f"<b>{data.get('district', '')} (Post-{data.get('year', '')})</b><br>Continuation")
-            node_size.append(15);
-            node_border_color.append('lightgrey')
-        else:
-            area_val = data.get('area', 0)
-            node_text.append(
-                f"<b>{data.get('district', 'Unknown')} ({data.get('year', '')})</b><br>LGD: {data.get('lgd_code', 'N/A')}<br>Area: {area_val:,.0f} sq km")
-            node_size.append(max(12, area_val / 350));
-            node_border_color.append('black')
-
-    node_trace = go.Scatter(x=node_x, y=node_y, mode='markers', hoverinfo='text', text=node_text,
-                            marker=dict(showscale=True, colorscale='Viridis', reversescale=True, color=node_color,
-                                        size=node_size, colorbar=dict(thickness=15, title='Year of Formation'),
-                                        line=dict(width=2.5, color=node_border_color)))
-
-    fig = go.Figure(data=[edge_trace, node_trace],
-                    layout=go.Layout(
-                        title=dict(text='<b>Evolution of Districts in Chhattisgarh (1998-2022)</b>', font_size=20,
-                                   x=0.5),
-                        showlegend=False, hovermode='closest', plot_bgcolor='white', margin=dict(b=20, l=5, r=5, t=50),
-                        annotations=[dict(
-                            text="Node size corresponds to area. Color indicates formation year. Grey borders show a district's continuation after a split.",
-                            showarrow=False, xref="paper", yref="paper", x=0.5, y=-0.02)],
-                        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)))
-    fig.show()
+                data = G.nodes[node]
+                node_color.append(data.get('year', 1998))
+                area_val = data.get('area', 0)
+                node_text.append(
+                    f"<b>{data.get('district', 'Unknown')} ({data.get('year', '')})</b><br>LGD: {node}<br>Area: {area_val:,.0f} sq km")
+                node_size.append(max(12, area_val / 350));
+                node_border_color.append('black')
+
+    with span('figure_build'):
+        node_trace = go.Scatter(x=node_x, y=node_y, mode='markers', hoverinfo='text', text=node_text,
+                                marker=dict(showscale=True, colorscale='Viridis', reversescale=True, color=node_color,
+                                            size=node_size, colorbar=dict(thickness=15, title='Year of Formation'),
+                                            line=dict(width=2.5, color=node_border_color)))
+
+        fig = go.Figure(data=[edge_trace, node_trace],
+                        layout=go.Layout(
+                            title=dict(text='<b>Evolution of Districts in Chhattisgarh (1998-2022)</b>', font_size=20,
+                                       x=0.5),
+                            showlegend=False, hovermode='closest', plot_bgcolor='white', margin=dict(b=20, l=5, r=5, t=50),
+                            annotations=[dict(
+                                text="Node size corresponds to area. Color indicates formation year. Grey borders show a district's continuation after a split.",
+                                showarrow=False, xref="paper", yref="paper", x=0.5, y=-0.02)],
+                            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+                            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)))
+    with span('render'):
+        fig.show()
+
+def compute_area_evolution(df: pd.DataFrame, G: nx.DiGraph, progenitor_code: int) -> pd.DataFrame:
+    family_codes = {progenitor_code} | nx.descendants(G, progenitor_code)
+    family_df = df[df['lgd_code'].isin(family_codes)].set_index('lgd_code')
+    years = sorted(df['year'].unique())
+    area_over_time = pd.DataFrame(0.0, index=family_df.index, columns=years)
+    for dist_code, row in family_df.iterrows():
+        current_area = row['area']
+        for year in years:
+            if year >= row['year']:
+                children_formed_by_year = {c for c in G.successors(dist_code) if
+                                           c in family_df.index and family_df.loc[c]['year'] <= year}
+                area_of_children = family_df.loc[list(children_formed_by_year)][
+                    'area'].sum() if children_formed_by_year else 0
+                area_over_time.loc[dist_code, year] = current_area - area_of_children
+    return area_over_time
 
-def visualize_area_evolution(df: pd.DataFrame, G: nx.DiGraph) -> None:
+def visualize_area_evolution(df: pd.DataFrame, G: nx.DiGraph, store: Optional[PanelStore] = None) -> None:
     original_districts = df[df['parent_lgd'].isna()].sort_values('district')
     print("\n" + "=" * 50 + "\n   District Area Evolution Visualizer\n" + "=" * 50)
     print("Select an original district to see its area evolution:")
@@ -158,25 +217,16 @@ def visualize_area_evolution(df: pd.DataFrame, G: nx.DiGraph) -> None:
         print("Error: Invalid input.")
         return
 
-    family_codes = {progenitor_code} | nx.descendants(G, progenitor_code)
-    family_df = df[df['lgd_code'].isin(family_codes)].set_index('lgd_code')
-
-    years = sorted(df['year'].unique())
-    area_over_time = pd.DataFrame(index=family_df.index, columns=years).fillna(0).infer_objects(copy=False)
-
-    for dist_code, row in family_df.iterrows():
-        current_area = row['area']
-        for year in years:
-            if year >= row['year']:
-                children_formed_by_year = {c for c in G.successors(dist_code) if
-                                           c in family_df.index and family_df.loc[c]['year'] <= year}
-                area_of_children = family_df.loc[list(children_formed_by_year)][
-                    'area'].sum() if children_formed_by_year else 0
-                area_over_time.loc[dist_code, year] = current_area - area_of_children
+    if store is not None:
+        family_codes = df.loc[df['lgd_code'].isin({progenitor_code} | nx.descendants(G, progenitor_code)), 'lgd_code']
+        area_over_time = area_evolution_from_store(store, family_codes, sorted(df['year'].unique()))
+    else:
+        area_over_time = compute_area_evolution(df, G, progenitor_code)
+    lgd_to_name = df.set_index('lgd_code')['district']
 
     plot_data = area_over_time.T.reset_index().melt(id_vars='index', var_name='lgd_code', value_name='Area')
     plot_data.rename(columns={'index': 'Year'}, inplace=True)
-    plot_data['District'] = plot_data['lgd_code'].map(family_df['district'])
+    plot_data['District'] = plot_data['lgd_code'].map(lgd_to_name)
 
     fig = px.area(plot_data, x='Year', y='Area', color='District',
                   title=f"Area Evolution of the '{progenitor_name}' Territory",
@@ -251,32 +301,51 @@ def trace_district_lineage(df: pd.DataFrame, G: nx.DiGraph) -> None:
         except (ValueError, KeyError) as e:
             print(f"An unexpected error occurred: {e}")
 
+def compute_statistics(df: pd.DataFrame, G: nx.DiGraph, top_parents: int = 5) -> dict:
+    total_districts = len(df)
+    split_counts = {node: G.out_degree(node) for node in G.nodes() if G.out_degree(node) > 0}
+    sorted_splits = sorted(split_counts.items(), key=lambda item: item[1], reverse=True)
+    return {
+        'total_districts': total_districts,
+        'original_districts': len(df[df['parent_lgd'].isna()]),
+        'current_districts_area': sum(data['area'] for node, data in G.nodes(data=True) if not G.out_degree(node)),
+        'largest_district': df.loc[df['area'].idxmax()],
+        'smallest_district': df.loc[df['area'].idxmin()],
+        'formations_by_year': df['year'].value_counts().sort_index(),
+        'most_prolific_parents': sorted_splits[:top_parents],
+    }
+
 def show_statistics(df: pd.DataFrame, G: nx.DiGraph) -> None:
+    stats = compute_statistics(df, G)
     print("\n" + "=" * 60 + "\n   Overall District Statistics\n" + "=" * 60)
-    total_districts = len(df);
-    original_districts = len(df[df['parent_lgd'].isna()])
+    total_districts = stats['total_districts'];
+    original_districts = stats['original_districts']
     print(f"Total Districts Recorded: {total_districts}")
     print(f"Original Districts (pre-2000): {original_districts}")
     print(f"New Districts Created Since 1998: {total_districts - original_districts}")
-    current_districts_area = sum(data['area'] for node, data in G.nodes(data=True) if not G.out_degree(node))
+    current_districts_area = stats['current_districts_area']
     print(f"\nCombined Area of Current Districts: {current_districts_area:,.2f} sq km")
-    largest = df.loc[df['area'].idxmax()];
-    smallest = df.loc[df['area'].idxmin()]
+    largest = stats['largest_district'];
+    smallest = stats['smallest_district']
     print(f"Largest District (at formation): {largest['district']} ({largest['area']:,} sq km)")
     print(f"Smallest District (at formation): {smallest['district']} ({smallest['area']:,} sq km)")
     print("\nDistrict Formations by Year:")
-    for year, count in df['year'].value_counts().sort_index().items():
+    for year, count in stats['formations_by_year'].items():
         print(f"  {year}: {count} new district(s)")
     print("\nMost Prolific Parent Districts:")
-    split_counts = {node: G.out_degree(node) for node in G.nodes() if G.out_degree(node) > 0}
-    sorted_splits = sorted(split_counts.items(), key=lambda item: item[1], reverse=True)
-    for lgd_code, count in sorted_splits[:5]:
+    for lgd_code, count in stats['most_prolific_parents']:
         print(f"  {G.nodes[lgd_code]['district']}: {count} child district(s)")
     print("=" * 60)
 
 def main() -> None:
-    district_df = load_district_data()
-    data_graph, visual_graph = create_district_graphs(district_df)
+    with span('load') as load_span:
+        district_df = load_district_data()
+        load_span.count('rows', len(district_df))
+    with span('build') as build_span:
+        data_graph = create_district_graph(district_df)
+        build_span.count('nodes', data_graph.number_of_nodes())
+        build_span.count('edges', data_graph.number_of_edges())
+    area_store = None
 
     while True:
         print("\n" + "=" * 55 + "\n   Chhattisgarh District Evolution Explorer\n" + "=" * 55)
@@ -294,9 +363,17 @@ def main() -> None:
 
         if choice == '1':
             print("\nGenerating interactive network graph...")
-            visualize_graph(visual_graph)
+            visualize_graph(data_graph)
         elif choice == '2':
-            visualize_area_evolution(district_df, data_graph)
+            # With LINEAGE_PANEL_ROOT set, area panels are materialized once into a
+            # Parquet store under it and only recomputed for years whose source
+            # rows changed; otherwise nothing is written and the chart is computed
+            # in memory.
+            panel_root = os.environ.get(PANEL_ROOT_ENV_VAR)
+            if area_store is None and panel_root and module_available('pyarrow'):
+                area_store = PanelStore(os.path.join(panel_root, AREA_PANEL_DIR))
+                materialize_area_evolution(district_df, area_store)
+            visualize_area_evolution(district_df, data_graph, area_store)
         elif choice == '3':
             print("\nGenerating district split heatmap...")
         elif choice == '4':
@@ -1,14 +1,16 @@
 
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 import networkx as nx
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from area_analysis import area_analysis_figure
+from clustering import cluster_districts
+from force_layout import graph_layout
+from lazy_imports import lazy_import
+from lineage_checks import check_acyclic, check_district_data
+
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
 
 
 def load_and_prepare_data():
@@ -51,8 +53,9 @@ def load_and_prepare_data():
     return pd.DataFrame(district_data)
 
 
-def create_3d_network_visualization():
+def create_3d_network_visualization(year_axis=False):
     df = load_and_prepare_data()
+    check_district_data(df)
 
     G = nx.DiGraph()
     for _, row in df.iterrows():
@@ -63,8 +66,9 @@ def create_3d_network_visualization():
             parents = row['parent_lgd'] if isinstance(row['parent_lgd'], list) else [row['parent_lgd']]
             for parent in parents:
                 G.add_edge(parent, row['lgd_code'])
+    check_acyclic(G)
 
-    pos = nx.spring_layout(G, k=3, iterations=50, dim=3)
+    pos = graph_layout(G, dim=3, iterations=50, seed=42, year_axis=year_axis)
 
     x_nodes = [pos[node][0] for node in G.nodes()]
     y_nodes = [pos[node][1] for node in G.nodes()]
@@ -127,7 +131,7 @@ def create_3d_network_visualization():
         scene=dict(
             xaxis_title="X",
             yaxis_title="Y",
-            zaxis_title="Z",
+            zaxis_title="Year of Formation" if year_axis else "Z",
             camera=dict(eye=dict(x=1.5, y=1.5, z=1.5))
         ),
         width=900,
@@ -163,75 +167,23 @@ def create_timeline_visualization():
     return fig
 
 
-def create_area_analysis():
-    df = load_and_prepare_data()
-
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=('Area Distribution by Year', 'Top 10 Largest Districts',
-                        'Area vs Year Scatter', 'District Area Histogram'),
-        specs=[[{"type": "box"}, {"type": "bar"}],
-               [{"type": "scatter"}, {"type": "histogram"}]]
-    )
-
-    for year in df['year'].unique():
-        year_data = df[df['year'] == year]
-        fig.add_trace(
-            go.Box(y=year_data['area'], name=str(year), showlegend=False),
-            row=1, col=1
-        )
-
-    top_10 = df.nlargest(10, 'area')
-    fig.add_trace(
-        go.Bar(x=top_10['district'], y=top_10['area'], showlegend=False),
-        row=1, col=2
-    )
-
-    colors = {'1998': 'red', '2007': 'orange', '2012': 'blue', '2020': 'green', '2022': 'purple'}
-    for year in df['year'].unique():
-        year_data = df[df['year'] == year]
-        fig.add_trace(
-            go.Scatter(x=year_data['year'], y=year_data['area'],
-                       mode='markers', name=str(year),
-                       marker=dict(color=colors[str(year)], size=8),
-                       text=year_data['district'], showlegend=False),
-            row=2, col=1
-        )
-
-    fig.add_trace(
-        go.Histogram(x=df['area'], nbinsx=15, showlegend=False),
-        row=2, col=2
-    )
-
-    fig.update_layout(height=800, title_text="District Area Analysis")
-    fig.update_xaxes(title_text="Year", row=1, col=1)
-    fig.update_xaxes(title_text="District", row=1, col=2)
-    fig.update_xaxes(title_text="Year", row=2, col=1)
-    fig.update_xaxes(title_text="Area (km²)", row=2, col=2)
-    fig.update_yaxes(title_text="Area (km²)", row=1, col=1)
-    fig.update_yaxes(title_text="Area (km²)", row=1, col=2)
-    fig.update_yaxes(title_text="Area (km²)", row=2, col=1)
-    fig.update_yaxes(title_text="Count", row=2, col=2)
-
-    return fig
-
-
-def perform_clustering():
-    df = load_and_prepare_data()
-
-    features = df[['year', 'area']].copy()
+def create_area_analysis(df=None):
+    if df is None:
+        df = load_and_prepare_data()
+    return area_analysis_figure(df)
 
-    scaler = StandardScaler()
-    features_scaled = scaler.fit_transform(features)
 
-    kmeans = KMeans(n_clusters=3, random_state=42)
-    clusters = kmeans.fit_predict(features_scaled)
+def perform_clustering(df=None, n_clusters=3):
+    if df is None:
+        df = load_and_prepare_data()
 
-    df['cluster'] = clusters
+    features = cluster_districts(df, n_clusters=n_clusters)
+    df = df.merge(features[['lgd_code', 'depth', 'out_degree', 'n_splits', 'remnant_area_fraction', 'cluster']],
+                  on='lgd_code')
 
     fig = px.scatter(df, x='year', y='area', color='cluster',
-                     hover_data=['district', 'lgd_code'],
-                     title="District Clustering (K-means)",
+                     hover_data=['district', 'lgd_code', 'depth', 'n_splits', 'remnant_area_fraction'],
+                     title="District Clustering (Mini-batch K-means on Lineage Features)",
                      labels={'cluster': 'Cluster'})
 
     fig.update_layout(width=800, height=600)
@@ -0,0 +1,191 @@
+import argparse
+import os
+import pickle
+import weakref
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from clustering import lineage_features
+from lazy_imports import lazy_import
+from lineage_arrays import build_lineage_arrays, dataset_version
+
+sklearn_neighbors = lazy_import('sklearn.neighbors')
+
+INDEX_FORMAT = 1
+SIGNATURE_COLUMNS = ('year', 'log_area', 'depth', 'n_parents', 'parent_area_fraction', 'co_formed_siblings',
+                     'siblings', 'n_splits', 'first_split_offset', 'last_split_offset', 'carved_area_fraction')
+LEAF_SIZE = 40
+INDEX_CACHE_SIZE = 4
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                 'district-lineage', 'similarity')
+
+_index_cache: 'OrderedDict[Tuple[Hashable, str], Tuple[Optional[weakref.ref], SimilarityIndex]]' = OrderedDict()
+
+
+def build_lineage_signatures(df: pd.DataFrame, version: Optional[str] = None) -> pd.DataFrame:
+    features = lineage_features(df, version)
+    arrays = build_lineage_arrays(df)
+    n = len(arrays.codes)
+    in_degree = np.diff(arrays.rev_indptr)
+    child_years = arrays.years[arrays.dst]
+
+    # How a district was formed: the share of its parents' area it took and how
+    # many other districts were carved from the same parent, in the same year or
+    # at any time. Originals have no parents and keep zeros throughout.
+    parent_area = np.bincount(arrays.dst, weights=arrays.areas[arrays.src], minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        parent_fraction = np.where(parent_area > 0, arrays.areas / parent_area, 0.0)
+    out_degree = np.diff(arrays.indptr)
+    _, event, same_event = np.unique(np.stack([arrays.src.astype(np.int64), child_years]), axis=1,
+                                     return_inverse=True, return_counts=True)
+    co_formed = np.zeros(n, dtype=np.int64)
+    siblings = np.zeros(n, dtype=np.int64)
+    np.maximum.at(co_formed, arrays.dst, same_event[event.reshape(-1)] - 1)
+    np.maximum.at(siblings, arrays.dst, out_degree[arrays.src] - 1)
+
+    # How it was later split: years from its own formation to its first and last
+    # split, or zero for districts that never split.
+    offsets = child_years - arrays.years[arrays.src]
+    first_split = np.full(n, np.iinfo(np.int64).max)
+    last_split = np.zeros(n, dtype=np.int64)
+    np.minimum.at(first_split, arrays.src, offsets)
+    np.maximum.at(last_split, arrays.src, offsets)
+    first_split[out_degree == 0] = 0
+
+    signatures = features[['lgd_code', 'district', 'year', 'depth', 'n_splits']].copy()
+    signatures['log_area'] = np.log1p(np.maximum(arrays.areas, 0.0))
+    signatures['n_parents'] = in_degree
+    signatures['parent_area_fraction'] = np.clip(parent_fraction, 0.0, 1.0)
+    signatures['co_formed_siblings'] = co_formed
+    signatures['siblings'] = siblings
+    signatures['first_split_offset'] = first_split
+    signatures['last_split_offset'] = last_split
+    signatures['carved_area_fraction'] = 1.0 - features['remnant_area_fraction'].to_numpy()
+    return signatures[['lgd_code', 'district'] + list(SIGNATURE_COLUMNS)]
+
+
+class SimilarityIndex:
+    def __init__(self, signatures: pd.DataFrame, version: str, metric: str = 'euclidean',
+                 leaf_size: int = LEAF_SIZE) -> None:
+        self.version = version
+        self.metric = metric
+        self.codes = signatures['lgd_code'].to_numpy(dtype=np.int64)
+        self.names = signatures['district'].to_numpy(dtype=object)
+        matrix = signatures[list(SIGNATURE_COLUMNS)].to_numpy(dtype=np.float64)
+        self.center = matrix.mean(axis=0) if len(matrix) else np.zeros(len(SIGNATURE_COLUMNS))
+        scale = matrix.std(axis=0) if len(matrix) else np.ones(len(SIGNATURE_COLUMNS))
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.vectors = (matrix - self.center) / self.scale
+        # KD-trees only support Minkowski-family metrics; anything else needs a ball tree.
+        tree_type = sklearn_neighbors.KDTree if metric in sklearn_neighbors.KDTree.valid_metrics \
+            else sklearn_neighbors.BallTree
+        self.tree = tree_type(self.vectors, leaf_size=leaf_size, metric=metric)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            pickle.dump({'format': INDEX_FORMAT, 'index': self}, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str) -> 'SimilarityIndex':
+        with open(path, 'rb') as handle:
+            payload = pickle.load(handle)
+        if payload.get('format') != INDEX_FORMAT:
+            raise ValueError(f"Similarity index '{path}' has format {payload.get('format')}, expected {INDEX_FORMAT}")
+        return payload['index']
+
+    def positions(self, codes: Iterable[int]) -> np.ndarray:
+        codes = np.asarray(list(codes), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.codes, codes), max(len(self.codes) - 1, 0))
+        missing = self.codes[positions] != codes if len(self.codes) else np.ones(len(codes), dtype=bool)
+        if missing.any():
+            raise KeyError(f"Unknown LGD code(s): {sorted(set(codes[missing].tolist()))}")
+        return positions
+
+    def query(self, codes: Iterable[int], k: int = 5) -> pd.DataFrame:
+        positions = self.positions(codes)
+        k = min(k, len(self.codes) - 1)
+        if k < 1 or not len(positions):
+            return pd.DataFrame(columns=['query_lgd', 'rank', 'lgd_code', 'district', 'distance'])
+        # Ask for one extra neighbour and drop the query itself; when several
+        # districts share its vector, the query may not come back first.
+        distance, neighbour = self.tree.query(self.vectors[positions], k=k + 1)
+        is_self = neighbour == positions[:, None]
+        is_self[~is_self.any(axis=1), -1] = True
+        neighbour = neighbour[~is_self].reshape(len(positions), k)
+        distance = distance[~is_self].reshape(len(positions), k)
+        return pd.DataFrame({
+            'query_lgd': np.repeat(self.codes[positions], k),
+            'rank': np.tile(np.arange(1, k + 1), len(positions)),
+            'lgd_code': self.codes[neighbour.reshape(-1)],
+            'district': self.names[neighbour.reshape(-1)],
+            'distance': distance.reshape(-1),
+        })
+
+
+def index_path(cache_dir: str, version: str, metric: str = 'euclidean') -> str:
+    return os.path.join(cache_dir, f"similarity-{version}-{metric}.pkl")
+
+
+def similarity_index(df: pd.DataFrame, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, metric: str = 'euclidean',
+                     version: Optional[str] = None) -> SimilarityIndex:
+    # In memory the index is keyed on the caller's version or the frame's identity,
+    # so a lookup never hashes the table. On disk it is stored under the dataset
+    # version in the user cache, so a fresh process loads it and only a new
+    # release rebuilds it; cache_dir=None keeps it in memory only.
+    key = (version if version is not None else ('frame', id(df)), metric)
+    entry = _index_cache.get(key)
+    if entry is not None and (entry[0] is None or entry[0]() is df):
+        _index_cache.move_to_end(key)
+        return entry[1]
+    snapshot = version if version is not None else dataset_version(df)
+    path = index_path(cache_dir, snapshot, metric) if cache_dir is not None else None
+    if path is not None and os.path.exists(path):
+        index = SimilarityIndex.load(path)
+    else:
+        index = SimilarityIndex(build_lineage_signatures(df, version), snapshot, metric=metric)
+        if path is not None:
+            index.save(path)
+    _index_cache[key] = (None if version is not None else weakref.ref(df), index)
+    _index_cache.move_to_end(key)
+    if len(_index_cache) > INDEX_CACHE_SIZE:
+        _index_cache.popitem(last=False)
+    return index
+
+
+def find_similar_districts(df: pd.DataFrame, codes: Iterable[int], k: int = 5,
+                           cache_dir: Optional[str] = DEFAULT_CACHE_DIR, version: Optional[str] = None) -> pd.DataFrame:
+    return similarity_index(df, cache_dir, version=version).query(codes, k)
+
+
+def main() -> None:
+    from py1 import load_district_data
+
+    parser = argparse.ArgumentParser(description="Find districts with similar formation histories.")
+    parser.add_argument('districts', nargs='+', help="district names or LGD codes")
+    parser.add_argument('-k', type=int, default=5, help="neighbours per district")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"directory the index is persisted to (default: {DEFAULT_CACHE_DIR})")
+    args = parser.parse_args()
+
+    df = load_district_data()
+    arrays = build_lineage_arrays(df)
+    by_name = {str(name).lower(): int(code) for name, code in zip(arrays.names, arrays.codes)}
+    codes = []
+    for district in args.districts:
+        if district.isdigit():
+            codes.append(int(district))
+        elif district.lower() in by_name:
+            codes.append(by_name[district.lower()])
+        else:
+            parser.error(f"District '{district}' not found in the dataset")
+    print(find_similar_districts(df, codes, args.k, args.cache_dir).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from lineage_arrays import dataset_version, explode_parents
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS districts (
+    lgd_code INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    district TEXT NOT NULL,
+    district_norm TEXT NOT NULL,
+    area REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edges (
+    parent_lgd INTEGER NOT NULL REFERENCES districts (lgd_code),
+    child_lgd INTEGER NOT NULL REFERENCES districts (lgd_code),
+    PRIMARY KEY (parent_lgd, child_lgd)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_edges_child ON edges (child_lgd, parent_lgd);
+CREATE INDEX IF NOT EXISTS idx_districts_year ON districts (year);
+CREATE INDEX IF NOT EXISTS idx_districts_norm ON districts (district_norm);
+"""
+
+LOOKUP_SQL = "SELECT lgd_code, year, district, area FROM districts WHERE district_norm = ?"
+
+DISTRICT_SQL = "SELECT lgd_code, year, district, area FROM districts WHERE lgd_code = ?"
+
+ANCESTORS_SQL = """
+WITH RECURSIVE up (lgd_code, depth) AS (
+    SELECT parent_lgd, 1 FROM edges WHERE child_lgd = :code
+    UNION
+    SELECT e.parent_lgd, up.depth + 1 FROM edges e JOIN up ON e.child_lgd = up.lgd_code
+)
+SELECT d.lgd_code, d.year, d.district, d.area, MIN(up.depth) AS depth
+FROM up JOIN districts d ON d.lgd_code = up.lgd_code
+GROUP BY d.lgd_code
+ORDER BY d.year, d.lgd_code
+"""
+
+DESCENDANTS_SQL = """
+WITH RECURSIVE down (lgd_code, depth) AS (
+    SELECT child_lgd, 1 FROM edges WHERE parent_lgd = :code
+    UNION
+    SELECT e.child_lgd, down.depth + 1 FROM edges e JOIN down ON e.parent_lgd = down.lgd_code
+)
+SELECT d.lgd_code, d.year, d.district, d.area, MIN(down.depth) AS depth
+FROM down JOIN districts d ON d.lgd_code = down.lgd_code
+GROUP BY d.lgd_code
+ORDER BY d.year, d.lgd_code
+"""
+
+PARENTS_SQL = """
+SELECT d.lgd_code, d.year, d.district, d.area
+FROM edges e JOIN districts d ON d.lgd_code = e.parent_lgd
+WHERE e.child_lgd = ?
+ORDER BY d.year, d.lgd_code
+"""
+
+CHILDREN_SQL = """
+SELECT d.lgd_code, d.year, d.district, d.area
+FROM edges e JOIN districts d ON d.lgd_code = e.child_lgd
+WHERE e.parent_lgd = ?
+ORDER BY d.year, d.lgd_code
+"""
+
+TOTALS_SQL = """
+SELECT
+    COUNT(*) AS total_districts,
+    SUM(NOT EXISTS (SELECT 1 FROM edges e WHERE e.child_lgd = d.lgd_code)) AS original_districts,
+    SUM(CASE WHEN NOT EXISTS (SELECT 1 FROM edges e WHERE e.parent_lgd = d.lgd_code) THEN d.area ELSE 0 END)
+        AS current_districts_area
+FROM districts d
+"""
+
+LARGEST_SQL = "SELECT lgd_code, year, district, area FROM districts ORDER BY area DESC, lgd_code LIMIT 1"
+
+SMALLEST_SQL = "SELECT lgd_code, year, district, area FROM districts ORDER BY area ASC, lgd_code LIMIT 1"
+
+FORMATIONS_BY_YEAR_SQL = "SELECT year, COUNT(*) AS count FROM districts GROUP BY year ORDER BY year"
+
+PROLIFIC_PARENTS_SQL = """
+SELECT d.lgd_code, d.district, COUNT(*) AS child_count
+FROM edges e JOIN districts d ON d.lgd_code = e.parent_lgd
+GROUP BY d.lgd_code
+ORDER BY child_count DESC, d.lgd_code
+LIMIT :limit
+"""
+
+ORIGINAL_DISTRICTS_SQL = """
+SELECT lgd_code, year, district, area FROM districts d
+WHERE NOT EXISTS (SELECT 1 FROM edges e WHERE e.child_lgd = d.lgd_code)
+ORDER BY district
+"""
+
+AREA_EVOLUTION_SQL = """
+WITH RECURSIVE family (lgd_code) AS (
+    SELECT :code
+    UNION
+    SELECT e.child_lgd FROM edges e JOIN family f ON e.parent_lgd = f.lgd_code
+),
+years (year) AS (SELECT DISTINCT year FROM districts)
+SELECT y.year, d.lgd_code, d.district,
+    CASE WHEN y.year >= d.year THEN d.area - COALESCE((
+        SELECT SUM(c.area) FROM edges e JOIN districts c ON c.lgd_code = e.child_lgd
+        WHERE e.parent_lgd = d.lgd_code AND c.year <= y.year
+    ), 0) ELSE 0 END AS area
+FROM family f JOIN districts d ON d.lgd_code = f.lgd_code CROSS JOIN years y
+ORDER BY y.year, d.lgd_code
+"""
+
+
+def normalize_name(name: str) -> str:
+    return ' '.join(name.lower().split())
+
+
+class SQLiteLineageStore:
+    def __init__(self, path: str = ':memory:') -> None:
+        self.conn = sqlite3.connect(path, cached_statements=256)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA_SQL)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'SQLiteLineageStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def load_dataframe(self, df: pd.DataFrame, batch_size: int = 50_000) -> None:
+        parent_codes, child_codes = explode_parents(df)
+        district_rows = zip(df['lgd_code'].astype('int64').tolist(), df['year'].astype('int64').tolist(),
+                            df['district'].tolist(), df['district'].map(normalize_name).tolist(),
+                            df['area'].astype('float64').tolist())
+        edge_rows = list(zip(parent_codes.tolist(), child_codes.tolist()))
+        with self.conn:
+            self.conn.execute("DELETE FROM edges")
+            self.conn.execute("DELETE FROM districts")
+            batch = []
+            for row in district_rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    self.conn.executemany("INSERT INTO districts VALUES (?, ?, ?, ?, ?)", batch)
+                    batch = []
+            self.conn.executemany("INSERT INTO districts VALUES (?, ?, ?, ?, ?)", batch)
+            for start in range(0, len(edge_rows), batch_size):
+                self.conn.executemany("INSERT INTO edges VALUES (?, ?)", edge_rows[start:start + batch_size])
+            self.conn.execute("INSERT OR REPLACE INTO metadata VALUES ('dataset_version', ?)", (dataset_version(df),))
+        self.conn.execute("ANALYZE")
+
+    @property
+    def version(self) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM metadata WHERE key = 'dataset_version'").fetchone()
+        return row['value'] if row else None
+
+    def _rows(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(LOOKUP_SQL, (normalize_name(name),)).fetchone()
+        return dict(row) if row else None
+
+    def district(self, lgd_code: int) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(DISTRICT_SQL, (lgd_code,)).fetchone()
+        return dict(row) if row else None
+
+    def ancestors(self, lgd_code: int) -> List[Dict[str, Any]]:
+        return self._rows(ANCESTORS_SQL, {'code': lgd_code})
+
+    def descendants(self, lgd_code: int) -> List[Dict[str, Any]]:
+        return self._rows(DESCENDANTS_SQL, {'code': lgd_code})
+
+    def parents(self, lgd_code: int) -> List[Dict[str, Any]]:
+        return self._rows(PARENTS_SQL, (lgd_code,))
+
+    def children(self, lgd_code: int) -> List[Dict[str, Any]]:
+        return self._rows(CHILDREN_SQL, (lgd_code,))
+
+    def lineage(self, lgd_code: int) -> Dict[str, Any]:
+        return {'district': self.district(lgd_code), 'ancestors': self.ancestors(lgd_code),
+                'descendants': self.descendants(lgd_code), 'parents': self.parents(lgd_code),
+                'children': self.children(lgd_code)}
+
+    def original_districts(self) -> List[Dict[str, Any]]:
+        return self._rows(ORIGINAL_DISTRICTS_SQL)
+
+    def statistics(self, top_parents: int = 5) -> Dict[str, Any]:
+        stats = dict(self.conn.execute(TOTALS_SQL).fetchone())
+        stats['largest_district'] = dict(self.conn.execute(LARGEST_SQL).fetchone())
+        stats['smallest_district'] = dict(self.conn.execute(SMALLEST_SQL).fetchone())
+        stats['formations_by_year'] = {row['year']: row['count'] for row in self.conn.execute(FORMATIONS_BY_YEAR_SQL)}
+        stats['most_prolific_parents'] = self._rows(PROLIFIC_PARENTS_SQL, {'limit': top_parents})
+        return stats
+
+    def area_evolution(self, progenitor_code: int) -> List[Dict[str, Any]]:
+        return self._rows(AREA_EVOLUTION_SQL, {'code': progenitor_code})
+
+
+def main() -> None:
+    from py1 import load_district_data
+
+    with SQLiteLineageStore('districts.sqlite') as store:
+        store.load_dataframe(load_district_data())
+        district = store.lookup('Sarangarh-Bilaigarh')
+        print(f"Loaded dataset version {store.version} into 'districts.sqlite'")
+        print(f"Ancestors of {district['district']}: {[row['district'] for row in store.ancestors(district['lgd_code'])]}")
+
+
+if __name__ == '__main__':
+    main()
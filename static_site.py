@@ -0,0 +1,243 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lineage_arrays import LineageArrays, build_lineage_arrays, gather_neighbors, hashes_version, row_hashes
+
+SHARD_FORMAT = 1
+SHARD_DIR = 'shards'
+INDEX_FILE = 'index.json'
+MANIFEST_FILE = 'manifest.json'
+VIEWER_FILE = 'index.html'
+SHARD_HASH_CHARS = 16
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>District Lineage</title>
+<style>body{font-family:sans-serif;margin:2em;max-width:60em}td,th{padding:2px 10px;text-align:left}</style>
+</head><body>
+<h1>District Lineage</h1>
+<input id="q" list="names" placeholder="District name" size="40"><datalist id="names"></datalist>
+<div id="out"></div>
+<script>
+// Every value from the data is set through textContent or value, never
+// through markup, so district names cannot break or inject into the page.
+let index = null;
+const el = (tag, text) => { const node = document.createElement(tag); if (text !== undefined) node.textContent = text; return node; };
+const row = (...cells) => { const tr = el('tr'); tr.append(...cells); return tr; };
+const table = (title, items) => {
+  if (!items.length) return [];
+  const t = el('table');
+  t.append(row(el('th', 'District'), el('th', 'Year'), el('th', 'LGD')),
+           ...items.map(d => row(el('td', d[1]), el('td', d[2]), el('td', d[0]))));
+  return [el('h3', title), t];
+};
+fetch('index.json').then(r => r.json()).then(data => {
+  index = data;
+  document.getElementById('names').replaceChildren(...data.districts.map(d => {
+    const option = el('option');
+    option.value = d[1];
+    return option;
+  }));
+});
+document.getElementById('q').addEventListener('change', async event => {
+  const entry = index.districts.find(d => d[1].toLowerCase() === event.target.value.toLowerCase());
+  if (!entry) return;
+  const shard = await (await fetch(`shards/${encodeURIComponent(entry[3])}.json`)).json();
+  const series = el('table');
+  series.append(...index.years.flatMap((y, i) => shard.remnant_area[i] === null ? [] :
+    [row(el('td', y), el('td', shard.remnant_area[i].toLocaleString()))]));
+  document.getElementById('out').replaceChildren(
+    el('h2', `${shard.district} (${shard.year}, ${shard.area.toLocaleString()} sq km)`),
+    ...table('Parents', shard.parents), ...table('Children', shard.children),
+    ...table('Ancestors', shard.ancestors), ...table('Descendants', shard.descendants),
+    el('h3', 'Remaining area'), series);
+});
+</script></body></html>
+"""
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _reachable(indptr: np.ndarray, indices: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    visited = np.zeros(0, dtype=np.int64)
+    frontier = np.unique(np.asarray(starts, dtype=np.int64))
+    while len(frontier):
+        neighbors, _ = gather_neighbors(indptr, indices, frontier)
+        frontier = np.setdiff1d(neighbors.astype(np.int64), visited)
+        visited = np.union1d(visited, frontier)
+    return visited
+
+
+def district_shard(arrays: LineageArrays, years: np.ndarray, idx: int) -> Dict[str, Any]:
+    def listing(nodes: np.ndarray) -> List[List[Any]]:
+        nodes = nodes[np.lexsort((arrays.codes[nodes], arrays.years[nodes]))]
+        return [[code, name, year] for code, name, year in
+                zip(arrays.codes[nodes].tolist(), arrays.names[nodes].tolist(), arrays.years[nodes].tolist())]
+
+    children = arrays.indices[arrays.indptr[idx]:arrays.indptr[idx + 1]].astype(np.int64)
+    parents = arrays.rev_indices[arrays.rev_indptr[idx]:arrays.rev_indptr[idx + 1]].astype(np.int64)
+
+    # Same remnant rule as py1.compute_area_evolution: a district keeps its area
+    # minus every child formed up to that year.
+    child_years = np.sort(arrays.years[children])
+    carved = np.concatenate(([0.0], np.cumsum(arrays.areas[children][np.argsort(arrays.years[children], kind='stable')])))
+    remaining = float(arrays.areas[idx]) - carved[np.searchsorted(child_years, years, side='right')]
+    remnant_area = [round(value, 2) if year >= arrays.years[idx] else None
+                    for year, value in zip(years.tolist(), remaining.tolist())]
+
+    return {
+        'lgd_code': int(arrays.codes[idx]), 'district': arrays.names[idx], 'year': int(arrays.years[idx]),
+        'area': float(arrays.areas[idx]),
+        'parents': listing(parents), 'children': listing(children),
+        'ancestors': listing(_reachable(arrays.rev_indptr, arrays.rev_indices, [idx])),
+        'descendants': listing(_reachable(arrays.indptr, arrays.indices, [idx])),
+        'remnant_area': remnant_area,
+    }
+
+
+def _write_shard(shard_dir: str, payload: Dict[str, Any]) -> str:
+    body = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+    digest = hashlib.sha256(body).hexdigest()[:SHARD_HASH_CHARS]
+    path = os.path.join(shard_dir, f"{digest}.json")
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            handle.write(body)
+        os.replace(tmp_path, path)
+    return digest
+
+
+def _init_worker(arrays: LineageArrays, years: np.ndarray, shard_dir: str) -> None:
+    _worker_state.update(arrays=arrays, years=years, shard_dir=shard_dir)
+
+
+def _build_chunk(nodes: np.ndarray) -> List[Tuple[int, str]]:
+    arrays, years, shard_dir = _worker_state['arrays'], _worker_state['years'], _worker_state['shard_dir']
+    return [(int(arrays.codes[idx]), _write_shard(shard_dir, district_shard(arrays, years, idx)))
+            for idx in nodes.tolist()]
+
+
+def load_manifest(output_dir: str) -> Dict[str, Any]:
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _affected_nodes(arrays: LineageArrays, years: np.ndarray, manifest: Dict[str, Any],
+                    hashes: np.ndarray) -> np.ndarray:
+    entries = manifest.get('districts', {})
+    if manifest.get('format') != SHARD_FORMAT or manifest.get('years') != years.tolist() or not entries:
+        return np.arange(len(arrays.codes))
+
+    old_codes = np.array(sorted(int(code) for code in entries), dtype=np.int64)
+    old_hashes = np.array([int(entries[str(code)]['row'], 16) for code in old_codes.tolist()], dtype=np.uint64)
+    pos = np.minimum(np.searchsorted(old_codes, arrays.codes), len(old_codes) - 1)
+    known = old_codes[pos] == arrays.codes
+    changed = ~known | (old_hashes[pos] != hashes)
+    removed = old_codes[~np.isin(old_codes, arrays.codes)]
+    changed_codes = np.union1d(arrays.codes[changed], removed)
+
+    # A changed district appears in the shards of everything above and below it,
+    # both in the new lineage and in the one the previous build was made from.
+    old_arrays = build_lineage_arrays(pd.DataFrame({
+        'lgd_code': old_codes, 'year': 0, 'district': '', 'area': 0.0,
+        'parent_lgd': [entries[str(code)]['parents'] for code in old_codes.tolist()],
+    }))
+    old_seeds = np.flatnonzero(np.isin(old_arrays.codes, changed_codes))
+    old_related = np.concatenate([old_arrays.codes[old_seeds],
+                                  old_arrays.codes[_reachable(old_arrays.indptr, old_arrays.indices, old_seeds)],
+                                  old_arrays.codes[_reachable(old_arrays.rev_indptr, old_arrays.rev_indices, old_seeds)]])
+    seeds = np.flatnonzero(changed)
+    affected = np.zeros(len(arrays.codes), dtype=bool)
+    affected[seeds] = True
+    affected[_reachable(arrays.indptr, arrays.indices, seeds)] = True
+    affected[_reachable(arrays.rev_indptr, arrays.rev_indices, seeds)] = True
+    affected |= np.isin(arrays.codes, old_related)
+    return np.flatnonzero(affected)
+
+
+def export_static_site(df: pd.DataFrame, output_dir: str, max_workers: Optional[int] = None, force: bool = False,
+                       chunk_size: int = 256) -> Dict[str, int]:
+    arrays = build_lineage_arrays(df)
+    years = np.unique(arrays.years)
+    order = np.argsort(df['lgd_code'].to_numpy(dtype=np.int64), kind='stable')
+    hashes = row_hashes(df)[order]
+    shard_dir = os.path.join(output_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    manifest = {} if force else load_manifest(output_dir)
+    previous = manifest.get('districts', {})
+    nodes = _affected_nodes(arrays, years, manifest, hashes)
+    rebuild = np.zeros(len(arrays.codes), dtype=bool)
+    rebuild[nodes] = True
+    for idx in np.flatnonzero(~rebuild).tolist():
+        shard = previous[str(int(arrays.codes[idx]))]['shard']
+        rebuild[idx] = not os.path.exists(os.path.join(shard_dir, f"{shard}.json"))
+    nodes = np.flatnonzero(rebuild)
+
+    shards = {int(arrays.codes[idx]): previous[str(int(arrays.codes[idx]))]['shard']
+              for idx in np.flatnonzero(~rebuild).tolist()}
+    chunks = [nodes[start:start + chunk_size] for start in range(0, len(nodes), chunk_size)]
+    if len(chunks) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(arrays, years, shard_dir)) as executor:
+            for built in executor.map(_build_chunk, chunks):
+                shards.update(built)
+    else:
+        _init_worker(arrays, years, shard_dir)
+        for chunk in chunks:
+            shards.update(_build_chunk(chunk))
+
+    parents = [[] for _ in range(len(arrays.codes))]
+    for child, parent in zip(arrays.dst.tolist(), arrays.codes[arrays.src].tolist()):
+        parents[child].append(parent)
+    by_name = np.lexsort((arrays.codes, arrays.names.astype(str)))
+    index = {
+        'version': hashes_version(hashes), 'years': years.tolist(),
+        'districts': [[int(arrays.codes[idx]), arrays.names[idx], int(arrays.years[idx]),
+                       shards[int(arrays.codes[idx])]] for idx in by_name.tolist()],
+    }
+    new_manifest = {
+        'format': SHARD_FORMAT, 'version': index['version'], 'years': index['years'],
+        'districts': {str(code): {'row': format(int(row_hash), '016x'), 'shard': shards[code], 'parents': parents[idx]}
+                      for idx, (code, row_hash) in enumerate(zip(arrays.codes.tolist(), hashes.tolist()))},
+    }
+    with open(os.path.join(output_dir, INDEX_FILE), 'w') as handle:
+        json.dump(index, handle, separators=(',', ':'))
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as handle:
+        json.dump(new_manifest, handle, separators=(',', ':'))
+    with open(os.path.join(output_dir, VIEWER_FILE), 'w') as handle:
+        handle.write(VIEWER_HTML)
+
+    referenced = {f"{shard}.json" for shard in shards.values()}
+    stale = [name for name in os.listdir(shard_dir) if name not in referenced]
+    for name in stale:
+        os.remove(os.path.join(shard_dir, name))
+    return {'districts': len(arrays.codes), 'rebuilt': len(nodes), 'reused': len(arrays.codes) - len(nodes),
+            'removed': len(stale)}
+
+
+def main() -> None:
+    from py1 import load_district_data
+
+    parser = argparse.ArgumentParser(description="Export a static, shard-per-district lineage site.")
+    parser.add_argument('output_dir', nargs='?', default='lineage_site')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="rebuild every shard")
+    args = parser.parse_args()
+
+    stats = export_static_site(load_district_data(), args.output_dir, max_workers=args.workers, force=args.force)
+    print(f"Static site written to '{args.output_dir}': {stats['rebuilt']} shard(s) rebuilt, "
+          f"{stats['reused']} reused, {stats['removed']} removed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+from typing import Iterable, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from lineage_arrays import LineageArrays, code_index, gather_neighbors
+
+DIRECTIONS = ('descendants', 'ancestors', 'lineage', 'undirected')
+
+
+def _expand(seeds: np.ndarray, steps: Tuple[Tuple[np.ndarray, np.ndarray], ...], hops: Optional[int]) -> np.ndarray:
+    # Breadth-first over sorted index arrays rather than an n-sized visited mask,
+    # so a query touches only the nodes and edges it actually reaches.
+    visited = seeds
+    frontier = seeds
+    hop = 0
+    while len(frontier) and (hops is None or hop < hops):
+        reached = [gather_neighbors(indptr, indices, frontier)[0] for indptr, indices in steps]
+        candidates = np.unique(np.concatenate(reached).astype(np.int64))
+        frontier = np.setdiff1d(candidates, visited, assume_unique=True)
+        visited = np.union1d(visited, frontier)
+        hop += 1
+    return visited
+
+
+def neighbourhood(arrays: LineageArrays, codes: Iterable[int], hops: Optional[int] = None,
+                  direction: str = 'descendants', years: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction '{direction}', expected one of {DIRECTIONS}")
+    if hops is not None and hops < 0:
+        raise ValueError(f"hops must be non-negative, got {hops}")
+    seeds = np.unique(code_index(arrays, list(codes)))
+    down = (arrays.indptr, arrays.indices)
+    up = (arrays.rev_indptr, arrays.rev_indices)
+    if direction == 'descendants':
+        nodes = _expand(seeds, (down,), hops)
+    elif direction == 'ancestors':
+        nodes = _expand(seeds, (up,), hops)
+    elif direction == 'undirected':
+        nodes = _expand(seeds, (down, up), hops)
+    else:
+        # A lineage is ancestors plus descendants, without the siblings and cousins
+        # an undirected walk would pick up through shared parents.
+        nodes = np.union1d(_expand(seeds, (down,), hops), _expand(seeds, (up,), hops))
+    if years is None:
+        return nodes
+    # The year window filters what the walk reached rather than bounding the walk,
+    # so a district inside the window is kept even when it is only reachable
+    # through one formed outside it. The seeds are always kept.
+    formed = arrays.years[nodes]
+    return np.union1d(nodes[(formed >= years[0]) & (formed <= years[1])], seeds)
+
+
+def induced_subgraph(arrays: LineageArrays, nodes: np.ndarray) -> LineageArrays:
+    # nodes are sorted indices, so the compact graph keeps codes sorted and every
+    # LineageArrays consumer (code_index, LCA, levels, shards) works on it as is.
+    nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+    targets, sources = gather_neighbors(arrays.indptr, arrays.indices, nodes)
+    local_dst = np.searchsorted(nodes, targets)
+    inside = local_dst < len(nodes)
+    inside[inside] = nodes[local_dst[inside]] == targets[inside]
+    src = np.searchsorted(nodes, sources[inside]).astype(np.int32)
+    dst = local_dst[inside].astype(np.int32)
+
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+    rev_order = np.argsort(dst, kind='stable')
+    rev_indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(dst, minlength=len(nodes)), out=rev_indptr[1:])
+    return LineageArrays(codes=arrays.codes[nodes], years=arrays.years[nodes], areas=arrays.areas[nodes],
+                         names=arrays.names[nodes], src=src, dst=dst, indptr=indptr, indices=dst,
+                         rev_indptr=rev_indptr, rev_indices=src[rev_order])
+
+
+def extract_subgraph(arrays: LineageArrays, codes: Iterable[int], hops: Optional[int] = None,
+                     direction: str = 'descendants', years: Optional[Tuple[int, int]] = None) -> LineageArrays:
+    return induced_subgraph(arrays, neighbourhood(arrays, codes, hops, direction, years))
+
+
+def subgraph_frame(arrays: LineageArrays, sub: LineageArrays) -> pd.DataFrame:
+    # parent_lgd keeps every parent from the full dataset, including ones cut off
+    # by the extraction, so only true originals read as having no parent. Frames
+    # with cut-off parents fail check_district_data; graph builders and layouts
+    # should take to_networkx(sub) instead.
+    rows = code_index(arrays, sub.codes)
+    parents = [arrays.codes[arrays.rev_indices[start:end]].tolist() for start, end in
+               zip(arrays.rev_indptr[rows].tolist(), arrays.rev_indptr[rows + 1].tolist())]
+    return pd.DataFrame({
+        'lgd_code': sub.codes, 'year': sub.years, 'district': sub.names, 'area': sub.areas,
+        'parent_lgd': [None if not p else p[0] if len(p) == 1 else p for p in parents],
+    })
+
+
+def to_networkx(sub: LineageArrays) -> nx.DiGraph:
+    G = nx.DiGraph()
+    G.add_nodes_from((code, {'year': year, 'district': name, 'area': area}) for code, year, name, area in
+                     zip(sub.codes.tolist(), sub.years.tolist(), sub.names.tolist(), sub.areas.tolist()))
+    G.add_edges_from(zip(sub.codes[sub.src].tolist(), sub.codes[sub.dst].tolist()))
+    return G
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+
+def generate_synthetic_lineage(n_units: int, seed: int = 42, root_fraction: float = 0.05,
+                               multi_parent_rate: float = 0.02, start_year: int = 1951,
+                               end_year: int = 2024) -> pd.DataFrame:
+    if n_units < 1:
+        raise ValueError("n_units must be at least 1")
+    rng = np.random.default_rng(seed)
+    n_roots = max(1, int(round(n_units * root_fraction)))
+    n_children = n_units - n_roots
+    position = np.arange(n_units)
+
+    # Units are created in order; each child splits from a uniformly chosen earlier
+    # unit, which gives random-recursive-tree depths of O(log n) across many levels.
+    parent = np.full(n_units, -1, dtype=np.int64)
+    parent[n_roots:] = (rng.random(n_children) * position[n_roots:]).astype(np.int64)
+    second_parent = np.full(n_units, -1, dtype=np.int64)
+    multi = np.zeros(n_units, dtype=bool)
+    multi[n_roots:] = rng.random(n_children) < multi_parent_rate
+    multi &= position > 1
+    candidates = (rng.random(n_units) * position).astype(np.int64)
+    candidates = np.where(candidates == parent, (candidates + 1) % np.maximum(position, 1), candidates)
+    second_parent[multi] = candidates[multi]
+    multi &= second_parent != parent
+    second_parent[~multi] = -1
+
+    years = np.full(n_units, start_year, dtype=np.int64)
+    years[n_roots:] = np.sort(rng.integers(start_year + 1, end_year + 1, size=n_children))
+
+    log_area = np.empty(n_units)
+    log_area[:n_roots] = rng.normal(np.log(8000), 0.4, size=n_roots)
+    carve_fraction = rng.uniform(0.08, 0.45, size=n_units)
+    resolved = np.zeros(n_units, dtype=bool)
+    resolved[:n_roots] = True
+    pending = position[n_roots:]
+    while len(pending):
+        ready = pending[resolved[parent[pending]] & resolved[np.maximum(second_parent[pending], 0)]]
+        base = log_area[parent[ready]]
+        base = np.where(multi[ready], np.minimum(base, log_area[np.maximum(second_parent[ready], 0)]), base)
+        log_area[ready] = base + np.log(carve_fraction[ready])
+        resolved[ready] = True
+        pending = pending[~resolved[pending]]
+    areas = np.round(np.exp(log_area), 2)
+
+    codes = 1000 + rng.permutation(n_units)
+    parent_codes = np.where(parent >= 0, codes[np.maximum(parent, 0)], -1)
+    second_codes = np.where(second_parent >= 0, codes[np.maximum(second_parent, 0)], -1)
+    parent_lgd = np.empty(n_units, dtype=object)
+    parent_lgd[:] = None
+    single = (parent >= 0) & ~multi
+    parent_lgd[single] = parent_codes[single].tolist()
+    for i, first, second in zip(np.flatnonzero(multi).tolist(), parent_codes[multi].tolist(),
+                                second_codes[multi].tolist()):
+        parent_lgd[i] = [first, second]
+
+    return pd.DataFrame({
+        'lgd_code': codes,
+        'year': years,
+        'district': [f"Unit-{code}" for code in codes.tolist()],
+        'area': areas,
+        'parent_lgd': parent_lgd,
+    })
+
+
+def generate_synthetic_geometries(lgd_codes, seed: int = 42, vertices: int = 64):
+    from geometry import build_geometries
+
+    # One wobbly ring per unit, centred on its own cell of a square grid so that
+    # neighbouring boundaries never overlap.
+    rng = np.random.default_rng(seed)
+    codes = np.asarray(lgd_codes, dtype=np.int64)
+    side = int(np.ceil(np.sqrt(len(codes))))
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    radii = rng.uniform(0.3, 0.5, size=(len(codes), vertices))
+    cx = np.arange(len(codes)) % side + 0.5
+    cy = np.arange(len(codes)) // side + 0.5
+    xs = cx[:, None] + radii * np.cos(angles)
+    ys = cy[:, None] + radii * np.sin(angles)
+    return build_geometries((code, None, None, [[np.column_stack([x, y])]])
+                            for code, x, y in zip(codes.tolist(), xs, ys))
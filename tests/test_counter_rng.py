@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from counter_rng import counter_normal, counter_uniforms, philox4x32
+
+# Known-answer vectors for Philox4x32-10 from the Random123 distribution (kat_vectors).
+PHILOX_KATS = [
+    ((0x00000000, 0x00000000, 0x00000000, 0x00000000), (0x00000000, 0x00000000),
+     (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8)),
+    ((0xffffffff, 0xffffffff, 0xffffffff, 0xffffffff), (0xffffffff, 0xffffffff),
+     (0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd)),
+    ((0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344), (0xa4093822, 0x299f31d0),
+     (0xd16cfe09, 0x94fdcceb, 0x5001e420, 0x24126ea1)),
+]
+
+
+@pytest.mark.parametrize('counter, key, expected', PHILOX_KATS)
+def test_philox4x32_known_answers(counter, key, expected):
+    np.testing.assert_array_equal(philox4x32(np.array(counter), np.array(key)), np.array(expected, dtype=np.uint32))
+
+
+def test_philox4x32_vectorizes_over_blocks():
+    counters = np.array([kat[0] for kat in PHILOX_KATS], dtype=np.uint32)
+    keys = np.array([kat[1] for kat in PHILOX_KATS], dtype=np.uint32)
+    np.testing.assert_array_equal(philox4x32(counters, keys),
+                                  np.array([kat[2] for kat in PHILOX_KATS], dtype=np.uint32))
+
+
+def test_counter_draws_do_not_depend_on_generation_order():
+    codes = np.array([470, 472, 727, 733])
+    years = np.array([1998, 2007, 2020, 2022])
+    together = counter_normal(42, codes[:, None], years[None, :])
+    for i, code in enumerate(codes):
+        for j, year in enumerate(years):
+            assert counter_normal(42, code, year) == together[i, j]
+    uniforms = counter_uniforms(42, codes[:, None], years[None, :])
+    assert ((uniforms >= 0) & (uniforms < 1)).all()
+    assert not np.array_equal(counter_normal(43, codes, years), counter_normal(42, codes, years))
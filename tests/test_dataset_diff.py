@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from dataset_diff import change_counts, changed_codes, diff_datasets
+from lineage_arrays import dataset_version, row_hashes
+from synthetic_lineage import generate_synthetic_lineage
+
+
+def _releases():
+    old = generate_synthetic_lineage(3000, seed=11)
+    new = old.copy()
+    codes = new['lgd_code'].to_numpy()
+    with_parent = np.flatnonzero(new['parent_lgd'].notna().to_numpy())
+    renamed, revised, moved, reparented, dropped = (codes[with_parent[i::10][:5]] for i in range(5))
+    at = new.set_index('lgd_code')
+    at.loc[renamed, 'district'] = [f"{name} New" for name in at.loc[renamed, 'district']]
+    at.loc[revised, 'area'] = at.loc[revised, 'area'] + 1.5
+    at.loc[moved, 'year'] = at.loc[moved, 'year'] + 1
+    at['parent_lgd'] = at['parent_lgd'].astype(object)
+    for code in reparented:
+        at.at[code, 'parent_lgd'] = int(codes[0])
+    # Dropped units are leaves, so removing them leaves no dangling parents.
+    has_children = set(int(p) for value in at['parent_lgd'].dropna()
+                       for p in (value if isinstance(value, list) else [value]))
+    dropped = np.array([code for code in codes[::-1] if code not in has_children][:4])
+    new = at.drop(index=dropped).reset_index()
+    added = old.iloc[:3].copy()
+    added['lgd_code'] = codes.max() + np.arange(1, 4)
+    added['parent_lgd'] = [int(codes[0]), [int(codes[0]), int(codes[1])], None]
+    new = pd.concat([new, added], ignore_index=True).sample(frac=1.0, random_state=0)
+    return old, new, dict(renamed=renamed, area_revised=revised, year_changed=moved, reparented=reparented,
+                          removed=dropped, added=added['lgd_code'].to_numpy())
+
+
+def test_diff_finds_each_kind_of_change():
+    old, new, expected = _releases()
+    changes = diff_datasets(old, new)
+    for field, codes in expected.items():
+        assert sorted(getattr(changes, field)['lgd_code'].tolist()) == sorted(codes.tolist()), field
+    assert change_counts(changes)['added_edges'] == 3 + len(expected['reparented'])
+    assert set(changes.removed_edges['child_lgd'].tolist()) <= set(expected['reparented'].tolist()) | \
+        set(expected['removed'].tolist())
+    assert changed_codes(changes).tolist() == sorted(set(np.concatenate(list(expected.values())).tolist()))
+
+
+def test_diff_versions_match_dataset_version():
+    old, new, _ = _releases()
+    changes = diff_datasets(old, new)
+    assert changes.old_version == dataset_version(old)
+    assert changes.new_version == dataset_version(new)
+    assert changes.old_version != changes.new_version
+    assert diff_datasets(old, new, 'a', 'b')[:2] == ('a', 'b')
+
+
+def test_unchanged_release_has_no_changes():
+    old, _, _ = _releases()
+    shuffled = old.sample(frac=1.0, random_state=1)
+    changes = diff_datasets(old, shuffled)
+    assert not any(change_counts(changes).values())
+    assert changes.old_version == changes.new_version
+
+
+def test_row_hashes_treat_parents_as_sets():
+    df = pd.DataFrame({'lgd_code': [1, 2, 3, 4], 'year': 2000, 'district': ['a', 'b', 'c', 'd'], 'area': 1.0,
+                       'parent_lgd': [None, 1, [1, 2], [2, 1]]})
+    same = df.assign(parent_lgd=[[], [1], [1, 2], [1, 2]])
+    assert (row_hashes(df) == row_hashes(same)).all()
+    assert len(set(row_hashes(df).tolist())) == 4
@@ -0,0 +1,63 @@
+import warnings
+from collections import defaultdict
+
+import networkx as nx
+import pytest
+
+import py1
+from synthetic_lineage import generate_synthetic_lineage
+
+
+def _reference_visual_graph(df):
+    # The string-keyed visual graph py1.create_district_graphs used to build.
+    G = nx.DiGraph()
+    rows = df.set_index('lgd_code').to_dict('index')
+    splits = defaultdict(set)
+    G.add_nodes_from(rows)
+    for code, data in rows.items():
+        parents = data['parent_lgd'] if isinstance(data['parent_lgd'], list) else \
+            ([] if data['parent_lgd'] is None else [data['parent_lgd']])
+        if len(parents) > 1:
+            for parent in parents:
+                G.add_edge(int(parent), f"junction_{code}")
+            G.add_edge(f"junction_{code}", code)
+        elif parents:
+            G.add_edge(int(parents[0]), code)
+        for parent in parents:
+            splits[int(parent)].add(data['year'])
+    for parent, years in splits.items():
+        previous = parent
+        for year in sorted(years):
+            G.add_edge(previous, f"remnant_{parent}_{year}")
+            previous = f"remnant_{parent}_{year}"
+    return G
+
+
+def _relabelled(timeline):
+    mapping = {}
+    for slot, (kind, owner, year) in enumerate(zip(timeline.kind, timeline.owner, timeline.year)):
+        mapping[timeline.first_id + slot] = (f"junction_{owner}" if kind == py1.TIMELINE_JUNCTION
+                                             else f"remnant_{owner}_{year}")
+    return nx.relabel_nodes(timeline.graph, mapping)
+
+
+@pytest.mark.parametrize('df', [py1.load_district_data(), generate_synthetic_lineage(3000, seed=5)],
+                         ids=['bundled', 'synthetic'])
+def test_timeline_matches_reference_visual_graph(df):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        G = py1.create_district_graph(df)
+    timeline = py1.district_timeline(G)
+    assert timeline.first_id > max(G.nodes)
+    relabelled = _relabelled(timeline)
+    expected = _reference_visual_graph(df)
+    assert set(relabelled.nodes) == set(expected.nodes)
+    assert set(relabelled.edges) == set(expected.edges)
+
+
+def test_create_district_graphs_keeps_its_pair_return():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        G, visual = py1.create_district_graphs(py1.load_district_data())
+        assert nx.utils.graphs_equal(G, py1.create_district_graph(py1.load_district_data()))
+    assert set(G.nodes) < set(visual.nodes)
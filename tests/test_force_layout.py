@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from force_layout import EXACT_REPULSION_MAX_NODES, _exact_repulsion, _kernel_spectrum, _mesh_repulsion, force_layout
+
+
+def _relative_errors(dim: int, n: int = 2500, grid_size: int = None):
+    rng = np.random.default_rng(0)
+    scale = n ** (1.0 / dim)
+    pos = rng.uniform(-scale, scale, size=(n, dim))
+    grid_size = grid_size or int(np.clip(2 * np.ceil(n ** (1.0 / dim)), 16, 48 if dim == 3 else 512))
+    mesh = _mesh_repulsion(pos, grid_size, _kernel_spectrum(grid_size, dim))
+    exact = _exact_repulsion(pos)
+    overall = np.linalg.norm(mesh - exact) / np.linalg.norm(exact)
+    per_node = np.linalg.norm(mesh - exact, axis=1) / np.linalg.norm(exact, axis=1)
+    return overall, np.median(per_node)
+
+
+@pytest.mark.parametrize('dim, overall_bound, median_bound', [(3, 0.03, 0.02), (2, 0.10, 0.05)])
+def test_mesh_repulsion_tracks_exact_forces(dim, overall_bound, median_bound):
+    overall, median = _relative_errors(dim)
+    assert overall < overall_bound
+    assert median < median_bound
+
+
+def test_force_layout_is_seeded_and_normalized():
+    n = EXACT_REPULSION_MAX_NODES + 100
+    src = np.arange(1, n) // 2
+    dst = np.arange(1, n)
+    first = force_layout(n, src, dst, dim=2, iterations=5, seed=7)
+    second = force_layout(n, src, dst, dim=2, iterations=5, seed=7)
+    np.testing.assert_array_equal(first, second)
+    assert np.isclose(np.abs(first).max(), 1.0)
@@ -0,0 +1,51 @@
+import random
+
+import networkx as nx
+import pytest
+
+from lineage_checks import IncrementalTopologicalOrder, LineageCycleError, check_acyclic
+
+
+def _assert_topological(order: IncrementalTopologicalOrder, G: nx.DiGraph) -> None:
+    position = {node: i for i, node in enumerate(order.topological_order())}
+    assert all(position[u] < position[v] for u, v in G.edges)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pearce_kelly_agrees_with_networkx(seed):
+    rng = random.Random(seed)
+    order = IncrementalTopologicalOrder()
+    G = nx.DiGraph()
+    for _ in range(600):
+        u, v = rng.randrange(60), rng.randrange(60)
+        if rng.random() < 0.1 and G.number_of_edges():
+            u, v = rng.choice(list(G.edges))
+            order.remove_edge(u, v)
+            G.remove_edge(u, v)
+            continue
+        G.add_edge(u, v)
+        acyclic = nx.is_directed_acyclic_graph(G)
+        if acyclic:
+            order.add_edge(u, v)
+        else:
+            G.remove_edge(u, v)
+            with pytest.raises(LineageCycleError):
+                order.add_edge(u, v)
+        _assert_topological(order, G)
+
+
+def test_remove_node_drops_its_edges():
+    order = IncrementalTopologicalOrder()
+    order.add_edges_from([(1, 2), (2, 3)])
+    order.remove_node(2)
+    assert 2 not in order
+    order.add_edge(3, 1)
+    assert order.topological_order().index(3) < order.topological_order().index(1)
+
+
+def test_check_acyclic_rejects_cycles():
+    G = nx.DiGraph([(1, 2), (2, 3)])
+    check_acyclic(G)
+    G.add_edge(3, 1)
+    with pytest.raises(LineageCycleError):
+        check_acyclic(G)
@@ -0,0 +1,59 @@
+import itertools
+import warnings
+
+import networkx as nx
+import numpy as np
+import pytest
+
+import py1
+from lineage_arrays import build_lineage_arrays
+from lineage_lca import LineageLCA
+from synthetic_lineage import generate_synthetic_lineage
+
+
+def _brute_force(G: nx.DiGraph, a: int, b: int):
+    up_a = nx.single_source_shortest_path_length(G.reverse(copy=False), a)
+    up_b = nx.single_source_shortest_path_length(G.reverse(copy=False), b)
+    common = set(up_a) & set(up_b)
+    if not common:
+        return set(), -1
+    best = min(up_a[node] + up_b[node] for node in common)
+    return {node for node in common if up_a[node] + up_b[node] == best}, best
+
+
+@pytest.mark.parametrize('df', [py1.load_district_data(), generate_synthetic_lineage(400, seed=3)],
+                         ids=['bundled', 'synthetic'])
+def test_common_origin_matches_brute_force(df):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        G = py1.create_district_graph(df)
+    lca = LineageLCA(build_lineage_arrays(df))
+    codes = sorted(G.nodes)
+    if len(codes) > 60:
+        codes = np.random.default_rng(0).choice(codes, 60, replace=False).tolist()
+    pairs = list(itertools.combinations(codes, 2)) + [(code, code) for code in codes[:5]]
+    a, b = map(list, zip(*pairs))
+    origins = lca.common_origin_batch(a, b)
+    distances = lca.lineage_distance_batch(a, b)
+    for (first, second), origin, distance in zip(pairs, origins.tolist(), distances.tolist()):
+        candidates, best = _brute_force(G, first, second)
+        assert distance == best
+        assert (origin == -1) if not candidates else (origin in candidates)
+
+
+def test_unknown_codes_raise_key_error():
+    lca = LineageLCA(build_lineage_arrays(py1.load_district_data()))
+    with pytest.raises(KeyError):
+        lca.common_origin(470, 1)
+
+
+def test_ancestor_cache_is_bounded():
+    df = generate_synthetic_lineage(400, seed=3)
+    arrays = build_lineage_arrays(df)
+    lca = LineageLCA(arrays, ancestor_cache_size=8)
+    codes = arrays.codes.tolist()
+    a, b = codes[:100], codes[100:200]
+    assert lca.common_origin_batch(a, b).tolist() == LineageLCA(arrays).common_origin_batch(a, b).tolist()
+    assert len(lca._ancestor_cache) <= 8
+    with pytest.raises(ValueError):
+        LineageLCA(arrays, ancestor_cache_size=0)
@@ -0,0 +1,34 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from lineage_arrays import build_lineage_arrays
+from panel_store import PanelStore, district_families, materialize_area_evolution
+from synthetic_lineage import generate_synthetic_lineage
+
+pytest.importorskip('pyarrow')
+
+
+def test_family_filter_follows_every_parent(tmp_path):
+    df = generate_synthetic_lineage(3000, seed=4)
+    arrays = build_lineage_arrays(df)
+    G = nx.DiGraph(zip(arrays.codes[arrays.src].tolist(), arrays.codes[arrays.dst].tolist()))
+    G.add_nodes_from(arrays.codes.tolist())
+    store = PanelStore(str(tmp_path))
+    year = int(arrays.years.max())
+    materialize_area_evolution(df, store, [year])
+
+    other_family = 0
+    for family in np.unique(district_families(arrays))[:40].tolist():
+        panel = store.read(years=(year, year), families=[family], lineage=arrays)
+        assert set(panel['lgd_code'].tolist()) == nx.descendants(G, family) | {family}
+        other_family += int((panel['family'] != family).sum())
+    assert other_family > 0
+
+
+def test_family_filter_needs_lineage(tmp_path):
+    df = generate_synthetic_lineage(200, seed=4)
+    store = PanelStore(str(tmp_path))
+    materialize_area_evolution(df, store, [int(df['year'].max())])
+    with pytest.raises(ValueError):
+        store.read(families=[int(df['lgd_code'].iloc[0])])
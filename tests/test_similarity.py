@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import similarity
+from similarity import SIGNATURE_COLUMNS, SimilarityIndex, similarity_index
+from synthetic_lineage import generate_synthetic_lineage
+
+pytest.importorskip('sklearn')
+
+
+def _signatures(vectors):
+    matrix = np.tile(np.asarray(vectors, dtype=np.float64), (1, len(SIGNATURE_COLUMNS)))
+    frame = pd.DataFrame(matrix, columns=list(SIGNATURE_COLUMNS))
+    frame.insert(0, 'district', [f"d{i}" for i in range(len(frame))])
+    frame.insert(0, 'lgd_code', np.arange(100, 100 + len(frame)))
+    return frame
+
+
+def test_query_never_returns_itself_among_duplicates():
+    # Six identical vectors: the tree may return them in any order, so the query
+    # itself is not necessarily first among the ties.
+    index = SimilarityIndex(_signatures([[0.0]] * 6 + [[1.0], [5.0]]), 'v')
+    result = index.query(range(100, 106), k=3)
+    assert len(result) == 18
+    assert (result['query_lgd'] != result['lgd_code']).all()
+    assert (result['distance'] == 0).all()
+    for _, rows in result.groupby('query_lgd'):
+        assert rows['rank'].tolist() == [1, 2, 3]
+        assert rows['lgd_code'].is_unique
+
+
+def test_query_with_k_at_least_n_returns_every_other_unit():
+    index = SimilarityIndex(_signatures([[0.0], [0.0], [2.0], [3.0]]), 'v')
+    for k in (3, 4, 10):
+        result = index.query([100, 102], k=k)
+        for code, rows in result.groupby('query_lgd'):
+            assert sorted(rows['lgd_code'].tolist()) == sorted(set(range(100, 104)) - {code})
+            assert rows['distance'].is_monotonic_increasing
+    assert index.query([100], k=0).empty
+
+
+def test_index_persists_under_the_cache_dir(tmp_path, monkeypatch):
+    df = generate_synthetic_lineage(300, seed=9)
+    index = similarity_index(df, str(tmp_path))
+    assert similarity_index(df, str(tmp_path)) is index
+    assert len(list(tmp_path.iterdir())) == 1
+
+    monkeypatch.setattr(similarity, '_index_cache', type(similarity._index_cache)())
+    reloaded = similarity_index(df.copy(), str(tmp_path))
+    assert reloaded is not index and reloaded.version == index.version
+    assert np.array_equal(reloaded.query([int(df['lgd_code'].iloc[0])], 5)['lgd_code'],
+                          index.query([int(df['lgd_code'].iloc[0])], 5)['lgd_code'])
@@ -0,0 +1,78 @@
+import warnings
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+import py1
+from lineage_arrays import build_lineage_arrays
+from subgraph import extract_subgraph, neighbourhood, subgraph_frame, to_networkx
+from synthetic_lineage import generate_synthetic_lineage
+
+
+@pytest.fixture(scope='module', params=['bundled', 'synthetic'])
+def lineage(request):
+    df = py1.load_district_data() if request.param == 'bundled' else generate_synthetic_lineage(2000, seed=7)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        G = py1.create_district_graph(df)
+    arrays = build_lineage_arrays(df)
+    seeds = np.random.default_rng(1).choice(arrays.codes, 15, replace=False).tolist()
+    return G, arrays, seeds
+
+
+def _codes(arrays, nodes):
+    return set(arrays.codes[nodes].tolist())
+
+
+@pytest.mark.parametrize('hops', [None, 0, 1, 2])
+def test_directed_walks_match_networkx(lineage, hops):
+    G, arrays, seeds = lineage
+    for seed in seeds:
+        if hops is None:
+            down, up = nx.descendants(G, seed), nx.ancestors(G, seed)
+        else:
+            down = set(nx.single_source_shortest_path_length(G, seed, cutoff=hops))
+            up = set(nx.single_source_shortest_path_length(G.reverse(copy=False), seed, cutoff=hops))
+        down, up = down | {seed}, up | {seed}
+        assert _codes(arrays, neighbourhood(arrays, [seed], hops, 'descendants')) == down
+        assert _codes(arrays, neighbourhood(arrays, [seed], hops, 'ancestors')) == up
+        assert _codes(arrays, neighbourhood(arrays, [seed], hops, 'lineage')) == down | up
+
+
+@pytest.mark.parametrize('hops', [0, 1, 3])
+def test_undirected_walk_matches_ego_graph(lineage, hops):
+    G, arrays, seeds = lineage
+    for seed in seeds:
+        expected = set(nx.ego_graph(G, seed, radius=hops, undirected=True).nodes)
+        assert _codes(arrays, neighbourhood(arrays, [seed], hops, 'undirected')) == expected
+
+
+def test_year_window_filters_after_the_walk(lineage):
+    G, arrays, seeds = lineage
+    years = nx.get_node_attributes(G, 'year')
+    window = (int(np.percentile(arrays.years, 40)), int(np.percentile(arrays.years, 70)))
+    for seed in seeds:
+        reached = nx.descendants(G, seed)
+        expected = {node for node in reached if window[0] <= years[node] <= window[1]} | {seed}
+        assert _codes(arrays, neighbourhood(arrays, [seed], direction='descendants', years=window)) == expected
+
+
+def test_subgraph_matches_induced_networkx_graph(lineage):
+    G, arrays, seeds = lineage
+    sub = extract_subgraph(arrays, seeds[:3], hops=2, direction='undirected')
+    expected = G.subgraph(sub.codes.tolist())
+    assert set(to_networkx(sub).edges) == set(expected.edges)
+
+
+def test_frame_keeps_parents_outside_the_subgraph(lineage):
+    G, arrays, seeds = lineage
+    sub = extract_subgraph(arrays, seeds[:3], hops=1, direction='descendants')
+    frame = subgraph_frame(arrays, sub)
+    for code, parent in zip(frame['lgd_code'].tolist(), frame['parent_lgd'].tolist()):
+        parents = set(G.predecessors(code))
+        if not parents:
+            assert pd.isna(parent)
+        else:
+            assert set(parent if isinstance(parent, list) else [parent]) == parents
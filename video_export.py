@@ -0,0 +1,158 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import warnings
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_import
+
+matplotlib = lazy_import('matplotlib')
+mpl_figure = lazy_import('matplotlib.figure')
+backend_agg = lazy_import('matplotlib.backends.backend_agg')
+Image = lazy_import('PIL.Image')
+
+# yuv420p needs even frame sizes, so both video codecs pad odd ones by a pixel.
+EVEN_PAD = ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2']
+ENCODER_ARGS = {
+    '.mp4': EVEN_PAD + ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-preset', 'medium', '-crf', '23',
+                        '-tune', 'animation', '-movflags', '+faststart'],
+    '.webm': EVEN_PAD + ['-c:v', 'libvpx-vp9', '-pix_fmt', 'yuv420p', '-b:v', '0', '-crf', '35', '-row-mt', '1'],
+    '.webp': ['-c:v', 'libwebp_anim', '-lossless', '0', '-quality', '80', '-loop', '0'],
+}
+GIF_COLORS = 256
+MAX_TICK_LABELS = 60
+
+
+def ffmpeg_path() -> Optional[str]:
+    return shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+
+
+class FFmpegPipe:
+    def __init__(self, path: str, width: int, height: int, fps: float, binary: str) -> None:
+        self.path = path
+        self.frames = 0
+        self.closed = False
+        self._stderr = tempfile.TemporaryFile()
+        command = [binary, '-hide_banner', '-loglevel', 'error', '-y',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{width}x{height}", '-r', str(fps), '-i', '-',
+                   *ENCODER_ARGS[os.path.splitext(path)[1].lower()], path]
+        # stderr goes to a file rather than a pipe so a chatty encoder can never
+        # block on a full pipe while we are blocked writing frames to it.
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                         stderr=self._stderr)
+
+    def write(self, frame: np.ndarray) -> None:
+        try:
+            self._process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        except BrokenPipeError:
+            self.close()
+        self.frames += 1
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        code = self._process.wait()
+        self._stderr.seek(0)
+        message = self._stderr.read().decode(errors='replace').strip()
+        self._stderr.close()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg exited with status {code} writing '{self.path}': {message[-2000:]}")
+
+
+class GifWriter:
+    def __init__(self, path: str, fps: float) -> None:
+        self.path = path
+        self.frames = 0
+        self.duration = int(round(1000 / fps))
+        self._images: List = []
+
+    def write(self, frame: np.ndarray) -> None:
+        # Frames are palettised on arrival: one byte per pixel is all a GIF keeps.
+        image = Image.fromarray(np.ascontiguousarray(frame, dtype=np.uint8))
+        self._images.append(image.quantize(colors=GIF_COLORS, method=Image.Quantize.MEDIANCUT))
+        self.frames += 1
+
+    def close(self) -> None:
+        if self._images:
+            self._images[0].save(self.path, save_all=True, append_images=self._images[1:], duration=self.duration,
+                                 loop=0, optimize=True)
+        self._images = []
+
+
+def open_encoder(path: str, width: int, height: int, fps: float):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.gif':
+        return GifWriter(path, fps)
+    if extension not in ENCODER_ARGS:
+        raise ValueError(f"Unsupported animation format '{extension}', expected one of "
+                         f"{sorted(ENCODER_ARGS) + ['.gif']}")
+    binary = ffmpeg_path()
+    if binary is None:
+        fallback = os.path.splitext(path)[0] + '.gif'
+        warnings.warn(f"ffmpeg not found; writing '{fallback}' instead of '{path}'.")
+        return GifWriter(fallback, fps)
+    return FFmpegPipe(path, width, height, fps, binary)
+
+
+def heatmap_matrix(df: pd.DataFrame):
+    pivot = df.pivot_table(index='district', columns='year', values='area', aggfunc='first')
+    return pivot.index.tolist(), np.asarray(pivot.columns), pivot.to_numpy(dtype=np.float64)
+
+
+def render_heatmap_frames(df: pd.DataFrame, figsize=(15, 10), dpi: int = 100) -> Iterator[np.ndarray]:
+    districts, years, values = heatmap_matrix(df)
+    values = np.nan_to_num(values, nan=0.0)
+
+    # One figure is drawn once; each frame restores that background and redraws
+    # only the image and title, so memory and per-frame cost stay flat.
+    fig = mpl_figure.Figure(figsize=figsize, dpi=dpi)
+    canvas = backend_agg.FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    image = ax.imshow(np.ma.masked_all(values.shape), cmap='viridis', aspect='auto', interpolation='nearest',
+                      vmin=float(values.min()), vmax=float(values.max()), animated=True)
+    fig.colorbar(image, ax=ax, label='Area (km²)')
+    ax.set_xticks(np.arange(len(years)), [str(year) for year in years], rotation=45)
+    step = max(1, int(np.ceil(len(districts) / MAX_TICK_LABELS)))
+    ax.set_yticks(np.arange(0, len(districts), step), districts[::step])
+    ax.set_xlabel('Year', fontsize=12)
+    ax.set_ylabel('District', fontsize=12)
+    title = ax.set_title(f'District Areas Over Time (Up to {years[-1]})', fontsize=16, animated=True)
+    fig.tight_layout()
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+
+    mask = np.ones(values.shape, dtype=bool)
+    for i, year in enumerate(years.tolist()):
+        mask[:, i] = False
+        image.set_data(np.ma.masked_array(values, mask=mask.copy()))
+        title.set_text(f'District Areas Over Time (Up to {year})')
+        canvas.restore_region(background)
+        ax.draw_artist(image)
+        ax.draw_artist(title)
+        yield np.asarray(canvas.buffer_rgba())[:, :, :3]
+
+
+def export_heatmap_animation(df: pd.DataFrame, path: str = 'district_area_heatmap.mp4', fps: float = 1,
+                             figsize=(15, 10), dpi: int = 100) -> str:
+    if df.empty:
+        raise ValueError("No district areas to animate")
+    encoder = None
+    try:
+        for frame in render_heatmap_frames(df, figsize=figsize, dpi=dpi):
+            if encoder is None:
+                height, width = frame.shape[:2]
+                encoder = open_encoder(path, width, height, fps)
+            encoder.write(frame)
+    finally:
+        if encoder is not None:
+            encoder.close()
+    return encoder.path
@@ -1,13 +1,14 @@
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.animation import FuncAnimation
-import random
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from counter_rng import counter_normal
+from instrumentation import count, span, traced
+from lazy_imports import lazy_import
+from video_export import export_heatmap_animation
+
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
 
 
 def load_initial_data():
@@ -50,41 +51,73 @@ def load_initial_data():
     return pd.DataFrame(district_data)
 
 
-def generate_time_series_data():
-    df = load_initial_data()
+TIME_SERIES_SEED = 42
+TIME_SERIES_YEARS = range(1998, 2026)
 
-    years = list(range(1998, 2026))
 
-    time_series_data = []
+def build_time_series(df, years, seed):
+    years = np.asarray(years, dtype=np.int64)
+    formation_years = df['year'].to_numpy(dtype=np.int64)
+    year_grid = np.repeat(years, len(df))
+    row_index = np.tile(np.arange(len(df)), len(years))
+    exists = formation_years[row_index] <= year_grid
+    year_grid, row_index = year_grid[exists], row_index[exists]
 
-    for year in years:
-        existing_districts = df[df['year'] <= year].copy()
+    lgd_codes = df['lgd_code'].to_numpy(dtype=np.int64)[row_index]
+    base_area = df['area'].to_numpy(dtype=np.float64)[row_index]
+    years_since_creation = year_grid - formation_years[row_index]
 
-        for _, district in existing_districts.iterrows():
-            base_area = district['area']
+    growth_factor = 1 + (np.sin(years_since_creation * 0.3) * 0.02)
+    seasonal_factor = 1 + (np.sin((year_grid - 1998) * 0.5) * 0.01)
+    random_factor = 1 + counter_normal(seed, lgd_codes, year_grid, scale=0.005)
 
-            years_since_creation = year - district['year']
+    adjusted_area = base_area * growth_factor * seasonal_factor * random_factor
 
-            growth_factor = 1 + (np.sin(years_since_creation * 0.3) * 0.02)
-            seasonal_factor = 1 + (np.sin((year - 1998) * 0.5) * 0.01)
-            random_factor = 1 + (np.random.normal(0, 0.005))
+    return pd.DataFrame({
+        'year': year_grid,
+        'district': df['district'].to_numpy()[row_index],
+        'lgd_code': lgd_codes,
+        'area': adjusted_area,
+        'base_area': base_area,
+        'change_percent': ((adjusted_area - base_area) / base_area) * 100
+    })
 
-            adjusted_area = base_area * growth_factor * seasonal_factor * random_factor
 
-            time_series_data.append({
-                'year': year,
-                'district': district['district'],
-                'lgd_code': district['lgd_code'],
-                'area': adjusted_area,
-                'base_area': base_area,
-                'change_percent': ((adjusted_area - base_area) / base_area) * 100
-            })
+def _select_districts(lgd_codes=None):
+    df = load_initial_data()
+    if lgd_codes is not None:
+        df = df[df['lgd_code'].isin(list(lgd_codes))]
+    return df
+
 
-    return pd.DataFrame(time_series_data)
+def iter_time_series_by_year(seed=TIME_SERIES_SEED, years=TIME_SERIES_YEARS, lgd_codes=None):
+    df = _select_districts(lgd_codes)
+    for year in years:
+        yield build_time_series(df, [year], seed)
 
 
-def create_animated_heatmap_plotly():
-    df = generate_time_series_data()
+@traced('generate_time_series_data')
+def generate_time_series_data(seed=TIME_SERIES_SEED, years=TIME_SERIES_YEARS, lgd_codes=None):
+    with span('load'):
+        df = _select_districts(lgd_codes)
+    data = build_time_series(df, list(years), seed)
+    count('cells', len(data))
+    return data
+
+
+def generate_time_series_parallel(seed=TIME_SERIES_SEED, years=TIME_SERIES_YEARS, lgd_codes=None,
+                                  max_workers=None, years_per_task=4):
+    years = list(years)
+    chunks = [years[i:i + years_per_task] for i in range(0, len(years), years_per_task)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        parts = list(executor.map(generate_time_series_data, [seed] * len(chunks), chunks,
+                                  [lgd_codes] * len(chunks)))
+    return pd.concat(parts, ignore_index=True)
+
+
+def create_animated_heatmap_plotly(df=None):
+    if df is None:
+        df = generate_time_series_data()
 
     heatmap_data = df.pivot(index='district', columns='year', values='area')
 
@@ -110,8 +143,9 @@ def create_animated_heatmap_plotly():
     return fig
 
 
-def create_animated_change_heatmap():
-    df = generate_time_series_data()
+def create_animated_change_heatmap(df=None):
+    if df is None:
+        df = generate_time_series_data()
 
     change_data = df.pivot(index='district', columns='year', values='change_percent')
 
@@ -138,8 +172,9 @@ def create_animated_change_heatmap():
     return fig
 
 
-def create_rolling_heatmap():
-    df = generate_time_series_data()
+def create_rolling_heatmap(df=None):
+    if df is None:
+        df = generate_time_series_data()
 
     frames = []
     years = sorted(df['year'].unique())
@@ -239,48 +274,20 @@ def create_rolling_heatmap():
     return fig
 
 
-def create_matplotlib_animated_heatmap():
-    df = generate_time_series_data()
-
-    years = sorted(df['year'].unique())
-    districts = sorted(df['district'].unique())
-
-    fig, ax = plt.subplots(figsize=(15, 10))
-
-    def animate(frame_num):
-        ax.clear()
-
-        current_year = years[frame_num]
-        current_data = df[df['year'] <= current_year]
-
-        pivot_data = current_data.pivot(index='district', columns='year', values='area')
-        pivot_data = pivot_data.fillna(0)
-
-        sns.heatmap(pivot_data,
-                    annot=False,
-                    cmap='viridis',
-                    cbar_kws={'label': 'Area (km²)'},
-                    ax=ax)
+def create_matplotlib_animated_heatmap(df=None, path='district_area_heatmap.mp4', fps=1):
+    if df is None:
+        df = generate_time_series_data()
 
-        ax.set_title(f'District Areas Over Time (Up to {current_year})', fontsize=16)
-        ax.set_xlabel('Year', fontsize=12)
-        ax.set_ylabel('District', fontsize=12)
+    # Frames are rendered into one reused figure and piped to ffmpeg as they are
+    # drawn; without ffmpeg the same frames go to a GIF next to the requested path.
+    output = export_heatmap_animation(df, path, fps=fps)
+    print(f"Animated heatmap saved as '{output}'")
+    return output
 
-        plt.xticks(rotation=45)
-        plt.yticks(rotation=0)
 
-        plt.tight_layout()
-
-    anim = FuncAnimation(fig, animate, frames=len(years), interval=1000, repeat=True)
-
-    anim.save('district_area_heatmap.gif', writer='pillow', fps=1)
-    print("Animated heatmap saved as 'district_area_heatmap.gif'")
-
-    return anim
-
-
-def create_district_grid_heatmap():
-    df = generate_time_series_data()
+def create_district_grid_heatmap(df=None):
+    if df is None:
+        df = generate_time_series_data()
 
     formation_groups = df.groupby('district')['year'].min().reset_index()
     formation_groups.columns = ['district', 'formation_year']
@@ -369,30 +376,37 @@ def create_district_grid_heatmap():
 def main():
     print("Generating time series data...")
 
-    np.random.seed(42)
-
     print("Creating static area heatmap...")
-    fig1 = create_animated_heatmap_plotly()
-    fig1.show()
+    with span('build.area_heatmap'):
+        fig1 = create_animated_heatmap_plotly()
+    with span('render.area_heatmap'):
+        fig1.show()
 
     print("Creating percentage change heatmap...")
-    fig2 = create_animated_change_heatmap()
-    fig2.show()
+    with span('build.change_heatmap'):
+        fig2 = create_animated_change_heatmap()
+    with span('render.change_heatmap'):
+        fig2.show()
 
     print("Creating rolling window heatmap...")
-    fig3 = create_rolling_heatmap()
-    fig3.show()
+    with span('build.rolling_heatmap'):
+        fig3 = create_rolling_heatmap()
+    with span('render.rolling_heatmap'):
+        fig3.show()
 
     print("Creating district grid heatmap...")
-    fig4 = create_district_grid_heatmap()
-    fig4.show()
+    with span('build.grid_heatmap'):
+        fig4 = create_district_grid_heatmap()
+    with span('render.grid_heatmap'):
+        fig4.show()
 
-    print("Creating matplotlib animated heatmap (saves as GIF)...")
+    print("Creating matplotlib animated heatmap (saves as MP4, or GIF without ffmpeg)...")
     try:
-        anim = create_matplotlib_animated_heatmap()
-        print("GIF animation created successfully!")
+        with span('build.matplotlib_animation'):
+            create_matplotlib_animated_heatmap()
+        print("Animation created successfully!")
     except Exception as e:
-        print(f"Error creating GIF: {e}")
+        print(f"Error creating animation: {e}")
         print("Make sure you have matplotlib and pillow installed")
 
     df = generate_time_series_data()
@@ -411,7 +425,8 @@ if __name__ == "__main__":
     fig1, fig2, fig3, fig4 = main()
 
     # Optional: Save figures as HTML
-    fig1.write_html("area_over_time.html")
-    fig2.write_html("percentage_change.html")
-    fig3.write_html("rolling_window.html")
-    fig4.write_html("district_grid.html")
+    with span('write_html', figures=4):
+        fig1.write_html("area_over_time.html")
+        fig2.write_html("percentage_change.html")
+        fig3.write_html("rolling_window.html")
+        fig4.write_html("district_grid.html")
@@ -0,0 +1,310 @@
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from counter_rng import counter_uniforms
+from lazy_imports import lazy_import
+from lineage_arrays import LineageArrays, build_lineage_arrays, code_index
+
+go = lazy_import('plotly.graph_objects')
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+DEFAULT_SCENARIOS = 1000
+STATISTIC_FIELDS = ('total_districts', 'new_districts', 'current_districts_area', 'largest_district_area',
+                    'smallest_district_area')
+
+
+class CandidateSplit(NamedTuple):
+    parent_lgd: int
+    district: str
+    area_min: float
+    area_max: float
+    year_min: int
+    year_max: int
+    probability: float = 1.0
+
+
+class BaseSummary(NamedTuple):
+    n_districts: int
+    leaf_area: float
+    largest_area: float
+    smallest_area: float
+    years: np.ndarray
+    formations: np.ndarray
+    parents: np.ndarray
+    parent_areas: np.ndarray
+    parent_is_leaf: np.ndarray
+    remnant_years: np.ndarray
+    remnant: np.ndarray
+
+
+class SplitOverlay(NamedTuple):
+    # Scenario-specific rows layered over the shared base arrays: one column per
+    # candidate, one row per scenario. The base dataset itself is never copied.
+    scenarios: np.ndarray
+    codes: np.ndarray
+    parent_slot: np.ndarray
+    years: np.ndarray
+    areas: np.ndarray
+    applied: np.ndarray
+    feasible: np.ndarray
+
+
+class WhatIfResult(NamedTuple):
+    scenarios: int
+    statistics: pd.DataFrame
+    formations_by_year: pd.DataFrame
+    remnant_area: pd.DataFrame
+    candidates: pd.DataFrame
+
+
+_worker_state: Dict[str, Any] = {}
+
+
+def candidate_split(parent_lgd: int, district: str, area: float, year: int, area_uncertainty: float = 0.0,
+                    year_uncertainty: int = 0, probability: float = 1.0) -> CandidateSplit:
+    return CandidateSplit(int(parent_lgd), district, area * (1 - area_uncertainty), area * (1 + area_uncertainty),
+                          int(year) - year_uncertainty, int(year) + year_uncertainty, probability)
+
+
+def check_candidates(arrays: LineageArrays, candidates: Sequence[CandidateSplit]) -> None:
+    if not candidates:
+        raise ValueError("No candidate splits to simulate")
+    for candidate in candidates:
+        idx = code_index(arrays, [candidate.parent_lgd])[0]
+        if not 0 < candidate.area_min <= candidate.area_max:
+            raise ValueError(f"Invalid area range for '{candidate.district}': "
+                             f"{candidate.area_min} to {candidate.area_max}")
+        if not arrays.years[idx] <= candidate.year_min <= candidate.year_max:
+            raise ValueError(f"Invalid year range for '{candidate.district}': {candidate.year_min} to "
+                             f"{candidate.year_max} (parent formed in {arrays.years[idx]})")
+        if not 0 <= candidate.probability <= 1:
+            raise ValueError(f"Probability for '{candidate.district}' must be between 0 and 1")
+
+
+def summarize_base(arrays: LineageArrays, candidates: Sequence[CandidateSplit]) -> BaseSummary:
+    out_degree = np.diff(arrays.indptr)
+    years = np.union1d(arrays.years, np.concatenate([np.arange(c.year_min, c.year_max + 1) for c in candidates]))
+    parents = np.unique(code_index(arrays, [c.parent_lgd for c in candidates]))
+
+    # Same remnant rule as py1.compute_area_evolution: a district keeps its area
+    # minus every child formed up to that year, and has no area before it exists.
+    # Before the earliest candidate year every scenario matches the base, so the
+    # series only cover the years a candidate can change.
+    remnant_years = years[years >= min(c.year_min for c in candidates)]
+    remnant = np.zeros((len(parents), len(remnant_years)))
+    for slot, idx in enumerate(parents.tolist()):
+        children = arrays.indices[arrays.indptr[idx]:arrays.indptr[idx + 1]]
+        carved = (arrays.years[children][None, :] <= remnant_years[:, None]) @ arrays.areas[children]
+        remnant[slot] = np.where(remnant_years >= arrays.years[idx], arrays.areas[idx] - carved, 0.0)
+
+    return BaseSummary(
+        n_districts=len(arrays.codes), leaf_area=float(arrays.areas[out_degree == 0].sum()),
+        largest_area=float(arrays.areas.max()), smallest_area=float(arrays.areas.min()),
+        years=years, formations=np.bincount(np.searchsorted(years, arrays.years), minlength=len(years)),
+        parents=parents, parent_areas=arrays.areas[parents], parent_is_leaf=out_degree[parents] == 0,
+        remnant_years=remnant_years, remnant=remnant,
+    )
+
+
+def draw_overlay(base: BaseSummary, parent_idx: np.ndarray, candidates: Sequence[CandidateSplit],
+                 scenarios: np.ndarray, seed: int, first_code: int) -> SplitOverlay:
+    n_candidates = len(candidates)
+    area_min, area_max, year_min, year_max, probability = (
+        np.array([getattr(c, field) for c in candidates], dtype=np.float64)
+        for field in ('area_min', 'area_max', 'year_min', 'year_max', 'probability'))
+
+    # Draws are keyed by (candidate, scenario id), so a scenario is the same no
+    # matter which worker or chunk evaluates it.
+    ids = np.arange(n_candidates)[None, :]
+    size_year = counter_uniforms(seed, ids, scenarios[:, None], stream=0)
+    happens = counter_uniforms(seed, ids, scenarios[:, None], stream=1)[..., 0] < probability
+    areas = area_min + size_year[..., 0] * (area_max - area_min)
+    years = (year_min + np.floor(size_year[..., 1] * (year_max - year_min + 1))).astype(np.int64)
+
+    # Candidates are applied in listed order and must fit in the parent's recorded
+    # area less earlier candidates on it. The LGD areas of existing children often
+    # already exceed the parent's, so the base remnant cannot serve as the limit.
+    parent_slot = np.searchsorted(base.parents, parent_idx)
+    available = np.repeat(base.parent_areas[None, :], len(scenarios), axis=0)
+    feasible = np.zeros((len(scenarios), n_candidates), dtype=bool)
+    applied = np.zeros((len(scenarios), n_candidates), dtype=bool)
+    for c in range(n_candidates):
+        slot = parent_slot[c]
+        feasible[:, c] = areas[:, c] <= available[:, slot]
+        applied[:, c] = feasible[:, c] & happens[:, c]
+        available[:, slot] -= np.where(applied[:, c], areas[:, c], 0.0)
+
+    return SplitOverlay(scenarios=scenarios, codes=first_code + np.arange(n_candidates), parent_slot=parent_slot,
+                        years=years, areas=areas, applied=applied, feasible=feasible)
+
+
+def overlay_metrics(base: BaseSummary, overlay: SplitOverlay) -> Dict[str, np.ndarray]:
+    n_scenarios = len(overlay.scenarios)
+    scenario, candidate = np.nonzero(overlay.applied)
+    slot = overlay.parent_slot[candidate]
+    areas, years = overlay.areas[scenario, candidate], overlay.years[scenario, candidate]
+
+    # py1.compute_statistics sums the areas of districts without children: new
+    # children are leaves, and a base leaf that gains a child stops being one.
+    split_parent = np.zeros((n_scenarios, len(base.parents)), dtype=bool)
+    split_parent[scenario, slot] = True
+    leaf_area = (base.leaf_area + np.bincount(scenario, weights=areas, minlength=n_scenarios)
+                 - (split_parent & base.parent_is_leaf) @ base.parent_areas)
+    largest = np.full(n_scenarios, base.largest_area)
+    smallest = np.full(n_scenarios, base.smallest_area)
+    np.maximum.at(largest, scenario, areas)
+    np.minimum.at(smallest, scenario, areas)
+
+    formations = np.tile(base.formations, (n_scenarios, 1))
+    np.add.at(formations, (scenario, np.searchsorted(base.years, years)), 1)
+    carved = np.zeros((n_scenarios, len(base.parents), len(base.remnant_years)))
+    np.add.at(carved, (scenario, slot, np.searchsorted(base.remnant_years, years)), areas)
+    np.cumsum(carved, axis=2, out=carved)
+
+    new_districts = overlay.applied.sum(axis=1)
+    return {
+        'total_districts': base.n_districts + new_districts, 'new_districts': new_districts,
+        'current_districts_area': leaf_area, 'largest_district_area': largest,
+        'smallest_district_area': smallest,
+        'formations': formations, 'remnant': base.remnant[None, :, :] - carved,
+        'applied': overlay.applied, 'feasible': overlay.feasible, 'areas': overlay.areas,
+    }
+
+
+def _init_worker(base: BaseSummary, parent_idx: np.ndarray, candidates: List[CandidateSplit], seed: int,
+                 first_code: int) -> None:
+    _worker_state.update(base=base, parent_idx=parent_idx, candidates=candidates, seed=seed,
+                         first_code=first_code)
+
+
+def _simulate_chunk(scenarios: np.ndarray) -> Dict[str, np.ndarray]:
+    state = _worker_state
+    overlay = draw_overlay(state['base'], state['parent_idx'], state['candidates'], scenarios, state['seed'],
+                           state['first_code'])
+    return overlay_metrics(state['base'], overlay)
+
+
+def _percentile_frame(samples: np.ndarray, base_values: np.ndarray, index: pd.Index,
+                      percentiles: Sequence[float]) -> pd.DataFrame:
+    frame = pd.DataFrame(np.percentile(samples, percentiles, axis=0).reshape(len(percentiles), -1).T,
+                         index=index, columns=[f"p{p:g}" for p in percentiles])
+    frame.insert(0, 'base', np.asarray(base_values, dtype=np.float64).reshape(-1))
+    frame['mean'] = samples.reshape(len(samples), -1).mean(axis=0)
+    return frame
+
+
+def simulate_splits(df: pd.DataFrame, candidates: Sequence[CandidateSplit], n_scenarios: int = DEFAULT_SCENARIOS,
+                    seed: int = 42, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                    max_workers: Optional[int] = None, chunk_size: int = 250) -> WhatIfResult:
+    if n_scenarios < 1:
+        raise ValueError(f"n_scenarios must be at least 1, got {n_scenarios}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    arrays = build_lineage_arrays(df)
+    candidates = list(candidates)
+    check_candidates(arrays, candidates)
+    base = summarize_base(arrays, candidates)
+    parent_idx = code_index(arrays, [c.parent_lgd for c in candidates])
+    first_code = int(arrays.codes.max()) + 1
+
+    scenario_ids = np.arange(n_scenarios, dtype=np.int64)
+    chunks = [scenario_ids[start:start + chunk_size] for start in range(0, n_scenarios, chunk_size)]
+    initargs = (base, parent_idx, candidates, seed, first_code)
+    if len(chunks) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=initargs) as executor:
+            parts = list(executor.map(_simulate_chunk, chunks))
+    else:
+        _init_worker(*initargs)
+        parts = [_simulate_chunk(chunk) for chunk in chunks]
+    metrics = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    statistics = _percentile_frame(
+        np.stack([metrics[name] for name in STATISTIC_FIELDS], axis=1).astype(np.float64),
+        np.array([base.n_districts, 0, base.leaf_area, base.largest_area, base.smallest_area]),
+        pd.Index(STATISTIC_FIELDS, name='statistic'), percentiles)
+    formations = _percentile_frame(metrics['formations'], base.formations, pd.Index(base.years, name='year'),
+                                   percentiles)
+    remnant = _percentile_frame(metrics['remnant'], base.remnant, pd.MultiIndex.from_product(
+        [arrays.codes[base.parents], base.remnant_years], names=['lgd_code', 'year']), percentiles)
+    remnant.insert(0, 'district', np.repeat(arrays.names[base.parents], len(base.remnant_years)))
+
+    summary = pd.DataFrame({
+        'lgd_code': first_code + np.arange(len(candidates)),
+        'district': [c.district for c in candidates],
+        'parent_lgd': [c.parent_lgd for c in candidates],
+        'applied_rate': metrics['applied'].mean(axis=0),
+        'feasible_rate': metrics['feasible'].mean(axis=0),
+        'median_area': pd.DataFrame(np.where(metrics['applied'], metrics['areas'], np.nan)).median().to_numpy(),
+    })
+    return WhatIfResult(n_scenarios, statistics, formations, remnant, summary)
+
+
+def scenario_frame(df: pd.DataFrame, candidates: Sequence[CandidateSplit], scenario: int,
+                   seed: int = 42) -> pd.DataFrame:
+    # One scenario as an ordinary district table, for inspecting it with the
+    # existing graph, statistics and visualization functions.
+    arrays = build_lineage_arrays(df)
+    candidates = list(candidates)
+    check_candidates(arrays, candidates)
+    base = summarize_base(arrays, candidates)
+    first_code = int(arrays.codes.max()) + 1
+    overlay = draw_overlay(base, code_index(arrays, [c.parent_lgd for c in candidates]), candidates,
+                           np.array([scenario], dtype=np.int64), seed, first_code)
+    applied = np.flatnonzero(overlay.applied[0])
+    added = pd.DataFrame({
+        'lgd_code': overlay.codes[applied], 'year': overlay.years[0, applied],
+        'district': [candidates[c].district for c in applied.tolist()], 'area': overlay.areas[0, applied],
+        'parent_lgd': [candidates[c].parent_lgd for c in applied.tolist()],
+    })
+    return pd.concat([df, added], ignore_index=True)
+
+
+def create_what_if_heatmap(result: WhatIfResult, percentile: str = 'p50'):
+    change = (result.remnant_area[percentile] - result.remnant_area['base']).unstack('year')
+    names = result.remnant_area['district'].groupby(level='lgd_code').first()
+    fig = go.Figure(data=go.Heatmap(
+        z=change.values, x=change.columns, y=names.loc[change.index].values, colorscale='RdBu', zmid=0,
+        hovertemplate='District: %{y}<br>Year: %{x}<br>Change: %{z:,.0f} sq km<extra></extra>'))
+    fig.update_layout(title=f'Simulated Change in Remaining Area ({percentile}, {result.scenarios} scenarios)',
+                      xaxis_title='Year', yaxis_title='Parent District', xaxis_type='category')
+    return fig
+
+
+def load_candidates(path: str) -> List[CandidateSplit]:
+    with open(path) as handle:
+        records = json.load(handle)
+    return [CandidateSplit(**record) if 'area_min' in record else candidate_split(**record) for record in records]
+
+
+def main() -> None:
+    from py1 import load_district_data
+
+    parser = argparse.ArgumentParser(description="Monte Carlo what-if simulation of proposed district splits.")
+    parser.add_argument('candidates', help="JSON list of splits (parent_lgd, district, area, year and optional "
+                                           "area_uncertainty, year_uncertainty, probability)")
+    parser.add_argument('--scenarios', type=int, default=DEFAULT_SCENARIOS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--heatmap', action='store_true', help="show the median remnant-area change heatmap")
+    args = parser.parse_args()
+    if args.scenarios < 1:
+        parser.error("--scenarios must be at least 1")
+
+    result = simulate_splits(load_district_data(), load_candidates(args.candidates), n_scenarios=args.scenarios,
+                             seed=args.seed, max_workers=args.workers)
+    print("=" * 60 + f"\n   What-If Simulation ({result.scenarios} scenarios)\n" + "=" * 60)
+    print(result.statistics.round(2).to_string())
+    print("\nCandidate Splits:")
+    print(result.candidates.round(3).to_string(index=False))
+    print("=" * 60)
+    if args.heatmap:
+        create_what_if_heatmap(result).show()
+
+
+if __name__ == '__main__':
+    main()